@@ -3,6 +3,15 @@ import uuid
 import argparse
 from dotenv import load_dotenv
 from src.graph import create_graph
+from src.state import make_initial_state
+from src.utils.metrics import flush_run_metrics
+from src.utils.artifact_writer import flush_artifacts
+from src.utils.pdf_text import DEFAULT_INPUT_MODE, INPUT_MODE_TEXT, INPUT_MODES, get_text_layer
+from src.utils.profiling import RunProfiler
+from src.utils.run_archive import mark_run_completed
+from src.agents.deadlines import RUN_BUDGET_SECONDS, set_run_budget
+from src.agents.context_cache import set_cache_run, release_run_caches
+from src.agents.pricing import close_bid_stream
 
 # Load environment variables
 load_dotenv()
@@ -16,12 +25,21 @@ def setup_run_directory(base_path: str = "data/runs") -> str:
 def main():
     parser = argparse.ArgumentParser(description="AI RFP Co-Pilot")
     parser.add_argument("pdf_path", help="Path to the RFP PDF file")
+    parser.add_argument("--input-mode", choices=INPUT_MODES, default=None,
+                        help="Send the RFP as extracted text, raw PDF, or decide automatically (default: SWIFTBID_INPUT_MODE or auto)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile CPU and memory per graph node; writes folded stacks and a summary to <run>/profile/")
+    parser.add_argument("--budget", type=float, default=RUN_BUDGET_SECONDS,
+                        help="Run time budget in seconds; reviews are skipped and LLM calls cut off when it runs out (0 = unlimited)")
     args = parser.parse_args()
 
     pdf_path = args.pdf_path
     if not os.path.exists(pdf_path):
         print(f"Error: File not found at {pdf_path}")
         return
+    if (args.input_mode or DEFAULT_INPUT_MODE) == INPUT_MODE_TEXT and get_text_layer(pdf_path) is None:
+        print(f"Error: {pdf_path} has no usable text layer (scanned document?); use --input-mode auto or pdf")
+        return
 
     # Setup Run
     run_id, run_dir = setup_run_directory()
@@ -29,31 +47,34 @@ def main():
     print(f"Artifacts will be saved to: {run_dir}")
 
     # Initial State
-    initial_state = {
-        "run_id": run_id,
-        "run_folder": run_dir,
-        "rfp_file_path": pdf_path,
-        "catalog_path": "data/catalog/products.csv",
-        # Other fields start as None/Empty, populated by agents
-        "summary_path": "",
-        "bom_path": "",
-        "constraints_path": "",
-        "commercial_path": "",
-        "compliance_path": "",
-        "matched_sku_path": None,
-        "pricing_bid_path": None
-    }
+    initial_state = make_initial_state(run_id, run_dir, pdf_path, input_mode=args.input_mode)
 
     # Run Graph
-    app = create_graph()
+    profiler = RunProfiler(run_dir) if args.profile else None
+    app = create_graph(profiler=profiler)
+    set_run_budget(args.budget)
+    set_cache_run(run_id)
+    completed = False
     try:
         # invoke returns the final state
         final_state = app.invoke(initial_state)
         print("\n--- Run Complete ---")
         print(f"Final Bid generated at: {final_state.get('pricing_bid_path')}")
         print(f"All artifacts in: {run_dir}")
+        completed = True
     except Exception as e:
         print(f"\nError during execution: {e}")
+    finally:
+        # Stragglers of abandoned matcher calls must not write to the CSV after this run
+        close_bid_stream(run_dir)
+        # Artifacts are written in the background; make sure they are all on disk
+        flush_artifacts()
+        release_run_caches(run_id)
+        if profiler is not None:
+            profiler.write()
+        print(f"Run metrics: {flush_run_metrics(run_dir)}")
+        if completed:
+            mark_run_completed(run_dir)  # Only successful runs are ever compacted by src.archive
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
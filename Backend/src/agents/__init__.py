@@ -2,20 +2,20 @@ from .extractors import (
     extract_technical_agent,
     extract_commercial_agent,
     extract_compliance_agent,
-    extract_summary_agent,
-    consolidator_agent
+    extract_summary_agent
 )
 from .matching import sku_matcher_agent
-from .pricing import pricing_agent
-from .review import universal_reviewer_agent
+from .pricing import pricing_agent, pricing_strategy_agent
+from .review import universal_reviewer_agent, make_reviewer
 
 __all__ = [
     "extract_technical_agent",
     "extract_commercial_agent",
     "extract_compliance_agent",
     "extract_summary_agent",
-    "consolidator_agent",
     "sku_matcher_agent",
     "pricing_agent",
-    "universal_reviewer_agent"
+    "pricing_strategy_agent",
+    "universal_reviewer_agent",
+    "make_reviewer"
 ]
@@ -1,21 +1,36 @@
 import os
+import json
 import time
-import random
 import threading
-from typing import Any, List, Optional
-from langchain_core.messages import SystemMessage, HumanMessage
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pydantic import BaseModel, Field, create_model
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 from src.state import AgentState
-from src.prompts import PERSONA_RFP_ANALYST
-
-# Configuration
-MODEL_NAME = "gemini-flash-latest"
+from src.prompts import PERSONA_RFP_ANALYST, PERSONA_JSON_REPAIR, REPAIR_ELEMENTS_TASK, REPAIR_OBJECT_TASK
+from src.config import get_node_config
+from src.utils.metrics import incr_metric, set_metric
+from src.utils.pdf_text import build_document_parts
+from src.utils.output_repair import RepairResult, PartialListParser, repair_locally, restore_elements, strip_code_fence
+from src.agents.context_cache import get_context_cache, build_prefixed_messages, is_cache_error
+from src.agents.hedging import HEDGE_ENABLED, invoke_hedged, settled_call
+from src.agents.ratelimit import is_rate_limit_error, parse_retry_after
+from src.agents.key_store import KeyStateStore, key_id
+from src.agents.deadlines import DeadlineExceeded, call_budget, cap_timeout, check_deadline, remaining
 
 # --- API Key Rotation Manager ---
+KEY_COOLDOWN_CAP = 60.0          # Max cooldown (seconds) applied without a Retry-After hint
+CIRCUIT_FAILURE_THRESHOLD = 3    # Consecutive rate limits before a key's circuit opens
+CIRCUIT_OPEN_SECONDS = 120.0     # How long an open circuit keeps a key out of rotation
+STRUCTURED_RECALLS = 1           # Full re-sends of the original call when a reply cannot be repaired
+
 class APIKeyManager:
     """
-    Thread-safe API key manager with automatic rotation on rate limit errors.
-    Loads all GOOGLE_API_KEY* environment variables and rotates through them.
+    Thread-safe API key manager with per-key cooldowns and circuit breaking.
+    Loads all GOOGLE_API_KEY* environment variables. Key health and in-flight
+    counts live in a KeyStateStore shared by every process on the host, so
+    parallel workers never hand out a key another worker just saw a 429 on.
+    Keys that keep failing have their circuit opened for CIRCUIT_OPEN_SECONDS.
     """
     _instance = None
     _lock = threading.Lock()
@@ -33,9 +48,12 @@ class APIKeyManager:
             return
         
         self._keys: List[str] = []
+        self._ids: Dict[str, str] = {}
         self._current_index = 0
         self._key_lock = threading.Lock()
         self._load_keys()
+        self._store = KeyStateStore()
+        self._store.register(list(self._ids.values()))
         self._initialized = True
     
     def _load_keys(self):
@@ -59,21 +77,100 @@ class APIKeyManager:
         if not self._keys:
             raise ValueError("No GOOGLE_API_KEY environment variables found.")
         
+        self._ids = {key: key_id(key) for key in self._keys}
         print(f"[APIKeyManager] Loaded {len(self._keys)} API key(s)")
     
+    def _rotation_order(self, exclude: Optional[str] = None) -> List[str]:
+        """Key ids starting at the current index (round-robin tie-breaking)."""
+        with self._key_lock:
+            start = self._current_index
+        ordered = self._keys[start:] + self._keys[:start]
+        return [self._ids[key] for key in ordered if key != exclude]
+    
+    def _key_for_id(self, kid: str) -> str:
+        return next(key for key, value in self._ids.items() if value == kid)
+    
     def get_current_key(self) -> str:
-        """Get the current API key."""
+        """Get the current API key (the next available one, if the current key is cooling down)."""
+        for kid in self._rotation_order():
+            if self._store.is_available(kid):
+                key = self._key_for_id(kid)
+                with self._key_lock:
+                    self._current_index = self._keys.index(key)
+                return key
         with self._key_lock:
             return self._keys[self._current_index]
     
+    def acquire_key(self, timeout: Optional[float] = None) -> str:
+        """
+        Lease an available key (fewest in-flight calls host-wide), waiting exactly
+        until the earliest one comes off cooldown if all keys are unavailable.
+        Every acquired key must be returned with release_key().
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            kid, wait_time = self._store.acquire(self._rotation_order())
+            if kid is not None:
+                key = self._key_for_id(kid)
+                with self._key_lock:
+                    self._current_index = (self._keys.index(key) + 1) % len(self._keys)
+                return key
+            if deadline is not None and time.monotonic() + wait_time > deadline:
+                raise TimeoutError(f"No API key available within {timeout:.1f}s")
+            if wait_time >= 1.0:
+                print(f"[APIKeyManager] All keys cooling down. Waiting {wait_time:.1f}s for the next one...")
+            incr_metric("keys.cooldown_wait_seconds", round(wait_time, 3))
+            time.sleep(max(wait_time, 0.01))
+    
+    def release_key(self, key: str):
+        """Return a key leased by acquire_key()."""
+        self._store.release(self._ids[key])
+    
     def rotate_key(self) -> str:
-        """Rotate to the next API key and return it."""
+        """Rotate to the next available API key and return it."""
         with self._key_lock:
             old_index = self._current_index
-            self._current_index = (self._current_index + 1) % len(self._keys)
-            new_index = self._current_index
-            print(f"[APIKeyManager] Rotating API key: {old_index + 1} -> {new_index + 1}")
-            return self._keys[self._current_index]
+            self._current_index = (old_index + 1) % len(self._keys)
+        new_key = self.get_current_key()
+        print(f"[APIKeyManager] Rotating API key: {old_index + 1} -> {self._keys.index(new_key) + 1}")
+        return new_key
+    
+    def lease_alternate_key(self, exclude: str) -> Optional[str]:
+        """
+        Lease an available key other than `exclude` without waiting (for hedge
+        requests); None if no distinct healthy key is free. Return it with release_key().
+        """
+        order = self._rotation_order(exclude=exclude)
+        if not order:
+            return None
+        kid, _ = self._store.acquire(order)
+        return self._key_for_id(kid) if kid is not None else None
+    
+    def report_success(self, key: str):
+        """Mark a key healthy again (closes a half-open circuit)."""
+        self._store.report_success(self._ids[key])
+    
+    def report_rate_limit(self, key: str, retry_after: Optional[float] = None, base_delay: float = 5.0) -> float:
+        """
+        Put a key on cooldown after a rate limit. Uses the provider's Retry-After
+        hint when present, otherwise exponential backoff per key. Returns the cooldown.
+        """
+        cooldown, opened = self._store.report_rate_limit(
+            self._ids[key], retry_after, base_delay,
+            KEY_COOLDOWN_CAP, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_OPEN_SECONDS,
+        )
+        if opened:
+            incr_metric("keys.circuits_opened")
+            print(f"[APIKeyManager] Circuit opened for key {self._keys.index(key) + 1} ({CIRCUIT_OPEN_SECONDS:.0f}s)")
+        return cooldown
+    
+    def key_position(self, key: str) -> int:
+        """1-based position of a key, for log lines (keys are never printed)."""
+        return self._keys.index(key) + 1
+    
+    def get_key_status(self) -> List[Dict[str, Any]]:
+        """Snapshot of every key's health (keys are identified by position, never by value)."""
+        return self._store.status([self._ids[key] for key in self._keys])
     
     def get_key_count(self) -> int:
         """Return the total number of available keys."""
@@ -82,145 +179,331 @@ class APIKeyManager:
 
 # Global key manager instance
 _key_manager: Optional[APIKeyManager] = None
+_key_manager_lock = threading.Lock()
 
 def get_key_manager() -> APIKeyManager:
     """Get or create the global API key manager."""
     global _key_manager
     if _key_manager is None:
-        _key_manager = APIKeyManager()
+        # Parallel nodes (extractors, review shards) may race to create it
+        with _key_manager_lock:
+            if _key_manager is None:
+                _key_manager = APIKeyManager()
     return _key_manager
 
 
-def is_rate_limit_error(error: Exception) -> bool:
-    """Check if an exception is a rate limit error."""
-    error_str = str(error).lower()
-    rate_limit_indicators = [
-        "rate limit",
-        "rate_limit", 
-        "ratelimit",
-        "429",
-        "quota",
-        "resource exhausted",
-        "resourceexhausted",
-        "too many requests",
-    ]
-    return any(indicator in error_str for indicator in rate_limit_indicators) 
-
-def get_llm(api_key: Optional[str] = None):
-    """Returns the configured LLM instance with the specified or current API key."""
+def get_llm(api_key: Optional[str] = None, node: Optional[str] = None, cached_content: Optional[str] = None):
+    """Returns the LLM instance configured for the given node with the specified or current API key."""
     key_manager = get_key_manager()
     key = api_key or key_manager.get_current_key()
+    config = get_node_config(node)
     # Disable LangChain's internal retry (max_retries=0) so our rotation logic handles retries
     return ChatGoogleGenerativeAI(
-        model=MODEL_NAME, 
-        temperature=0.1, 
+        model=config.model, 
+        temperature=config.temperature, 
+        timeout=cap_timeout(config.timeout),  # In-flight calls are cut off at the run/node deadline
         google_api_key=key,
-        max_retries=0  # Disable internal retries to allow our key rotation to work
+        max_retries=0,  # Disable internal retries to allow our key rotation to work
+        base_url=os.environ.get("SWIFTBID_GEMINI_BASE_URL") or None,  # Local stand-in for load tests
+        cached_content=cached_content
     )
 
-def get_structured_llm(schema: Any, api_key: Optional[str] = None):
+def get_structured_llm(schema: Any, api_key: Optional[str] = None, node: Optional[str] = None, cached_content: Optional[str] = None, include_raw: bool = False):
     """Returns an LLM instance configured with structured output."""
-    llm = get_llm(api_key=api_key)
+    llm = get_llm(api_key=api_key, node=node, cached_content=cached_content)
     # Use method="json_schema" to ensure proper parsing of nested Pydantic models
-    return llm.with_structured_output(schema, method="json_schema")
+    return llm.with_structured_output(schema, method="json_schema", include_raw=include_raw)
+
+
+# --- Structured Output Repair ---
+class StructuredOutputError(ValueError):
+    """A structured reply that could not be parsed or repaired."""
+
+def _raw_text(message: Any) -> str:
+    content = getattr(message, "content", None) or ""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content
+
+def _repair_call(schema: Any, prompt: str, api_key: str, node: Optional[str]) -> Optional[BaseModel]:
+    """Text-only follow-up call; its reply gets local repair but no further follow-ups."""
+    messages = [SystemMessage(content=PERSONA_JSON_REPAIR), HumanMessage(content=prompt)]
+    check_deadline(f"{node or schema.__name__} repair")
+    incr_metric("structured_output.fixup_calls")
+    try:
+        reply = get_structured_llm(schema, api_key=api_key, node=node, include_raw=True).invoke(messages)
+    except Exception as e:
+        if is_rate_limit_error(e):
+            raise
+        check_deadline(f"{node or schema.__name__} repair")
+        print(f"[Output Repair] Follow-up call failed: {e}")
+        return None
+    if reply["parsed"] is not None:
+        return reply["parsed"]
+    return repair_locally(schema, _raw_text(reply["raw"])).instance
 
+def _fix_dropped_elements(result: RepairResult, api_key: str, node: Optional[str]) -> Dict[int, Any]:
+    """Asks for corrected versions of only the list elements local repair had to drop."""
+    fixed: Dict[int, Any] = {}
+    models = {dropped.model for dropped in result.dropped}
+    for model in models:
+        positions = [p for p, dropped in enumerate(result.dropped) if dropped.model is model]
+        fix = create_model(f"Fixed{model.__name__}", position=(int, Field(...)), element=(Optional[model], None))
+        reply_schema = create_model(f"{model.__name__}Fixes", elements=(List[fix], Field(default_factory=list)))
+        elements = json.dumps([
+            {"position": p, "element": result.dropped[p].value, "errors": result.dropped[p].errors} for p in positions
+        ], indent=2, default=str)
+        reply = _repair_call(reply_schema, REPAIR_ELEMENTS_TASK.format(schema_name=model.__name__, elements=elements), api_key, node)
+        for item in (reply.elements if reply else []):
+            if item.element is not None and item.position in positions:
+                fixed[item.position] = item.element.model_dump()
+    return fixed
 
-def invoke_with_retry(invoke_fn, max_retries: int = 3, base_delay: float = 5.0):
+def _repair_reply(schema: Any, reply: Dict[str, Any], api_key: str, node: Optional[str]) -> Optional[BaseModel]:
+    """Local fixes first, then text-only follow-ups for whatever is still invalid."""
+    name = node or schema.__name__
+    text = _raw_text(reply["raw"])
+    incr_metric("structured_output.invalid")
+    if not text.strip():
+        print(f"[Output Repair] {name}: empty reply")
+        return None
+
+    result = repair_locally(schema, text)
+    if result.issues:
+        print(f"[Output Repair] {name}: {'; '.join(result.issues[:5])}{' ...' if len(result.issues) > 5 else ''}")
+    if result.dropped:
+        fixed = _fix_dropped_elements(result, api_key, node)
+        restore_elements(result, fixed, schema)
+        lost = len(result.dropped) - len(fixed)
+        if lost:
+            incr_metric("structured_output.dropped_elements", lost)
+            print(f"[Output Repair] {name}: {lost} invalid element(s) could not be fixed and were left out")
+    if result.instance is None and result.data is not None:
+        payload = json.dumps(result.data, indent=2, default=str)
+        errors = "\n".join(f"- {error}" for error in result.errors[:30])
+        result.instance = _repair_call(schema, REPAIR_OBJECT_TASK.format(schema_name=schema.__name__, errors=errors, payload=payload), api_key, node)
+    if result.instance is not None:
+        incr_metric("structured_output.repaired")
+    return result.instance
+
+def _stream_structured(schema: Any, messages: List[BaseMessage], api_key: str, node: Optional[str], cached_content: Optional[str], on_partial: Callable[[str], None]) -> Dict[str, Any]:
+    """Streams a JSON-schema call, passing the text received so far to on_partial after every chunk."""
+    llm = get_llm(api_key=api_key, node=node, cached_content=cached_content).bind(
+        response_mime_type="application/json",
+        response_json_schema=schema.model_json_schema(),
+    )
+    raw, text = None, ""
+    for chunk in llm.stream(messages):
+        check_deadline(f"{node or schema.__name__} stream")
+        raw = chunk if raw is None else raw + chunk
+        text += _raw_text(chunk)
+        on_partial(text)
+    try:
+        return {"raw": raw, "parsed": schema.model_validate_json(strip_code_fence(text)), "parsing_error": None}
+    except ValueError as e:
+        return {"raw": raw, "parsed": None, "parsing_error": e}
+
+def invoke_structured(
+    schema: Any,
+    messages: List[BaseMessage],
+    api_key: str,
+    node: Optional[str] = None,
+    cached_content: Optional[str] = None,
+    recalls: int = STRUCTURED_RECALLS,
+    on_partial: Optional[Callable[[str], None]] = None,
+) -> BaseModel:
+    """
+    Structured call that repairs malformed or truncated replies instead of failing.
+    Order of escalation: local repair, a text-only follow-up for the invalid parts,
+    and only then a re-send of the original (possibly document-bearing) call.
+    With on_partial, the reply is streamed and on_partial sees the text as it grows.
+    """
+    for attempt in range(recalls + 1):
+        check_deadline(f"{node or schema.__name__} call")
+        if on_partial is not None:
+            reply = _stream_structured(schema, messages, api_key, node, cached_content, on_partial)
+        else:
+            reply = get_structured_llm(schema, api_key=api_key, node=node, cached_content=cached_content, include_raw=True).invoke(messages)
+        if reply["parsed"] is not None:
+            return reply["parsed"]
+        instance = _repair_reply(schema, reply, api_key, node)
+        if instance is not None:
+            return instance
+        if attempt < recalls:
+            incr_metric("structured_output.recalls")
+            print(f"[Output Repair] {node or schema.__name__}: reply could not be repaired; re-sending the original request.")
+    reason = str(reply.get("parsing_error") or "empty reply").splitlines()[0][:200]
+    raise StructuredOutputError(f"{node or schema.__name__} returned no valid {schema.__name__}: {reason}")
+
+def make_prefixed_invoke(
+    schema: Any,
+    node: Optional[str],
+    system_text: str,
+    prefix_parts: List[Dict[str, Any]],
+    request_parts: List[Dict[str, Any]],
+    label: str,
+    system_in_cache: bool = False,
+    stream_items: Optional[Tuple[str, Callable[[], Callable[[Dict[str, Any]], None]]]] = None,
+):
+    """
+    Builds an invoke_fn for invoke_with_retry whose stable prefix (persona, then
+    catalog/PDF parts) is served from a provider-side context cache when possible.
+    system_in_cache=False keeps the persona out of the cache so callers with
+    different personas share one cache of the same document.
+    stream_items=(list_field, open_attempt) streams the reply: open_attempt() is
+    called once per attempt (primary, hedge, retry or re-send) and returns the
+    on_item callback that receives each element of that list as soon as it is
+    complete, so callers can tell concurrent attempts apart.
+    """
+    def do_invoke(api_key: str):
+        model = get_node_config(node).model
+        cache_system = system_text if system_in_cache else None
+        cached = get_context_cache().get(api_key, model, cache_system, prefix_parts, label=label)
+        messages = build_prefixed_messages(system_text, prefix_parts, request_parts, cached, system_in_cache)
+        try:
+            return invoke_structured(schema, messages, api_key, node=node, cached_content=cached, on_partial=open_stream())
+        except Exception as e:
+            if cached is None or not is_cache_error(e):
+                raise
+            print(f"[Context Cache] {cached} rejected ({e}); retrying with the prefix inline.")
+            get_context_cache().invalidate(cached)
+            messages = build_prefixed_messages(system_text, prefix_parts, request_parts, None, system_in_cache)
+            return invoke_structured(schema, messages, api_key, node=node, on_partial=open_stream())
+
+    def open_stream() -> Optional[Callable[[str], None]]:
+        if stream_items is None:
+            return None
+        list_field, open_attempt = stream_items
+        parser, on_item = PartialListParser(schema, list_field), open_attempt()
+        return lambda text: [on_item(element) for element in parser.feed(text)]
+
+    return do_invoke
+
+def get_review_feedback(state: AgentState, phase: str) -> Optional[str]:
+    """Returns the pending reviewer critique for a phase (None if approved or not yet reviewed)."""
+    return (state.get("review_feedback") or {}).get(phase)
+
+def record_model(state: AgentState, node: str, label: Optional[str] = None) -> dict:
+    """Returns the state update recording which model produced a node's output."""
+    label = label or node
+    model = get_node_config(node).model
+    set_metric(f"model.{label}", model, run_folder=state.get("run_folder"))
+    return {"models_used": {label: model}}
+
+def count_degraded(state: AgentState, error: Exception):
+    """Counts a node that carried on without a full answer (out of time, or an unrepairable reply)."""
+    if isinstance(error, StructuredOutputError):
+        incr_metric("structured_output.degraded_nodes", run_folder=state.get("run_folder"))
+    else:
+        incr_metric("deadline.degraded_nodes", run_folder=state.get("run_folder"))
+
+def keep_last_artifacts(state: AgentState, node: str, error: Exception) -> AgentState:
+    """Out of time or no valid reply: leaves the state (and any artifacts from an earlier attempt) as it is."""
+    count_degraded(state, error)
+    tag = "[Output Repair]" if isinstance(error, StructuredOutputError) else "[Deadline]"
+    print(f"{tag} {node}: {error}. Keeping the last artifacts.")
+    return {}
+
+
+def invoke_with_retry(invoke_fn, max_retries: int = 3, base_delay: float = 5.0, node: Optional[str] = None, hedge: Optional[bool] = None):
     """
     Invoke a function with automatic retry and API key rotation on rate limit errors.
     
     Args:
         invoke_fn: A callable that takes an api_key parameter and returns the result
         max_retries: Maximum number of retries per key before giving up
-        base_delay: Base delay between retries (will increase exponentially)
+        base_delay: Per-key cooldown after a rate limit without a Retry-After hint (grows exponentially)
+        node: Graph node issuing the call (used to bucket latency for hedging and for its time budget)
+        hedge: Send a duplicate request on another key if the call is slow (defaults to SWIFTBID_HEDGE)
     
     Returns:
         The result from invoke_fn
+
+    Raises DeadlineExceeded once the node's budget (NodeModelConfig.budget) or the
+    run budget is spent, instead of waiting out further cooldowns.
+    Raises StructuredOutputError when the reply could not be repaired.
     """
+    with call_budget(get_node_config(node).budget):
+        try:
+            return _invoke_with_retry(invoke_fn, max_retries, base_delay, node, hedge)
+        except DeadlineExceeded:
+            incr_metric("deadline.exceeded")
+            raise
+        except StructuredOutputError:
+            incr_metric("structured_output.failed_calls")
+            raise
+
+def _invoke_with_retry(invoke_fn, max_retries: int, base_delay: float, node: Optional[str], hedge: Optional[bool]):
     key_manager = get_key_manager()
     total_keys = key_manager.get_key_count()
     total_attempts = max_retries * total_keys
     
+    use_hedge = HEDGE_ENABLED if hedge is None else hedge
     last_error = None
-    keys_tried = 0
+
+    def settle(key: str, error: Optional[BaseException]):
+        """Reports a finished call's outcome on its key and ends the lease (hedged calls settle themselves)."""
+        try:
+            if error is None:
+                key_manager.report_success(key)
+            elif is_rate_limit_error(error):
+                incr_metric("llm.retries")
+                cooldown = key_manager.report_rate_limit(key, parse_retry_after(error), base_delay=base_delay)
+                print(f"[Rate Limit] Hit rate limit on key {key_manager.key_position(key)}. Key cooling down for {cooldown:.1f}s")
+        finally:
+            key_manager.release_key(key)
     
     for attempt in range(total_attempts):
-        current_key = key_manager.get_current_key()
+        # Only available keys are handed out; waits until the earliest cooldown ends (or the deadline)
+        check_deadline(f"{node or 'LLM'} call")
+        try:
+            current_key = key_manager.acquire_key(timeout=remaining())
+        except TimeoutError as e:
+            raise DeadlineExceeded(f"{node or 'LLM'} call stopped: no API key free before the deadline") from e
+        incr_metric("llm.attempts")
         
         try:
-            return invoke_fn(api_key=current_key)
+            if use_hedge:
+                return invoke_hedged(invoke_fn, current_key, lambda: key_manager.lease_alternate_key(current_key), settle, node=node)
+            return settled_call(invoke_fn, current_key, settle, node=node)[0]
         except Exception as e:
             last_error = e
             
-            if is_rate_limit_error(e):
-                print(f"[Rate Limit] Hit rate limit on attempt {attempt + 1}")
-                
-                # Rotate to next key
-                key_manager.rotate_key()
-                keys_tried += 1
-                
-                # If we've tried all keys, wait before cycling through again
-                if keys_tried >= total_keys:
-                    wait_time = base_delay * (2 ** (attempt // total_keys))
-                    wait_time = min(wait_time, 60)  # Cap at 60 seconds
-                    print(f"[Rate Limit] All keys exhausted. Waiting {wait_time:.1f}s before retry...")
-                    time.sleep(wait_time)
-                    keys_tried = 0
-                else:
-                    # Small delay before trying next key
-                    time.sleep(1.0)
-            else:
-                # Non-rate-limit error, re-raise immediately
+            if not is_rate_limit_error(e):
+                # Non-rate-limit error, re-raise immediately (as DeadlineExceeded if the budget cut it off)
+                check_deadline(f"{node or 'LLM'} call")
                 raise e
+            # Rate limited: the key's cooldown was recorded when the call settled; try the next key
     
     # All retries exhausted
     raise last_error
 
-def invoke_extraction_agent(state: AgentState, schema: Any, prompt_text: str, role: str, agent_name: str) -> Any:
-
-    # Random delay to avoid hitting rate limits with parallel requests
-    delay = random.uniform(3.0, 8.0)
-    time.sleep(delay)
+def invoke_extraction_agent(state: AgentState, schema: Any, prompt_text: str, role: str, agent_name: str, node: Optional[str] = None, phase: Optional[str] = None) -> Any:
 
     print(f"--- {agent_name}: Extracting ... ---")
     
-    # Read PDF data - treating as binary, so separate from read_text_file
-    with open(state["rfp_file_path"], "rb") as f:
-        pdf_data = f.read()
+    # RFP as text layer or raw PDF, depending on the input mode
+    document_parts = build_document_parts(state)
 
     # Check for feedback (Reflexion Loop)
-    feedback = state.get("review_feedback")
+    feedback = get_review_feedback(state, phase) if phase else None
     final_prompt = prompt_text
     if feedback:
         print(f"!!! {agent_name} Retrying with Feedback: {feedback[:100]}...")
         final_prompt += f"\n\nIMPORTANT REVISION INSTRUCTION:\nPrevious attempt failed quality review. \nFeedback: {feedback}\nPlease fix these issues in your new extraction."
 
-    system_msg = SystemMessage(content=PERSONA_RFP_ANALYST.format(role=role))
-    
-    human_msg = HumanMessage(
-        content=[
-            {
-                "type": "text",
-                "text": final_prompt,
-            },
-            {
-                "type": "media",
-                "mime_type": "application/pdf",
-                "data": pdf_data,
-            },
-        ]
+    # RFP document first so every extractor (and the reviewer) shares one cached prefix
+    invoke_fn = make_prefixed_invoke(
+        schema,
+        node,
+        PERSONA_RFP_ANALYST.format(role=role),
+        document_parts,
+        [{"type": "text", "text": final_prompt}],
+        label="rfp-document",
     )
 
-    # Define the invoke function for retry mechanism
-    def do_invoke(api_key: str):
-        structured_llm = get_structured_llm(schema, api_key=api_key)
-        result = structured_llm.invoke([system_msg, human_msg])
-        if result is None:
-            raise ValueError(f"{agent_name} returned None. Extraction failed.")
-        return result
-
     try:
-        return invoke_with_retry(do_invoke)
+        return invoke_with_retry(invoke_fn, node=node)
     except Exception as e:
         print(f"Error in {agent_name}: {e}")
         raise e
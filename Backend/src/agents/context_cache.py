@@ -0,0 +1,246 @@
+import os
+import time
+import hashlib
+import threading
+import contextvars
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
+from src.agents.key_store import key_id
+from src.utils.metrics import incr_metric
+from src.agents.ratelimit import is_rate_limit_error
+
+# Configuration
+CONTEXT_CACHE_ENABLED = os.environ.get("SWIFTBID_CONTEXT_CACHE", "1") == "1"
+CONTEXT_CACHE_TTL = int(os.environ.get("SWIFTBID_CONTEXT_CACHE_TTL", "3600"))  # Seconds
+CONTEXT_CACHE_MIN_TOKENS = int(os.environ.get("SWIFTBID_CONTEXT_CACHE_MIN_TOKENS", "2048"))
+REFRESH_MARGIN = 120        # Recreate caches that expire within this many seconds
+FAILURE_BACKOFF = 600       # Seconds before retrying a prefix that cannot be cached (too small, unsupported model)
+TRANSIENT_BACKOFF = (5, 30, 120)  # Retry schedule after transient creation failures (429, 5xx, network)
+
+# Errors that will not go away on retry
+_PERMANENT_ERRORS = ("invalid_argument", "too small", "minimum", "not supported", "unsupported", "does not support", "not found", "permission_denied")
+
+# Set per graph run (like the run urgency), so caches can be deleted once no run needs them
+_cache_run: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("swiftbid_cache_run", default=None)
+
+def set_cache_run(run_id: Optional[str]):
+    """Attributes the context caches used from the current context (one graph run) to run_id."""
+    _cache_run.set(run_id)
+
+
+def _estimate_tokens(parts: List[Dict[str, Any]]) -> int:
+    """Rough token count of text parts; media parts (the PDF) always count as large."""
+    total = 0
+    for part in parts:
+        if part.get("type") == "text":
+            total += len(part["text"]) // 4
+        else:
+            total += CONTEXT_CACHE_MIN_TOKENS
+    return total
+
+def _fingerprint(model: str, system_text: Optional[str], parts: List[Dict[str, Any]]) -> str:
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update((system_text or "").encode("utf-8"))
+    for part in parts:
+        if part.get("type") == "text":
+            digest.update(part["text"].encode("utf-8"))
+        else:
+            digest.update(part.get("mime_type", "").encode("utf-8"))
+            digest.update(hashlib.sha256(part["data"]).digest())
+    return digest.hexdigest()
+
+def _to_genai_parts(parts: List[Dict[str, Any]]):
+    from google.genai import types
+
+    converted = []
+    for part in parts:
+        if part.get("type") == "text":
+            converted.append(types.Part.from_text(text=part["text"]))
+        else:
+            converted.append(types.Part.from_bytes(data=part["data"], mime_type=part["mime_type"]))
+    return converted
+
+def is_cache_error(error: Exception) -> bool:
+    """True when a call failed because its cached content is gone or unusable."""
+    error_str = str(error).lower()
+    return "cachedcontent" in error_str or "cached content" in error_str or "cached_content" in error_str
+
+def is_permanent_cache_failure(error: Exception) -> bool:
+    """True when cache creation failed for a reason a retry will not fix."""
+    if is_rate_limit_error(error):
+        return False
+    error_str = str(error).lower()
+    return any(marker in error_str for marker in _PERMANENT_ERRORS)
+
+
+class ContextCache:
+    """
+    Provider-side context caches for stable prompt prefixes (the RFP document,
+    the product catalog), keyed by (API key, model, prefix content).
+
+    A cache is created on first use and referenced by later calls until it nears
+    expiry. Caches belong to the key's project, so each key gets its own.
+    Parallel callers wait for a single creation. When creation fails the call goes
+    out with the prefix inline: permanent failures (prefix too small, model without
+    caching support) are remembered for FAILURE_BACKOFF, transient ones (429, 5xx)
+    are retried on the TRANSIENT_BACKOFF schedule. Each cache records the runs
+    that used it and is deleted once the last of them ends (release_run).
+    """
+
+    def __init__(self, ttl: int = CONTEXT_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[Optional[str], float, str]] = {}  # fingerprint -> (cache name, valid until, API key)
+        self._failures: Dict[str, int] = {}        # fingerprint -> consecutive transient failures
+        self._users: Dict[str, set] = {}           # fingerprint -> runs that used the cache
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _entry_lock(self, cache_key: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(cache_key, threading.Lock())
+
+    def _lookup(self, cache_key: str) -> Tuple[bool, Optional[str]]:
+        """Returns (found, cache name); a found cache is registered as used by the current run."""
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry and entry[1] - REFRESH_MARGIN > time.time():
+                if entry[0] and _cache_run.get():
+                    self._users.setdefault(cache_key, set()).add(_cache_run.get())
+                return True, entry[0]
+        return False, None
+
+    def get(self, api_key: str, model: str, system_text: Optional[str], parts: List[Dict[str, Any]], label: str = "prefix") -> Optional[str]:
+        """Returns the cache name for this prefix, creating it if needed; None to send it inline."""
+        if not CONTEXT_CACHE_ENABLED or not parts or _estimate_tokens(parts) < CONTEXT_CACHE_MIN_TOKENS:
+            return None
+
+        cache_key = f"{key_id(api_key)}:{_fingerprint(model, system_text, parts)}"
+        found, name = self._lookup(cache_key)
+        if found:
+            if name:
+                incr_metric("context_cache.hits")
+            return name
+
+        with self._entry_lock(cache_key):
+            found, name = self._lookup(cache_key)
+            if found:
+                if name:
+                    incr_metric("context_cache.hits")
+                return name
+            name, valid_until = self._create(api_key, model, system_text, parts, label, cache_key)
+            with self._lock:
+                self._entries[cache_key] = (name, valid_until, api_key)
+                if name and _cache_run.get():
+                    self._users.setdefault(cache_key, set()).add(_cache_run.get())
+            return name
+
+    def _client(self, api_key: str):
+        from google import genai
+        from google.genai import types
+
+        base_url = os.environ.get("SWIFTBID_GEMINI_BASE_URL")
+        http_options = types.HttpOptions(base_url=base_url) if base_url else None
+        return genai.Client(api_key=api_key, http_options=http_options)
+
+    def _create(self, api_key: str, model: str, system_text: Optional[str], parts: List[Dict[str, Any]], label: str, cache_key: str) -> Tuple[Optional[str], float]:
+        from google.genai import types
+
+        try:
+            client = self._client(api_key)
+            cache = client.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    display_name=f"swiftbid-{label}",
+                    system_instruction=system_text,
+                    contents=[types.Content(role="user", parts=_to_genai_parts(parts))],
+                    ttl=f"{self.ttl}s",
+                ),
+            )
+        except Exception as e:
+            incr_metric("context_cache.failures")
+            if is_permanent_cache_failure(e):
+                backoff = FAILURE_BACKOFF
+            else:
+                with self._lock:
+                    failures = self._failures[cache_key] = self._failures.get(cache_key, 0) + 1
+                backoff = TRANSIENT_BACKOFF[min(failures, len(TRANSIENT_BACKOFF)) - 1]
+            print(f"[Context Cache] Could not cache {label} prefix, sending it inline (retry in {backoff}s): {e}")
+            # Valid until REFRESH_MARGIN before the retry time, so _lookup sees it expire on schedule
+            return None, time.time() + backoff + REFRESH_MARGIN
+
+        with self._lock:
+            self._failures.pop(cache_key, None)
+        expires = cache.expire_time.timestamp() if isinstance(cache.expire_time, datetime) else time.time() + self.ttl
+        incr_metric("context_cache.created")
+        print(f"[Context Cache] Cached {label} prefix as {cache.name} (expires {datetime.fromtimestamp(expires, timezone.utc):%H:%M:%S} UTC)")
+        return cache.name, expires
+
+    def invalidate(self, name: str):
+        """Drops a cache that the API no longer accepts (expired or deleted early)."""
+        with self._lock:
+            for cache_key, entry in list(self._entries.items()):
+                if entry[0] == name:
+                    del self._entries[cache_key]
+                    self._users.pop(cache_key, None)
+
+    def release_run(self, run_id: str):
+        """Deletes the caches run_id used that no other run is still using."""
+        unused = []
+        with self._lock:
+            for cache_key, users in list(self._users.items()):
+                users.discard(run_id)
+                if users:
+                    continue
+                del self._users[cache_key]
+                entry = self._entries.pop(cache_key, None)
+                if entry and entry[0]:
+                    unused.append(entry)
+        for name, _, api_key in unused:
+            try:
+                client = self._client(api_key)  # Keep a reference: the client closes its connection when collected
+                client.caches.delete(name=name)
+                incr_metric("context_cache.deleted")
+            except Exception as e:
+                # It still expires on its TTL
+                print(f"[Context Cache] Could not delete {name}: {e}")
+
+
+# Global context cache instance
+_context_cache: Optional[ContextCache] = None
+_context_cache_lock = threading.Lock()
+
+def get_context_cache() -> ContextCache:
+    """Get or create the global context cache."""
+    global _context_cache
+    if _context_cache is None:
+        with _context_cache_lock:
+            if _context_cache is None:
+                _context_cache = ContextCache()
+    return _context_cache
+
+def release_run_caches(run_id: str):
+    """Called when a run ends: deletes the context caches only that run was using."""
+    if _context_cache is not None:
+        _context_cache.release_run(run_id)
+
+
+def build_prefixed_messages(
+    system_text: str,
+    prefix_parts: List[Dict[str, Any]],
+    request_parts: List[Dict[str, Any]],
+    cached_content: Optional[str],
+    system_in_cache: bool,
+) -> List[BaseMessage]:
+    """
+    Messages with the stable prefix first (system persona, then static parts),
+    followed by the per-call parts. With a cache, the prefix is left out; a persona
+    that is not part of the cache goes at the head of the user turn, since cached
+    calls cannot set a system instruction.
+    """
+    if cached_content is None:
+        return [SystemMessage(content=system_text), HumanMessage(content=[*prefix_parts, *request_parts])]
+    if system_in_cache:
+        return [HumanMessage(content=request_parts)]
+    return [HumanMessage(content=[{"type": "text", "text": f"ROLE AND INSTRUCTIONS:\n{system_text}"}, *request_parts])]
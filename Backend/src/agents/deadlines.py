@@ -0,0 +1,60 @@
+import os
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+# Configuration (0 disables a budget; budgets are opt-in)
+RUN_BUDGET_SECONDS = float(os.environ.get("SWIFTBID_RUN_BUDGET", "0"))
+REVIEW_MIN_SECONDS = float(os.environ.get("SWIFTBID_REVIEW_MIN_SECONDS", "60"))  # Reviews are skipped with less run budget left
+
+# Monotonic deadlines of the current run and of the LLM call in progress.
+# LangGraph copies the context into node threads, so every call of the run sees them.
+_run_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("swiftbid_run_deadline", default=None)
+_call_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("swiftbid_call_deadline", default=None)
+
+class DeadlineExceeded(TimeoutError):
+    """The run or node ran out of its time budget; callers degrade instead of retrying."""
+
+def set_run_budget(seconds: Optional[float] = RUN_BUDGET_SECONDS):
+    """Starts the run budget for the current context (one graph run); None or 0 means unlimited."""
+    _run_deadline.set(time.monotonic() + seconds if seconds and seconds > 0 else None)
+
+def run_remaining() -> Optional[float]:
+    """Seconds left in the run budget, or None without one."""
+    deadline = _run_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def remaining() -> Optional[float]:
+    """Seconds left before the nearer of the run and call deadlines, or None without either."""
+    deadlines = [d for d in (_run_deadline.get(), _call_deadline.get()) if d is not None]
+    return min(deadlines) - time.monotonic() if deadlines else None
+
+def check_deadline(what: str = "LLM call"):
+    """Raises DeadlineExceeded once the budget is spent (called between attempts, waits and stream chunks)."""
+    now = time.monotonic()
+    for scope, deadline in (("run", _run_deadline.get()), ("node", _call_deadline.get())):
+        if deadline is not None and now >= deadline:
+            raise DeadlineExceeded(f"{what} stopped: {scope} time budget exhausted")
+
+def cap_timeout(timeout: Optional[float]) -> Optional[float]:
+    """Shortens a request timeout so an in-flight call is cut off at the deadline."""
+    left = remaining()
+    if left is None:
+        return timeout
+    left = max(left, 0.1)
+    return left if timeout is None else min(timeout, left)
+
+@contextmanager
+def call_budget(seconds: Optional[float]):
+    """Bounds everything inside (attempts, key waits, backoff) to `seconds`, within the run budget."""
+    if not seconds or seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = _call_deadline.get()
+    token = _call_deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _call_deadline.reset(token)
@@ -1,30 +1,34 @@
 import os
 import json
+from typing import Optional
 from src.state import AgentState
 from src.schemas import (
     TechnicalExtraction,
     CommercialLogistics,
     ComplianceEligibility,
-    ExecutiveSummary
+    ExecutiveSummary,
+    CorrigendumExtraction
 )
 from src.prompts import (
     ROLE_TECHNICAL,
     ROLE_COMMERCIAL,
     ROLE_COMPLIANCE,
     ROLE_SUMMARY,
+    ROLE_CORRIGENDUM,
     EXTRACT_TECHNICAL_PROMPT,
     EXTRACT_COMMERCIAL_PROMPT,
     EXTRACT_COMPLIANCE_PROMPT,
-    EXTRACT_SUMMARY_PROMPT
+    EXTRACT_SUMMARY_PROMPT,
+    EXTRACT_CORRIGENDUM_PROMPT
 )
 from src.utils.file_utils import (
-    write_markdown_file,
-    write_json_file,
     format_executive_summary_md,
     format_commercial_md,
     format_compliance_md
 )
-from src.agents.base import invoke_extraction_agent
+from src.utils.artifact_writer import persist_json, persist_text
+from src.agents.base import StructuredOutputError, invoke_extraction_agent, record_model, keep_last_artifacts
+from src.agents.deadlines import DeadlineExceeded
 
 def extract_technical_agent(state: AgentState) -> AgentState:
     """Extracts Bill of Materials and Technical Constraints."""
@@ -34,7 +38,9 @@ def extract_technical_agent(state: AgentState) -> AgentState:
             TechnicalExtraction, 
             EXTRACT_TECHNICAL_PROMPT,
             ROLE_TECHNICAL,
-            "Technical Agent"
+            "Technical Agent",
+            node="technical",
+            phase="technical"
         )
 
         # Save Artifacts
@@ -42,13 +48,23 @@ def extract_technical_agent(state: AgentState) -> AgentState:
         path_bom = os.path.join(run_dir, "02_bill_of_materials.json")
         path_constraints = os.path.join(run_dir, "03_technical_constraints.json")
 
-        write_json_file(path_bom, result.bill_of_materials.model_dump()["items"])
-        write_json_file(path_constraints, result.technical_constraints.model_dump())
-
-        return {"bom_path": path_bom, "constraints_path": path_constraints}
+        bom = result.bill_of_materials.model_dump()["items"]
+        constraints = result.technical_constraints.model_dump()
+        persist_json(path_bom, bom)
+        persist_json(path_constraints, constraints)
+
+        return {
+            "bom_path": path_bom,
+            "constraints_path": path_constraints,
+            "bom": bom,
+            "constraints": constraints,
+            **record_model(state, "technical")
+        }
+    except (DeadlineExceeded, StructuredOutputError) as e:
+        return keep_last_artifacts(state, "extract_technical_agent", e)
     except Exception as e:
         print(f"Error in extract_technical_agent: {e}")
-        return {"bom_path": None, "constraints_path": None}
+        return {"bom_path": None, "constraints_path": None, "bom": None, "constraints": None}
 
 def extract_commercial_agent(state: AgentState) -> AgentState:
     """Extracts Commercial and Logistics Terms."""
@@ -58,7 +74,9 @@ def extract_commercial_agent(state: AgentState) -> AgentState:
             CommercialLogistics,
             EXTRACT_COMMERCIAL_PROMPT,
             ROLE_COMMERCIAL,
-            "Commercial Agent"
+            "Commercial Agent",
+            node="commercial",
+            phase="commercial"
         )
 
         # Save Artifacts
@@ -66,13 +84,16 @@ def extract_commercial_agent(state: AgentState) -> AgentState:
         path_commercial = os.path.join(run_dir, "04_commercial_logistics.json")
         path_commercial_md = os.path.join(run_dir, "04_commercial_logistics.md")
 
-        write_json_file(path_commercial, result.model_dump())
-        write_markdown_file(path_commercial_md, format_commercial_md(result))
+        commercial = result.model_dump()
+        persist_json(path_commercial, commercial)
+        persist_text(path_commercial_md, format_commercial_md(commercial))
 
-        return {"commercial_path": path_commercial}
+        return {"commercial_path": path_commercial, "commercial": commercial, **record_model(state, "commercial")}
+    except (DeadlineExceeded, StructuredOutputError) as e:
+        return keep_last_artifacts(state, "extract_commercial_agent", e)
     except Exception as e:
         print(f"Error in extract_commercial_agent: {e}")
-        return {"commercial_path": None}
+        return {"commercial_path": None, "commercial": None}
 
 def extract_compliance_agent(state: AgentState) -> AgentState:
     """Extracts Compliance and Eligibility Criteria."""
@@ -82,16 +103,19 @@ def extract_compliance_agent(state: AgentState) -> AgentState:
             ComplianceEligibility,
             EXTRACT_COMPLIANCE_PROMPT,
             ROLE_COMPLIANCE,
-            "Compliance Agent"
+            "Compliance Agent",
+            node="compliance"
         )
 
         # Save Artifacts
         run_dir = state["run_folder"]
         path_compliance = os.path.join(run_dir, "05_compliance_eligibility.md")
 
-        write_markdown_file(path_compliance, format_compliance_md(result))
+        persist_text(path_compliance, format_compliance_md(result))
 
-        return {"compliance_path": path_compliance}
+        return {"compliance_path": path_compliance, **record_model(state, "compliance")}
+    except (DeadlineExceeded, StructuredOutputError) as e:
+        return keep_last_artifacts(state, "extract_compliance_agent", e)
     except Exception as e:
         print(f"Error in extract_compliance_agent: {e}")
         return {"compliance_path": None}
@@ -104,7 +128,8 @@ def extract_summary_agent(state: AgentState) -> AgentState:
             ExecutiveSummary,
             EXTRACT_SUMMARY_PROMPT,
             ROLE_SUMMARY,
-            "Summary Agent"
+            "Summary Agent",
+            node="summary"
         )
 
         # Save Artifacts
@@ -112,27 +137,29 @@ def extract_summary_agent(state: AgentState) -> AgentState:
         path_summary = os.path.join(run_dir, "01_executive_summary.md")
         path_summary_json = os.path.join(run_dir, "01_executive_summary.json")
 
-        write_markdown_file(path_summary, format_executive_summary_md(result))
-        write_json_file(path_summary_json, result.model_dump())
-
-        return {"summary_path": path_summary, "summary_json_path": path_summary_json}
+        summary = result.model_dump()
+        persist_text(path_summary, format_executive_summary_md(summary))
+        persist_json(path_summary_json, summary)
+
+        return {
+            "summary_path": path_summary,
+            "summary_json_path": path_summary_json,
+            "summary": summary,
+            **record_model(state, "summary")
+        }
+    except (DeadlineExceeded, StructuredOutputError) as e:
+        return keep_last_artifacts(state, "extract_summary_agent", e)
     except Exception as e:
         print(f"Error in extract_summary_agent: {e}")
-        return {"summary_path": None, "summary_json_path": None}
-
-def consolidator_agent(state: AgentState) -> AgentState:
-    """
-    Synchronizes extractions and sets the phase for review.
-    """
-    print("--- Consolidator: Verifying Extractions ---")
-    required_keys = ["bom_path", "constraints_path", "commercial_path", "compliance_path", "summary_path"]
-    
-    missing = [key for key in required_keys if not state.get(key)]
-    
-    if missing:
-        print(f"Warning: Missing extraction outputs: {missing}")
-    else:
-        print("All extraction artifacts verified present.")
-    
-    # Set phase to 'extraction' so the Reviewer knows what to check
-    return {"phase": "extraction"}
+        return {"summary_path": None, "summary_json_path": None, "summary": None}
+
+def extract_corrigendum_deltas(corrigendum_path: str, artifacts: dict, run_folder: str, input_mode: Optional[str] = None) -> CorrigendumExtraction:
+    """Extracts what a corrigendum/addendum changes, relative to a run's current artifacts (not a graph node)."""
+    state = {"rfp_file_path": corrigendum_path, "run_folder": run_folder, "input_mode": input_mode}
+    prompt = EXTRACT_CORRIGENDUM_PROMPT.format(
+        bom=json.dumps(artifacts.get("bom") or [], indent=2),
+        constraints=json.dumps(artifacts.get("constraints") or {}, indent=2),
+        commercial=json.dumps(artifacts.get("commercial") or {}, indent=2),
+        summary=json.dumps(artifacts.get("summary") or {}, indent=2),
+    )
+    return invoke_extraction_agent(state, CorrigendumExtraction, prompt, ROLE_CORRIGENDUM, "Corrigendum Agent", node="corrigendum")
@@ -0,0 +1,174 @@
+import os
+import time
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import CancelledError, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from langchain_core.callbacks import get_usage_metadata_callback
+from src.utils.metrics import incr_metric
+from src.agents.ratelimit import get_adaptive_limiter, is_rate_limit_error
+from src.agents.deadlines import DeadlineExceeded, remaining
+
+# Configuration
+HEDGE_ENABLED = os.environ.get("SWIFTBID_HEDGE", "0") == "1"
+HEDGE_PERCENTILE = float(os.environ.get("SWIFTBID_HEDGE_PERCENTILE", "90"))
+HEDGE_DEFAULT_DELAY = float(os.environ.get("SWIFTBID_HEDGE_DEFAULT_DELAY", "45"))  # Used until enough samples exist
+HEDGE_MIN_SAMPLES = 5
+LATENCY_WINDOW = 200
+
+# --- Latency Tracking ---
+class LatencyTracker:
+    """
+    Thread-safe rolling window of successful call latencies, bucketed by node.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, node: Optional[str], seconds: float):
+        with self._lock:
+            self._samples.setdefault(node or "default", deque(maxlen=self._window)).append(seconds)
+
+    def percentile(self, node: Optional[str], pct: float) -> Optional[float]:
+        """Returns the pct-th percentile latency for the node, or None if too few samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(node or "default", ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        idx = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[idx]
+
+    def hedge_delay(self, node: Optional[str]) -> float:
+        """Seconds to wait for the primary call before sending a hedge."""
+        threshold = self.percentile(node, HEDGE_PERCENTILE)
+        return threshold if threshold is not None else HEDGE_DEFAULT_DELAY
+
+
+# Global tracker and hedge worker pool
+_latency_tracker = LatencyTracker()
+_hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+def get_latency_tracker() -> LatencyTracker:
+    """Get the global latency tracker."""
+    return _latency_tracker
+
+
+def timed_call(invoke_fn: Callable, api_key: str, node: Optional[str] = None) -> Tuple[Any, int]:
+    """
+    Runs invoke_fn through the adaptive concurrency limiter, records its latency
+    on success and returns (result, total_tokens).
+    """
+    limiter = get_adaptive_limiter()
+    if not limiter.acquire(timeout=remaining()):
+        raise DeadlineExceeded(f"{node or 'LLM'} call stopped: no concurrency slot before the deadline")
+    start = time.monotonic()
+    try:
+        with get_usage_metadata_callback() as usage_cb:
+            result = invoke_fn(api_key=api_key)
+    except Exception as e:
+        limiter.release(rate_limited=is_rate_limit_error(e), success=False)
+        raise
+    limiter.release()
+    _latency_tracker.record(node, time.monotonic() - start)
+    tokens = sum(usage.get("total_tokens", 0) for usage in usage_cb.usage_metadata.values())
+    return result, tokens
+
+def settled_call(invoke_fn: Callable, api_key: str, settle: Callable[[str, Optional[BaseException]], None], node: Optional[str] = None) -> Tuple[Any, int]:
+    """
+    timed_call that reports its outcome on the key (settle(key, None) on success,
+    settle(key, error) otherwise) before returning, so a call settles its key
+    lease exactly once, even after it has been abandoned.
+    """
+    try:
+        outcome = timed_call(invoke_fn, api_key, node=node)
+    except BaseException as e:
+        settle(api_key, e)
+        raise
+    settle(api_key, None)
+    return outcome
+
+def _record_wasted(future):
+    """Done-callback for the losing call of a hedged pair."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    _, tokens = future.result()
+    incr_metric("hedge.wasted_tokens", tokens)
+
+def _abandon(futures: Dict[Any, str], settle: Callable[[str, Optional[BaseException]], None]):
+    """Cancels calls that have not started (returning their key); the rest finish in the background and count as wasted."""
+    for future, key in futures.items():
+        if future.cancel():
+            settle(key, CancelledError())
+        else:
+            incr_metric("hedge.abandoned")
+            future.add_done_callback(_record_wasted)
+
+def invoke_hedged(
+    invoke_fn: Callable,
+    api_key: str,
+    lease_hedge_key: Callable[[], Optional[str]],
+    settle: Callable[[str, Optional[BaseException]], None],
+    node: Optional[str] = None,
+) -> Any:
+    """
+    Invokes invoke_fn on api_key. If it has not returned within the node's latency
+    percentile, a duplicate is sent on a second key from lease_hedge_key() and the
+    first valid result wins; without a distinct healthy key free, no hedge is sent.
+    Every call settles its own key (see settled_call), so cooldowns, circuits and
+    lease counts see hedge traffic too. The loser is cancelled if it has not
+    started, otherwise abandoned and its tokens are counted as wasted. Both are
+    abandoned at the run/node deadline.
+    """
+    submit = lambda key: _hedge_executor.submit(contextvars.copy_context().run, settled_call, invoke_fn, key, settle, node)
+    primary = submit(api_key)
+    left = remaining()
+    delay = _latency_tracker.hedge_delay(node)
+    done, _ = wait([primary], timeout=delay if left is None else max(0.0, min(delay, left)))
+    if done:
+        return primary.result()[0]
+    if left is not None and left <= delay:
+        _abandon({primary: api_key}, settle)
+        raise DeadlineExceeded(f"{node or 'LLM'} call stopped: time budget exhausted")
+
+    keys = {primary: api_key}
+    hedge_key = lease_hedge_key()
+    if hedge_key is None:
+        incr_metric("hedge.skipped")
+        print(f"[Hedge] {node or 'LLM'} call slower than p{HEDGE_PERCENTILE:.0f}, but no other healthy key is free. Not hedging.")
+        hedge = None
+    else:
+        print(f"[Hedge] {node or 'LLM'} call slower than p{HEDGE_PERCENTILE:.0f}. Sending hedge request.")
+        incr_metric("hedge.issued")
+        hedge = submit(hedge_key)
+        keys[hedge] = hedge_key
+
+    pending = set(keys)
+    first_error = None
+    got_none = False
+    while pending:
+        left = remaining()
+        done, pending = wait(pending, timeout=None if left is None else max(0.0, left), return_when=FIRST_COMPLETED)
+        if not done:
+            _abandon({f: keys[f] for f in pending}, settle)
+            raise DeadlineExceeded(f"{node or 'LLM'} call stopped: time budget exhausted")
+        for future in done:
+            try:
+                result, _ = future.result()
+            except Exception as e:
+                first_error = first_error or e
+                continue
+            if result is None and pending:
+                got_none = True
+                continue  # Not a valid result; let the other call finish
+
+            _abandon({f: keys[f] for f in pending}, settle)
+            if future is hedge:
+                incr_metric("hedge.wins")
+            return result
+
+    if got_none:
+        return None
+    raise first_error
@@ -0,0 +1,224 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+# Shared key-state database. All processes on the host pointing at the same file
+# coordinate cooldowns and in-flight counts; ":memory:" keeps state per process.
+KEY_STATE_DB_PATH = os.environ.get("SWIFTBID_KEY_STATE_DB", "data/cache/key_state.db")
+KEY_MAX_IN_FLIGHT = int(os.environ.get("SWIFTBID_KEY_MAX_IN_FLIGHT", "0"))  # 0 = unlimited
+
+def key_id(api_key: str) -> str:
+    """Stable identifier for a key; raw keys are never written to the store."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class KeyStateStore:
+    """
+    SQLite-backed per-key health and usage shared by every worker process.
+    Timestamps are wall-clock (time.time()) so they are comparable across processes.
+    Writes use BEGIN IMMEDIATE so concurrent processes serialize on the file lock.
+    """
+
+    def __init__(self, db_path: str = KEY_STATE_DB_PATH, max_in_flight: int = KEY_MAX_IN_FLIGHT):
+        self.db_path = db_path
+        self.max_in_flight = max_in_flight
+        self._lock = threading.Lock()
+        if db_path != ":memory:" and os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._connect()
+
+    def _connect(self):
+        self._pid = os.getpid()
+        self._conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        if self.db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS key_state (
+                key_id TEXT PRIMARY KEY,
+                cooldown_until REAL NOT NULL DEFAULT 0,
+                last_rate_limit_at REAL,
+                retry_after_hint REAL,
+                consecutive_failures INTEGER NOT NULL DEFAULT 0,
+                circuit_open_until REAL NOT NULL DEFAULT 0,
+                total_calls INTEGER NOT NULL DEFAULT 0,
+                total_rate_limits INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS key_leases (
+                key_id TEXT NOT NULL,
+                pid INTEGER NOT NULL,
+                in_flight INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (key_id, pid)
+            );
+            """
+        )
+
+    @contextmanager
+    def _transaction(self):
+        """Serialized write transaction (thread lock + SQLite write lock)."""
+        with self._lock:
+            self._ensure_connection()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _ensure_connection(self):
+        """SQLite connections must not cross fork(); reconnect in child processes. Caller holds the lock."""
+        if os.getpid() != self._pid and self.db_path != ":memory:":
+            self._connect()
+
+    def register(self, key_ids: List[str]):
+        """Ensures rows exist for the keys and drops leases held by dead processes."""
+        with self._transaction() as conn:
+            conn.executemany("INSERT OR IGNORE INTO key_state (key_id) VALUES (?)", [(k,) for k in key_ids])
+            pids = [row[0] for row in conn.execute("SELECT DISTINCT pid FROM key_leases")]
+            dead = [(pid,) for pid in pids if not _pid_alive(pid)]
+            if dead:
+                conn.executemany("DELETE FROM key_leases WHERE pid = ?", dead)
+
+    def acquire(self, key_ids: List[str]) -> Tuple[Optional[str], float]:
+        """
+        Leases the available key with the fewest in-flight calls host-wide.
+        Returns (key_id, 0.0) on success or (None, seconds_until_earliest_key) otherwise.
+        """
+        placeholders = ",".join("?" for _ in key_ids)
+        with self._transaction() as conn:
+            now = time.time()
+            rows = conn.execute(
+                f"""
+                SELECT s.key_id, MAX(s.cooldown_until, s.circuit_open_until) AS available_at,
+                       COALESCE((SELECT SUM(l.in_flight) FROM key_leases l WHERE l.key_id = s.key_id), 0) AS in_flight
+                FROM key_state s WHERE s.key_id IN ({placeholders})
+                """,
+                key_ids,
+            ).fetchall()
+            order = {k: idx for idx, k in enumerate(key_ids)}
+            candidates = [
+                (in_flight, order[kid], kid) for kid, available_at, in_flight in rows
+                if available_at <= now and (self.max_in_flight <= 0 or in_flight < self.max_in_flight)
+            ]
+            if not candidates:
+                cooling = [available_at - now for _, available_at, _ in rows if available_at > now]
+                # All keys saturated but none cooling down: poll again shortly
+                return None, (min(cooling) if cooling else 0.05)
+
+            _, _, chosen = min(candidates)
+            conn.execute("UPDATE key_state SET total_calls = total_calls + 1 WHERE key_id = ?", (chosen,))
+            conn.execute(
+                """
+                INSERT INTO key_leases (key_id, pid, in_flight) VALUES (?, ?, 1)
+                ON CONFLICT(key_id, pid) DO UPDATE SET in_flight = in_flight + 1
+                """,
+                (chosen, os.getpid()),
+            )
+            return chosen, 0.0
+
+    def release(self, kid: str):
+        """Ends a lease taken by acquire()."""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE key_leases SET in_flight = MAX(in_flight - 1, 0) WHERE key_id = ? AND pid = ?",
+                (kid, os.getpid()),
+            )
+
+    def is_available(self, kid: str) -> bool:
+        with self._lock:
+            self._ensure_connection()
+            row = self._conn.execute(
+                "SELECT MAX(cooldown_until, circuit_open_until) FROM key_state WHERE key_id = ?", (kid,)
+            ).fetchone()
+        return row is None or row[0] <= time.time()
+
+    def report_success(self, kid: str):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE key_state SET consecutive_failures = 0, circuit_open_until = 0 WHERE key_id = ?",
+                (kid,),
+            )
+
+    def report_rate_limit(
+        self, kid: str, retry_after: Optional[float], base_delay: float,
+        cooldown_cap: float, failure_threshold: int, circuit_open_seconds: float,
+    ) -> Tuple[float, bool]:
+        """Records a 429 and returns (cooldown_seconds, circuit_just_opened)."""
+        with self._transaction() as conn:
+            now = time.time()
+            row = conn.execute(
+                "SELECT consecutive_failures, circuit_open_until FROM key_state WHERE key_id = ?", (kid,)
+            ).fetchone()
+            failures = (row[0] if row else 0) + 1
+            circuit_open_until = row[1] if row else 0.0
+
+            if retry_after is not None:
+                cooldown = retry_after
+            else:
+                cooldown = min(base_delay * (2 ** (failures - 1)), cooldown_cap)
+
+            opened = False
+            if failures >= failure_threshold and circuit_open_until <= now:
+                circuit_open_until = now + max(circuit_open_seconds, cooldown)
+                opened = True
+
+            conn.execute(
+                """
+                UPDATE key_state SET
+                    cooldown_until = MAX(cooldown_until, ?),
+                    last_rate_limit_at = ?,
+                    retry_after_hint = ?,
+                    consecutive_failures = ?,
+                    circuit_open_until = ?,
+                    total_rate_limits = total_rate_limits + 1
+                WHERE key_id = ?
+                """,
+                (now + cooldown, now, retry_after, failures, circuit_open_until, kid),
+            )
+            return cooldown, opened
+
+    def status(self, key_ids: List[str]) -> List[Dict[str, Any]]:
+        """Per-key snapshot in the order of key_ids."""
+        with self._lock:
+            self._ensure_connection()
+            now = time.time()
+            rows = {
+                row[0]: row for row in self._conn.execute(
+                    """
+                    SELECT s.key_id, MAX(s.cooldown_until, s.circuit_open_until), s.circuit_open_until,
+                           s.consecutive_failures, s.retry_after_hint, s.total_calls, s.total_rate_limits,
+                           COALESCE((SELECT SUM(l.in_flight) FROM key_leases l WHERE l.key_id = s.key_id), 0)
+                    FROM key_state s
+                    """
+                )
+            }
+        snapshot = []
+        for idx, kid in enumerate(key_ids):
+            row = rows.get(kid)
+            if row is None:
+                continue
+            snapshot.append({
+                "key": idx + 1,
+                "available_in": round(max(0.0, row[1] - now), 1),
+                "circuit_open": row[2] > now,
+                "consecutive_failures": row[3],
+                "retry_after_hint": row[4],
+                "total_calls": row[5],
+                "total_rate_limits": row[6],
+                "in_flight": row[7],
+            })
+        return snapshot
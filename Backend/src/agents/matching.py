@@ -1,61 +1,184 @@
 import os
 import json
-from langchain_core.messages import SystemMessage, HumanMessage
 from src.state import AgentState
 from src.schemas import SKUMatchOutput
-from src.prompts import PERSONA_SOURCING_ENGINEER, SKU_MATCH_TASK
-from src.utils.file_utils import read_json_file, read_text_file, write_json_file
-from src.agents.base import get_structured_llm, invoke_with_retry
+from src.prompts import PERSONA_SOURCING_ENGINEER, SKU_MATCH_CATALOG, SKU_MATCH_TASK
+from src.utils.file_utils import read_text_file
+from src.utils.artifact_writer import persist_json, load_artifact
+from src.utils.match_memo import (
+    get_match_memo,
+    normalize_description,
+    constraints_fingerprint,
+    catalog_version,
+    memo_key
+)
+from src.utils.rule_matcher import load_catalog_rows, match_by_rules
+from src.utils.metrics import incr_metric, set_metric, get_metrics, hit_rate
+from src.agents.base import (
+    StructuredOutputError,
+    make_prefixed_invoke,
+    invoke_with_retry,
+    record_model,
+    get_review_feedback,
+    keep_last_artifacts,
+    count_degraded
+)
+from src.agents.deadlines import DeadlineExceeded
+from src.agents.pricing import get_bid_stream
+
+def _item_memo_keys(bom_items, constraints, catalog_path):
+    """Computes the memo key for every BOM item."""
+    constraints_fp = constraints_fingerprint(constraints)
+    catalog_ver = catalog_version(catalog_path)
+    keys = [
+        memo_key(item.get("description", ""), constraints_fp, catalog_ver, item.get("requested_make"), bool(item.get("requires_mii_declaration")))
+        for item in bom_items
+    ]
+    return keys, catalog_ver
 
 def sku_matcher_agent(state: AgentState) -> AgentState:
     """
     Matches BOM items to the Catalog using structured output (Top 3 Candidates).
+    Items whose match was approved in an earlier run are served from the match memo
+    (except fresh_match_items, e.g. items a corrigendum changed),
+    and items that map unambiguously onto catalog attributes are matched by rules;
+    only the rest go to the LLM.
+    Recommendations are streamed into the run's provisional bid as they arrive.
+    Out of time or without a valid reply, a first attempt keeps the matches that
+    were complete; a retry keeps the previous matches.
     """
     print("--- Technical Agent: Matching Products (Top 3) ---")
     
     try:
-        bom_items = read_json_file(state["bom_path"])
-        constraints = read_json_file(state["constraints_path"])
+        bom_items = load_artifact(state, "bom", "bom_path", default=[])
+        constraints = load_artifact(state, "constraints", "constraints_path", default={})
         catalog_content = read_text_file(state["catalog_path"])
     except FileNotFoundError as e:
         print(f"Error loading inputs for SKU Matcher: {e}")
         raise e
 
-    system_msg = SystemMessage(content=PERSONA_SOURCING_ENGINEER)
+    # Memo Lookup (bypassed on QA retries so every item gets re-evaluated)
+    feedback = get_review_feedback(state, "matching")
+    keys, _ = _item_memo_keys(bom_items, constraints, state["catalog_path"])
+    fresh = set(state.get("fresh_match_items") or [])
+    memo_keys = [key for item, key in zip(bom_items, keys) if str(item.get("rfp_item_no")) not in fresh]
+    memo_hits = {} if feedback else get_match_memo().lookup(memo_keys)
 
-    prompt_content = SKU_MATCH_TASK.format(
-        bom_items=json.dumps(bom_items, indent=2),
-        constraints=json.dumps(constraints, indent=2),
-        catalog_content=catalog_content
-    )
+    reused = []
+    pending_items = []
+    for item, key in zip(bom_items, keys):
+        if key in memo_hits and str(item.get("rfp_item_no")) not in fresh:
+            rec = dict(memo_hits[key])
+            rec["rfp_item_no"] = str(item.get("rfp_item_no"))
+            rec["rfp_description"] = item.get("description", rec.get("rfp_description"))
+            reused.append(rec)
+        else:
+            pending_items.append(item)
 
-    # Feedback Injection
-    feedback = state.get("review_feedback")
-    if feedback:
-        print(f"!!! SKU Matcher Retrying with Feedback: {feedback[:100]}...")
-        prompt_content += f"\n\nIMPORTANT REVISION INSTRUCTION:\nPrevious output was rejected.\nQA Feedback: {feedback}\nPlease correct your matching logic."
-    
-    human_msg = HumanMessage(content=prompt_content)
+    if not feedback:
+        run_dir = state["run_folder"]
+        incr_metric("sku_memo.lookups", len(bom_items), run_folder=run_dir)
+        incr_metric("sku_memo.hits", len(reused), run_folder=run_dir)
+        totals = get_metrics(run_dir)
+        set_metric("sku_memo.hit_rate", hit_rate(totals["sku_memo.hits"], totals["sku_memo.lookups"]), run_folder=run_dir)
+        print(f"[Match Memo] Reused {len(reused)}/{len(bom_items)} approved match(es).")
 
-    # Define the invoke function for retry mechanism
-    def do_invoke(api_key: str):
-        structured_llm = get_structured_llm(SKUMatchOutput, api_key=api_key)
-        result = structured_llm.invoke([system_msg, human_msg])
-        return result
+    # Rule-based matching (bypassed on QA retries, like the memo, so the LLM re-evaluates every item)
+    if pending_items and not feedback:
+        rule_matched, pending_items = match_by_rules(pending_items, constraints, load_catalog_rows(state["catalog_path"]))
+        incr_metric("rule_match.items", len(rule_matched) + len(pending_items), run_folder=state["run_folder"])
+        incr_metric("rule_match.resolved", len(rule_matched), run_folder=state["run_folder"])
+        print(f"[Rule Match] Matched {len(rule_matched)} item(s) locally; {len(pending_items)} left for the LLM.")
+        reused.extend(rule_matched)
 
-    try:
-        result = invoke_with_retry(do_invoke)
-    except Exception as e:
-        print(f"Error during SKU matching: {e}")
-        raise e
-    
-    if result is None:
-        print("Warning: LLM returned None. Defaulting to empty recommendations.")
-        result = SKUMatchOutput(recommendations=[])
-        result = SKUMatchOutput(recommendations=[])
+    # Provisional Annexure-VI lines fill in as matches arrive
+    bid_stream = get_bid_stream(state["run_folder"])
+    bid_stream.start(state, bom_items, constraints)
+    for rec in reused:
+        bid_stream.add(rec)
+
+    recommendations = []
+    provenance = {}
+
+    # Each matcher call attempt (primary, hedge, retry) streams under its own number
+    def open_attempt():
+        attempt = bid_stream.open_attempt()
+        return lambda rec: bid_stream.add(rec, attempt=attempt)
+
+    if pending_items:
+        prompt_content = SKU_MATCH_TASK.format(
+            bom_items=json.dumps(pending_items, indent=2),
+            constraints=json.dumps(constraints, indent=2)
+        )
+
+        # Feedback Injection
+        if feedback:
+            print(f"!!! SKU Matcher Retrying with Feedback: {feedback[:100]}...")
+            prompt_content += f"\n\nIMPORTANT REVISION INSTRUCTION:\nPrevious output was rejected.\nQA Feedback: {feedback}\nPlease correct your matching logic."
+
+        # Persona + catalog form a prefix that only changes with the catalog version,
+        # so its context cache is shared by every tender
+        do_invoke = make_prefixed_invoke(
+            SKUMatchOutput,
+            "matcher",
+            PERSONA_SOURCING_ENGINEER,
+            [{"type": "text", "text": SKU_MATCH_CATALOG.format(catalog_content=catalog_content)}],
+            [{"type": "text", "text": prompt_content}],
+            label="catalog",
+            system_in_cache=True,
+            stream_items=("recommendations", open_attempt),
+        )
+
+        try:
+            result = invoke_with_retry(do_invoke, node="matcher")
+            recommendations = result.model_dump()["recommendations"]
+            provenance = record_model(state, "matcher")
+        except (DeadlineExceeded, StructuredOutputError) as e:
+            if feedback and state.get("matched_skus") is not None:
+                return keep_last_artifacts(state, "sku_matcher_agent", e)
+            recommendations = bid_stream.streamed()
+            count_degraded(state, e)
+            tag = "[Output Repair]" if isinstance(e, StructuredOutputError) else "[Deadline]"
+            print(f"{tag} sku_matcher_agent: {e}. Keeping {len(recommendations)} streamed match(es); "
+                  f"{len(pending_items) - len(recommendations)} item(s) left unmatched.")
+        except Exception as e:
+            print(f"Error during SKU matching: {e}")
+            raise e
+
+    # Merge memo hits and fresh matches back into BOM order
+    bom_order = {str(item.get("rfp_item_no")): idx for idx, item in enumerate(bom_items)}
+    merged = sorted(reused + recommendations, key=lambda rec: bom_order.get(str(rec.get("rfp_item_no")), len(bom_order)))
+    bid_stream.finish(merged)  # Rows of the winning attempt (with repaired elements); late attempt rows are ignored
 
     # Save Output
     path_matched = os.path.join(state["run_folder"], "06_matched_skus.json")
-    write_json_file(path_matched, result.model_dump()["recommendations"])
+    persist_json(path_matched, merged)
     
-    return {"matched_sku_path": path_matched, "phase": "matching"}
+    return {"matched_sku_path": path_matched, "matched_skus": merged, **provenance}
+
+def remember_approved_matches(state: AgentState):
+    """Stores the approved recommendations of this run in the cross-run match memo."""
+    try:
+        bom_items = load_artifact(state, "bom", "bom_path", default=[])
+        constraints = load_artifact(state, "constraints", "constraints_path", default={})
+        matches = load_artifact(state, "matched_skus", "matched_sku_path", default=[])
+        keys, catalog_ver = _item_memo_keys(bom_items, constraints, state["catalog_path"])
+    except Exception as e:
+        print(f"[Match Memo] Could not record approved matches: {e}")
+        return
+
+    recs_by_item = {str(rec.get("rfp_item_no")): rec for rec in matches if isinstance(rec, dict)}
+    entries = []
+    for item, key in zip(bom_items, keys):
+        rec = recs_by_item.get(str(item.get("rfp_item_no")))
+        if not rec or rec.get("selected_sku") in (None, "", "NO_MATCH"):
+            continue
+        entries.append({
+            "memo_key": key,
+            "normalized_description": normalize_description(item.get("description", "")),
+            "catalog_version": catalog_ver,
+            "recommendation": rec
+        })
+
+    get_match_memo().store(entries)
+    print(f"[Match Memo] Recorded {len(entries)} approved match(es).")
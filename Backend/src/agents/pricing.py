@@ -1,44 +1,37 @@
 import os
+import io
 import json
 import csv
+import time
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 from langchain_core.messages import SystemMessage, HumanMessage
 from src.state import AgentState
 from src.schemas import PricingStrategy
 from src.prompts import PERSONA_COMMERCIAL_MANAGER, PRICING_STRATEGY_TASK
-from src.utils.file_utils import read_json_file, read_text_file, write_json_file
-from src.agents.base import get_structured_llm, invoke_with_retry
+from src.utils.artifact_writer import persist_json, persist_text, persist_append, load_artifact
+from src.utils.metrics import incr_metric, set_metric
+from src.utils.pricing_math import (
+    load_product_prices,
+    load_service_prices,
+    compute_service_cost,
+    resolve_tax_rate,
+    count_priced_items,
+    price_line
+)
+from src.agents.base import invoke_structured, invoke_with_retry, record_model, get_review_feedback
 
-def pricing_agent(state: AgentState) -> AgentState:
+def strategy_fingerprint(summary: Any, commercial: Any, feedback: Optional[str]) -> str:
+    """Hash of everything the strategy prompt depends on; a strategy is reusable while it matches."""
+    payload = json.dumps({"summary": summary, "commercial": commercial, "feedback": feedback}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def generate_pricing_strategy(summary: Any, commercial: Any, feedback: Optional[str]) -> Tuple[PricingStrategy, bool]:
     """
-    Calculates the final bid price using LLM-derived strategy.
-    Supports Item-wise L1 logic, Service/Test pricing, and generates Annexure-VI CSV.
+    Asks the LLM for the pricing strategy (margins, transport, split-award stance).
+    Returns (strategy, ok); ok is False when fallback defaults were used.
     """
-    print("--- Pricing Agent: Developing Strategy & Calculating Bid ---")
-    
-    # Load Inputs
-    try:
-        matches = read_json_file(state["matched_sku_path"])
-        commercial = read_json_file(state["commercial_path"])
-        # Fallback for old states
-        if isinstance(matches, dict): matches = matches.get("recommendations", matches.get("matches", []))
-        elif isinstance(matches, list): pass # already list
-        
-    except FileNotFoundError as e:
-        print(f"Error loading inputs for Pricing Agent: {e}")
-        raise e
-
-    # Try to load summary json
-    summary = {}
-    if state.get("summary_json_path") and os.path.exists(state["summary_json_path"]):
-        summary = read_json_file(state["summary_json_path"])
-
-    # Load Technical Constraints for Tests
-    constraints = {}
-    if state.get("constraints_path") and os.path.exists(state["constraints_path"]):
-        constraints = read_json_file(state["constraints_path"])
-    
-    required_tests = constraints.get("testing_requirements", [])
-
     system_msg = SystemMessage(content=PERSONA_COMMERCIAL_MANAGER)
 
     strategy_content = PRICING_STRATEGY_TASK.format(
@@ -47,7 +40,6 @@ def pricing_agent(state: AgentState) -> AgentState:
     )
 
     # Feedback Injection
-    feedback = state.get("review_feedback")
     if feedback:
         print(f"!!! Pricing Agent Retrying with Feedback: {feedback[:100]}...")
         strategy_content += f"\n\nIMPORTANT REVISION INSTRUCTION:\nPrevious strategy was rejected.\nQA Feedback: {feedback}\nPlease adjust your strategy."
@@ -56,202 +48,403 @@ def pricing_agent(state: AgentState) -> AgentState:
 
     # Define the invoke function for retry mechanism
     def do_invoke(api_key: str):
-        structured_llm = get_structured_llm(PricingStrategy, api_key=api_key)
-        return structured_llm.invoke([system_msg, human_msg])
+        return invoke_structured(PricingStrategy, [system_msg, human_msg], api_key, node="pricer")
 
     try:
-        strategy = invoke_with_retry(do_invoke)
+        strategy = invoke_with_retry(do_invoke, node="pricer")
         print(f"Strategy Generated: Global Margin={strategy.global_margin_percent}%, Split Strategy={strategy.split_award_strategy}")
+        return strategy, True
     except Exception as e:
         print(f"Error generating pricing strategy: {e}")
         # Fallback defaults
-        strategy = PricingStrategy(
+        return PricingStrategy(
             risk_assessment="Error in generation, using defaults.",
             global_margin_percent=15.0,
             transport_overhead_percent=2.0,
             split_award_strategy="Standard",
             item_strategies=[],
             strategic_rationale="Fallback due to LLM error."
+        ), False
+
+# --- Bid Lines ---
+ANNEXURE_CSV = "Annexure_VI_Price_Bid.csv"
+CSV_HEADERS = ["S.No", "Item Description", "Quantity", "Unit Cost/km", "Total Material", "Service/Test Cost", "Total Cost", "Tax Amount", "Grand Total (Rs)"]
+
+def price_match(
+    match: Dict[str, Any],
+    bom_by_item: Dict[str, Dict[str, Any]],
+    product_catalog: Dict[str, float],
+    strategy: PricingStrategy,
+    item_strategy_map: Dict[str, float],
+    item_service_cost: float,
+    tax_rate: float,
+) -> Tuple[Dict[str, Any], Dict[str, Any], float]:
+    """Prices one recommendation. Returns (final bid entry, Annexure-VI CSV row, line total)."""
+    # Handle new "recommendations" structure vs old "matches"
+    if "selected_sku" in match:
+        sku = match["selected_sku"]
+        item_no = match["rfp_item_no"]
+        desc = match.get("rfp_description", "Unknown Item")
+    else:
+        sku = match.get("matched_sku")
+        item_no = match.get("rfp_item_no")
+        desc = "Unknown Item"
+
+    # Get Qty from BOM
+    qty = 0
+    b_item = bom_by_item.get(str(item_no))
+    if b_item:
+        qty = b_item["quantity"]
+        if desc == "Unknown Item": desc = b_item["description"]
+
+    if not (sku and sku != "NO_MATCH" and sku in product_catalog):
+        bid_entry = {"rfp_item_no": item_no, "error": "No valid SKU matched", "notes": str(match)}
+        csv_row = {
+            "S.No": item_no,
+            "Item Description": desc + " (NO MATCH)",
+            "Quantity": qty,
+            "Unit Cost/km": "0.00",
+            "Total Material": "0.00",
+            "Service/Test Cost": "0.00",
+            "Total Cost": "0.00",
+            "Tax Amount": "0.00",
+            "Grand Total (Rs)": "0.00"
+        }
+        return bid_entry, csv_row, 0.0
+
+    base_price = product_catalog[sku]
+    margin_pct = item_strategy_map.get(item_no, strategy.global_margin_percent)
+
+    # Transport, Margin, Material Total and Tax
+    line = price_line(base_price, qty, strategy.transport_overhead_percent, margin_pct, item_service_cost, tax_rate)
+    bid_entry = {
+        "rfp_item_no": item_no,
+        "description": desc,
+        "sku": sku,
+        "qty": qty,
+        "base_price": base_price,
+        "margin_percent": margin_pct,
+        "unit_price_material": round(line["unit_selling_price"], 2),
+        "total_material": round(line["total_material_cost"], 2),
+        "allocated_service_cost": round(item_service_cost, 2),
+        "total_price_inc_tax": round(line["line_total"], 2)
+    }
+    csv_row = {
+        "S.No": item_no,
+        "Item Description": desc,
+        "Quantity": qty,
+        "Unit Cost/km": f"{round(line['unit_selling_price'], 2):.2f}",
+        "Total Material": f"{round(line['total_material_cost'], 2):.2f}",
+        "Service/Test Cost": f"{round(item_service_cost, 2):.2f}",
+        "Total Cost": f"{round(line['total_cost_ex_tax'], 2):.2f}",
+        "Tax Amount": f"{round(line['tax_amount'], 2):.2f}",
+        "Grand Total (Rs)": f"{round(line['line_total'], 2):.2f}"
+    }
+    return bid_entry, csv_row, line["line_total"]
+
+def _csv_text(rows: List[Dict[str, Any]], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_HEADERS)
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+class BidStream:
+    """
+    Provisional Annexure-VI for one run, filled in while the matcher is still
+    streaming. The matcher adds recommendations as they are parsed; the pricing
+    strategist supplies the strategy and commercial terms. A line is priced as
+    soon as both are known and appended to the CSV. The service cost is spread
+    over all BOM lines for now. pricing_agent rewrites the CSV once matching is
+    approved, with exact amortization and the grand total.
+
+    Hedged or retried matcher calls stream side by side. Only the newest attempt
+    that has streamed writes rows; finish() replaces them with the winning
+    result, and a closed stream ignores every late add.
+    """
+
+    def __init__(self, run_folder: str):
+        self.run_folder = run_folder
+        self.path = os.path.join(run_folder, ANNEXURE_CSV)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._started_at: Optional[float] = None
+        self._context: Optional[Dict[str, Any]] = None      # Catalog, BOM and service cost (from the matcher)
+        self._pricing: Optional[Tuple[PricingStrategy, Dict[str, Any]]] = None
+        self._matches: Dict[str, Dict[str, Any]] = {}       # rfp_item_no -> latest recommendation
+        self._rows: Dict[str, Dict[str, Any]] = {}          # rfp_item_no -> CSV row written
+        self._base_items: set = set()                       # Items matched before the LLM call (memo, rules)
+        self._attempts = 0                                  # Matcher call attempts opened so far
+        self._owner: Optional[int] = None                   # Attempt whose rows are in the CSV
+        self._finished = False                              # The matcher's result is in; attempts are ignored
+
+    def start(self, state: AgentState, bom_items: List[Dict[str, Any]], constraints: Dict[str, Any]):
+        """(Re)starts the stream for a matcher run; earlier provisional rows are discarded."""
+        total_service_cost, _ = compute_service_cost(constraints.get("testing_requirements", []), load_service_prices())
+        with self._lock:
+            if self._closed:
+                return
+            self._started_at = time.monotonic()
+            self._context = {
+                "catalog": load_product_prices(state["catalog_path"]),
+                "bom_by_item": {str(item.get("rfp_item_no")): item for item in bom_items},
+                "item_service_cost": total_service_cost / len(bom_items) if bom_items else 0.0,
+            }
+            self._matches, self._rows, self._base_items = {}, {}, set()
+            self._owner, self._finished = None, False
+            persist_text(self.path, _csv_text([], header=True))
+
+    def set_pricing(self, strategy: PricingStrategy, commercial: Dict[str, Any]):
+        """Supplies the strategy; lines that were waiting for it are priced now."""
+        with self._lock:
+            if self._closed:
+                return
+            self._pricing = (strategy, commercial)
+            pending = [match for item_no, match in self._matches.items() if item_no not in self._rows]
+            for match in pending:
+                self._price(match)
+
+    def open_attempt(self) -> int:
+        """Numbers a matcher call attempt (primary, hedge or retry) for add()."""
+        with self._lock:
+            self._attempts += 1
+            return self._attempts
+
+    def add(self, match: Dict[str, Any], attempt: Optional[int] = None) -> bool:
+        """
+        Adds (or replaces) one recommendation and prices it if the strategy is known.
+        attempt=None marks items matched without the LLM. A newer attempt takes the
+        CSV over from an older one; rows of older attempts are dropped. Returns
+        whether the recommendation was taken.
+        """
+        item_no = str(match.get("rfp_item_no"))
+        with self._lock:
+            if self._closed or self._context is None:
+                return False
+            if attempt is None:
+                self._base_items.add(item_no)
+            else:
+                if self._finished or (self._owner is not None and attempt < self._owner):
+                    return False
+                if attempt != self._owner:
+                    self._take_over(attempt)
+            if self._matches.get(item_no) == match:
+                return True
+            self._matches[item_no] = match
+            self._price(match)
+            return True
+
+    def streamed(self) -> List[Dict[str, Any]]:
+        """Recommendations streamed so far by the attempt owning the CSV (kept when the matcher runs out of time)."""
+        with self._lock:
+            return [match for item_no, match in self._matches.items() if item_no not in self._base_items]
+
+    def finish(self, matches: List[Dict[str, Any]]):
+        """Replaces the streamed rows with the matcher's final result; later attempt rows are ignored."""
+        with self._lock:
+            if self._closed or self._context is None:
+                return
+            self._finished = True
+            self._matches = {str(match.get("rfp_item_no")): match for match in matches}
+            self._rows = {}
+            if self._pricing is not None:
+                for match in matches:
+                    self._rows[str(match.get("rfp_item_no"))] = self._row(match)
+            persist_text(self.path, _csv_text(list(self._rows.values()), header=True))
+
+    def close(self):
+        """The final bid has been written: nothing touches the CSV any more."""
+        with self._lock:
+            self._closed = True
+
+    def _take_over(self, attempt: int):
+        """Drops the rows of the previous attempt; the given attempt owns the CSV from now on."""
+        stale = [item_no for item_no in self._matches if item_no not in self._base_items]
+        for item_no in stale:
+            self._matches.pop(item_no)
+            self._rows.pop(item_no, None)
+        if stale:
+            persist_text(self.path, _csv_text(list(self._rows.values()), header=True))
+        self._owner = attempt
+
+    def _row(self, match: Dict[str, Any]) -> Dict[str, Any]:
+        strategy, commercial = self._pricing
+        item_strategy_map = {s.rfp_item_no: s.item_specific_margin_percent for s in strategy.item_strategies}
+        _, csv_row, _ = price_match(
+            match, self._context["bom_by_item"], self._context["catalog"], strategy, item_strategy_map,
+            self._context["item_service_cost"], resolve_tax_rate(commercial),
         )
+        return csv_row
 
-    # 2. Load Catalogs
-    product_catalog = {}
+    def _price(self, match: Dict[str, Any]):
+        if self._pricing is None:
+            return
+        csv_row = self._row(match)
+        item_no = str(match.get("rfp_item_no"))
+        replaced = item_no in self._rows
+        self._rows[item_no] = csv_row
+        if replaced:
+            persist_text(self.path, _csv_text(list(self._rows.values()), header=True))
+        else:
+            persist_append(self.path, _csv_text([csv_row]))
+        incr_metric("pricing.stream_lines", run_folder=self.run_folder)
+        if len(self._rows) == 1 and self._started_at is not None:
+            elapsed = round(time.monotonic() - self._started_at, 3)
+            set_metric("pricing.first_line_seconds", elapsed, run_folder=self.run_folder)
+            print(f"[Bid Stream] First provisional price line after {elapsed:.1f}s")
+
+
+# Open streams, one per run folder
+_bid_streams: Dict[str, BidStream] = {}
+_bid_streams_lock = threading.Lock()
+
+def get_bid_stream(run_folder: str) -> BidStream:
+    """Get or create the provisional bid stream of a run."""
+    with _bid_streams_lock:
+        stream = _bid_streams.get(run_folder)
+        if stream is None:
+            stream = _bid_streams[run_folder] = BidStream(run_folder)
+        return stream
+
+def close_bid_stream(run_folder: str):
+    """Closes the run's stream, so abandoned or timed-out matcher calls cannot write to the CSV any more."""
+    with _bid_streams_lock:
+        stream = _bid_streams.pop(run_folder, None)
+    if stream is not None:
+        stream.close()
+
+
+def pricing_strategy_agent(state: AgentState) -> AgentState:
+    """
+    Speculatively generates the pricing strategy as soon as the commercial terms
+    are approved and the summary exists, while SKU matching is still running.
+    The strategy does not depend on matches; pricing_agent reuses it unless its
+    inputs (summary, commercial terms, pricing feedback) have changed since.
+    """
+    print("--- Pricing Strategist: Generating Strategy (speculative, parallel to matching) ---")
+    summary = load_artifact(state, "summary", "summary_json_path", default={})
+    commercial = load_artifact(state, "commercial", "commercial_path", default={})
+    feedback = get_review_feedback(state, "pricing")
+
+    strategy, ok = generate_pricing_strategy(summary, commercial, feedback)
+    if not ok:
+        # Leave it to pricing_agent to try again rather than locking in the defaults
+        return {"pricing_strategy": None, "pricing_strategy_fingerprint": None}
+    # Lets match lines that stream in (or already have) get provisional prices
+    get_bid_stream(state["run_folder"]).set_pricing(strategy, commercial)
+    return {
+        "pricing_strategy": strategy.model_dump(),
+        "pricing_strategy_fingerprint": strategy_fingerprint(summary, commercial, feedback),
+        **record_model(state, "pricer")
+    }
+
+def pricing_agent(state: AgentState) -> AgentState:
+    """
+    Calculates the final bid price using LLM-derived strategy.
+    Supports Item-wise L1 logic, Service/Test pricing, and generates Annexure-VI CSV.
+    Reuses the speculative strategy when its inputs are unchanged.
+    """
+    print("--- Pricing Agent: Developing Strategy & Calculating Bid ---")
+    
+    # Load Inputs
     try:
-        # Product Catalog
-        prod_content = read_text_file(state["catalog_path"])
-        reader = csv.DictReader(prod_content.splitlines())
-        for row in reader:
-            product_catalog[row["SKU"]] = float(row["Base_Price_Per_Km"])
-            
-        # Service Catalog
-        service_catalog = {}
-        service_path = "data/catalog/service_pricing.csv"
-        if os.path.exists(service_path):
-            svc_content = read_text_file(service_path)
-            reader = csv.DictReader(svc_content.splitlines())
-            for row in reader:
-                service_catalog[row["Test_Name"].lower()] = float(row["Unit_Price_INR"])
+        matches = load_artifact(state, "matched_skus", "matched_sku_path", default=[])
+        commercial = load_artifact(state, "commercial", "commercial_path", default={})
+        # Fallback for old states
+        if isinstance(matches, dict): matches = matches.get("recommendations", matches.get("matches", []))
+        elif isinstance(matches, list): pass # already list
+        
+    except FileNotFoundError as e:
+        print(f"Error loading inputs for Pricing Agent: {e}")
+        raise e
+
+    # Try to load summary json
+    summary = load_artifact(state, "summary", "summary_json_path", default={})
+
+    # Load Technical Constraints for Tests
+    constraints = load_artifact(state, "constraints", "constraints_path", default={})
+    
+    # BOM lookup for quantities and descriptions
+    bom_by_item = {str(b_item["rfp_item_no"]): b_item for b_item in load_artifact(state, "bom", "bom_path", default=[])}
+    
+    required_tests = constraints.get("testing_requirements", [])
+
+    # 1. Strategy: reuse the speculative one unless its inputs changed (e.g. a pricing review rejection)
+    feedback = get_review_feedback(state, "pricing")
+    fingerprint = strategy_fingerprint(summary, commercial, feedback)
+    run_dir = state.get("run_folder")
+    if state.get("pricing_strategy") and state.get("pricing_strategy_fingerprint") == fingerprint:
+        print("Reusing speculative pricing strategy (inputs unchanged).")
+        incr_metric("pricing.strategy_reused", run_folder=run_dir)
+        strategy = PricingStrategy(**state["pricing_strategy"])
+        provenance = {}
+    else:
+        incr_metric("pricing.strategy_computed", run_folder=run_dir)
+        strategy, ok = generate_pricing_strategy(summary, commercial, feedback)
+        if ok:
+            provenance = record_model(state, "pricer")
         else:
-            print("Warning: Service pricing catalog not found.")
+            fingerprint = None
+            provenance = {"models_used": {"pricer": "fallback-defaults"}}
 
+    # 2. Load Catalogs
+    try:
+        product_catalog = load_product_prices(state["catalog_path"])
+        service_catalog = load_service_prices()
     except Exception as e:
         print(f"Error reading catalogs for pricing: {e}")
         raise e
 
     # 3. Calculate Service Costs
-    total_service_cost = 0.0
-    matched_services = []
-    
-    # Simple keyword matching for tests
-    for req_test in required_tests:
-        req_test_lower = req_test.lower()
-        cost = 0.0
-        match_name = "Unknown"
-        
-        # Find best match in service catalog
-        for svc_name, svc_cost in service_catalog.items():
-            # Token overlap matching
-            svc_tokens = set(svc_name.split())
-            req_tokens = set(req_test_lower.split())
-            if len(svc_tokens.intersection(req_tokens)) >= 2: # At least 2 words match
-                cost = svc_cost
-                match_name = svc_name
-                break
-        
-        if cost > 0:
-            total_service_cost += cost
-            matched_services.append(f"{match_name} ({cost})")
-    
+    total_service_cost, matched_services = compute_service_cost(required_tests, service_catalog)
     print(f"Calculated Total Service/Test Cost: {total_service_cost} (Matches: {matched_services})")
 
     # 4. Build Final Bid
-    final_bid = []
-    
-    # Create specific lookup for item strategies
     item_strategy_map = {s.rfp_item_no: s.item_specific_margin_percent for s in strategy.item_strategies}
-    transport_decimal = strategy.transport_overhead_percent / 100.0
-    
-    # Tax Assumption
-    tax_rate = 0.18
-    if "inclusive" in commercial.get("taxes_and_duties", "").lower():
-        tax_rate = 0.0 
-    
-    grand_total_val = 0.0
+    tax_rate = resolve_tax_rate(commercial)
 
-    # Annexure-VI Table Rows
-    csv_rows = []
-    headers = ["S.No", "Item Description", "Quantity", "Unit Cost/km", "Total Material", "Service/Test Cost", "Total Cost", "Tax Amount", "Grand Total (Rs)"]
+    # Amortize Service Cost over the priced items
+    num_items = count_priced_items(matches)
+    item_service_cost = total_service_cost / num_items if num_items > 0 else 0
 
+    final_bid = []
+    csv_rows = []
+    grand_total_val = 0.0
     for match in matches:
-        # Handle new "recommendations" structure vs old "matches"
-        if "selected_sku" in match:
-            sku = match["selected_sku"]
-            item_no = match["rfp_item_no"]
-            desc = match.get("rfp_description", "Unknown Item")
-        else:
-            sku = match.get("matched_sku")
-            item_no = match.get("rfp_item_no")
-            desc = "Unknown Item"
-
-        # Get Qty from BOM
-        qty = 0
-        try:
-            bom = read_json_file(state["bom_path"])
-            for b_item in bom:
-                if str(b_item["rfp_item_no"]) == str(item_no):
-                    qty = b_item["quantity"]
-                    if desc == "Unknown Item": desc = b_item["description"]
-                    break
-        except:
-            pass
-
-        if sku and sku != "NO_MATCH" and sku in product_catalog:
-            base_price = product_catalog[sku]
-            
-            # 1. Apply Transport
-            cost_plus_transport = base_price * (1 + transport_decimal)
-            
-            # 2. Apply Margin
-            margin_pct = item_strategy_map.get(item_no, strategy.global_margin_percent)
-            margin_decimal = margin_pct / 100.0
-            
-            unit_selling_price = cost_plus_transport * (1 + margin_decimal)
-            
-            # 3. Calculate Material Total
-            total_material_cost = unit_selling_price * qty
-            
-            # 4. Amortize Service Cost
-            num_items = len([m for m in matches if m.get("selected_sku", m.get("matched_sku")) != "NO_MATCH"])
-            item_service_cost = total_service_cost / num_items if num_items > 0 else 0
-            
-            total_cost_ex_tax = total_material_cost + item_service_cost
-            tax_amount = total_cost_ex_tax * tax_rate
-            line_total = total_cost_ex_tax + tax_amount
-            
-            grand_total_val += line_total
-            
-            final_bid.append({
-                "rfp_item_no": item_no,
-                "description": desc,
-                "sku": sku,
-                "qty": qty,
-                "base_price": base_price,
-                "margin_percent": margin_pct,
-                "unit_price_material": round(unit_selling_price, 2),
-                "total_material": round(total_material_cost, 2),
-                "allocated_service_cost": round(item_service_cost, 2),
-                "total_price_inc_tax": round(line_total, 2)
-            })
-            
-            # CSV Row
-            csv_rows.append({
-                "S.No": item_no,
-                "Item Description": desc,
-                "Quantity": qty,
-                "Unit Cost/km": f"{round(unit_selling_price, 2):.2f}",
-                "Total Material": f"{round(total_material_cost, 2):.2f}",
-                "Service/Test Cost": f"{round(item_service_cost, 2):.2f}",
-                "Total Cost": f"{round(total_cost_ex_tax, 2):.2f}",
-                "Tax Amount": f"{round(tax_amount, 2):.2f}",
-                "Grand Total (Rs)": f"{round(line_total, 2):.2f}"
-            })
-            
-        else:
-            final_bid.append({
-                "rfp_item_no": item_no,
-                "error": "No valid SKU matched",
-                "notes": str(match)
-            })
-            csv_rows.append({
-                "S.No": item_no,
-                "Item Description": desc + " (NO MATCH)",
-                "Quantity": qty,
-                "Unit Cost/km": "0.00",
-                "Total Material": "0.00",
-                "Service/Test Cost": "0.00",
-                "Total Cost": "0.00",
-                "Tax Amount": "0.00",
-                "Grand Total (Rs)": "0.00"
-            })
+        bid_entry, csv_row, line_total = price_match(match, bom_by_item, product_catalog, strategy, item_strategy_map, item_service_cost, tax_rate)
+        final_bid.append(bid_entry)
+        csv_rows.append(csv_row)
+        grand_total_val += line_total
 
     # Save JSON Output
     path_bid = os.path.join(state["run_folder"], "07_final_bid.json")
     path_strategy = os.path.join(state["run_folder"], "07_pricing_strategy.json")
-    write_json_file(path_bid, final_bid)
-    write_json_file(path_strategy, strategy.model_dump())
+    strategy_data = strategy.model_dump()
+    persist_json(path_bid, final_bid)
+    persist_json(path_strategy, strategy_data)
     
     # Save CSV Annexure-VI
-    path_csv = os.path.join(state["run_folder"], "Annexure_VI_Price_Bid.csv")
-    with open(path_csv, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        writer.writeheader()
-        writer.writerows(csv_rows)
-        # Add Grand Total Row
-        writer.writerow({
-            "S.No": "", "Item Description": "GRAND TOTAL", "Quantity": "", 
-            "Unit Cost/km": "", "Total Material": "", "Service/Test Cost": "", 
-            "Total Cost": "", "Tax Amount": "", 
-            "Grand Total (Rs)": f"{round(grand_total_val, 2):.2f}"
-        })
-
-    return {"pricing_bid_path": path_bid, "phase": "pricing"}
+    path_csv = os.path.join(state["run_folder"], ANNEXURE_CSV)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_HEADERS)
+    writer.writeheader()
+    writer.writerows(csv_rows)
+    # Add Grand Total Row
+    writer.writerow({
+        "S.No": "", "Item Description": "GRAND TOTAL", "Quantity": "", 
+        "Unit Cost/km": "", "Total Material": "", "Service/Test Cost": "", 
+        "Total Cost": "", "Tax Amount": "", 
+        "Grand Total (Rs)": f"{round(grand_total_val, 2):.2f}"
+    })
+    close_bid_stream(state["run_folder"])  # The final bid supersedes the provisional rows
+    persist_text(path_csv, buffer.getvalue())
+
+    return {
+        "pricing_bid_path": path_bid,
+        "final_bid": final_bid,
+        "pricing_strategy": strategy_data,
+        "pricing_strategy_fingerprint": fingerprint,
+        **provenance
+    }
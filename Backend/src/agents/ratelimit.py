@@ -0,0 +1,158 @@
+import os
+import re
+import time
+import threading
+import contextvars
+from typing import Optional
+from src.utils.metrics import incr_metric, set_metric
+
+# Configuration
+LLM_INITIAL_CONCURRENCY = float(os.environ.get("SWIFTBID_LLM_INITIAL_CONCURRENCY", "4"))
+LLM_MIN_CONCURRENCY = float(os.environ.get("SWIFTBID_LLM_MIN_CONCURRENCY", "1"))
+LLM_MAX_CONCURRENCY = float(os.environ.get("SWIFTBID_LLM_MAX_CONCURRENCY", "32"))
+DECREASE_FACTOR = 0.5
+DECREASE_COOLDOWN = 2.0  # Seconds; 429s arriving together only cut the limit once
+LLM_RESERVED_FRACTION = float(os.environ.get("SWIFTBID_LLM_RESERVED_FRACTION", "0.25"))
+
+# Set by the tender scheduler for runs close to their submission deadline.
+# LangGraph copies the context into node threads, so every call of the run sees it.
+_urgent_run: contextvars.ContextVar[bool] = contextvars.ContextVar("swiftbid_urgent_run", default=False)
+
+def set_run_urgency(urgent: bool):
+    """Marks LLM calls made from the current context (one graph run) as urgent or not."""
+    _urgent_run.set(urgent)
+
+def is_urgent_run() -> bool:
+    return _urgent_run.get()
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check if an exception is a rate limit error."""
+    error_str = str(error).lower()
+    rate_limit_indicators = [
+        "rate limit",
+        "rate_limit",
+        "ratelimit",
+        "429",
+        "quota",
+        "resource exhausted",
+        "resourceexhausted",
+        "too many requests",
+    ]
+    return any(indicator in error_str for indicator in rate_limit_indicators)
+
+
+_RETRY_HINT_PATTERNS = [
+    re.compile(r"retry[-_ ]?after['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)", re.IGNORECASE),
+    re.compile(r"retry[_ ]?delay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", re.IGNORECASE),
+    re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+]
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """
+    Extracts a Retry-After / quota-reset hint (in seconds) from a rate limit error.
+    Checks the HTTP response headers when available, then the error text
+    (Gemini reports e.g. "retryDelay": "37s" or "Please retry in 37.2s").
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            value = headers.get("retry-after") or headers.get("Retry-After")
+            if value:
+                return float(value)
+        except (TypeError, ValueError):
+            pass
+
+    error_str = str(error)
+    for pattern in _RETRY_HINT_PATTERNS:
+        match = pattern.search(error_str)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+# --- Adaptive Concurrency Limiter ---
+class AdaptiveLimiter:
+    """
+    Process-wide AIMD limiter for outbound LLM calls.
+    The in-flight limit grows by ~1 per window of successful calls and is
+    halved when the API reports a rate limit.
+    While urgent runs are active, a share of the limit (LLM_RESERVED_FRACTION,
+    at least one slot) is held back for their calls.
+    """
+
+    def __init__(
+        self,
+        initial: float = LLM_INITIAL_CONCURRENCY,
+        minimum: float = LLM_MIN_CONCURRENCY,
+        maximum: float = LLM_MAX_CONCURRENCY,
+    ):
+        self._min = max(1.0, minimum)
+        self._max = max(self._min, maximum)
+        self._limit = min(max(initial, self._min), self._max)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._urgent_runs = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def set_urgent_runs(self, count: int):
+        """Number of urgent runs in progress; capacity is reserved for them while > 0."""
+        with self._cond:
+            self._urgent_runs = count
+            self._cond.notify_all()
+
+    def _capacity(self, urgent: bool) -> int:
+        limit = int(self._limit)
+        if urgent or self._urgent_runs == 0:
+            return limit
+        return limit - max(1, round(limit * LLM_RESERVED_FRACTION))
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until a slot is free. Returns False if `timeout` expired first."""
+        start = time.monotonic()
+        urgent = is_urgent_run()
+        with self._cond:
+            acquired = self._cond.wait_for(lambda: self._in_flight < self._capacity(urgent), timeout=timeout)
+            if acquired:
+                self._in_flight += 1
+        incr_metric("limiter.wait_seconds", round(time.monotonic() - start, 3))
+        return acquired
+
+    def release(self, rate_limited: bool = False, success: bool = True):
+        """Frees a slot and adapts the limit to the outcome of the call."""
+        with self._cond:
+            self._in_flight -= 1
+            if rate_limited:
+                now = time.monotonic()
+                if now - self._last_decrease >= DECREASE_COOLDOWN:
+                    self._limit = max(self._min, self._limit * DECREASE_FACTOR)
+                    self._last_decrease = now
+                    incr_metric("limiter.decreases")
+                    print(f"[Limiter] Rate limited. Concurrency limit -> {int(self._limit)}")
+            elif success:
+                self._limit = min(self._max, self._limit + 1.0 / self._limit)
+            set_metric("limiter.limit", int(self._limit))
+            self._cond.notify_all()
+
+
+# Global limiter instance
+_limiter: Optional[AdaptiveLimiter] = None
+_limiter_lock = threading.Lock()
+
+def get_adaptive_limiter() -> AdaptiveLimiter:
+    """Get or create the global adaptive limiter."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = AdaptiveLimiter()
+    return _limiter
@@ -1,6 +1,8 @@
 import os
 import json
-from langchain_core.messages import SystemMessage, HumanMessage
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 from src.state import AgentState
 from src.schemas import ReviewOutput
 from src.prompts import (
@@ -10,94 +12,229 @@ from src.prompts import (
     REVIEW_CRITERIA_EXTRACTION
 )
 from src.utils.file_utils import read_json_file
-from src.agents.base import get_structured_llm, invoke_with_retry
+from src.utils.pdf_text import build_document_parts
+from src.utils.artifact_writer import load_artifact
+from src.utils.review_sampling import (
+    REVIEW_MAX_SHARDS,
+    REVIEW_TOKEN_BUDGET,
+    bom_stratum,
+    extra_shards,
+    stratified_sample,
+    shard_items
+)
+from src.utils.review_memo import get_review_memo, document_fingerprint, artifact_fingerprint, verdict_key
+from src.utils.metrics import append_metric, incr_metric, set_metric
+from src.config import get_node_config
+from src.agents.base import StructuredOutputError, make_prefixed_invoke, invoke_with_retry, record_model, count_degraded
+from src.agents.deadlines import REVIEW_MIN_SECONDS, DeadlineExceeded, run_remaining
+from src.agents.matching import remember_approved_matches
+
+MAX_RETRIES = 3  # Rejections per phase before the graph forces progress
+
+def _is_risky_match(rec: Dict[str, Any]) -> bool:
+    """Matches the reviewer should always see: NO_MATCH or a selected SKU with gaps."""
+    if rec.get("selected_sku", rec.get("matched_sku")) in (None, "", "NO_MATCH"):
+        return True
+    for cand in rec.get("top_candidates", []):
+        if cand.get("sku_id") == rec.get("selected_sku"):
+            return cand.get("spec_match_percent", 100) < 100 or bool(cand.get("missing_specs"))
+    return False
+
+def _sample_and_shard(state: AgentState, phase: str, items: List[Any], stratum_of, is_priority=None) -> List[List[Any]]:
+    """
+    Stratified sample of items within the review token budget, split into shards.
+    Priority items past the budget are still reviewed, in extra shards.
+    """
+    selected = [items[idx] for idx in stratified_sample(items, stratum_of, REVIEW_TOKEN_BUDGET, is_priority)]
+    extra = extra_shards(selected)
+    shards = shard_items(selected, max_shards=REVIEW_MAX_SHARDS + extra)
+    run_dir = state.get("run_folder")
+    set_metric(f"review.{phase}.items_total", len(items), run_folder=run_dir)
+    set_metric(f"review.{phase}.items_reviewed", len(selected), run_folder=run_dir)
+    set_metric(f"review.{phase}.items_priority", sum(1 for item in selected if is_priority and is_priority(item)), run_folder=run_dir)
+    set_metric(f"review.{phase}.shards", len(shards), run_folder=run_dir)
+    if extra:
+        print(f"[Review] {phase}: priority items exceed the review budget; adding {extra} extra shard(s)")
+        set_metric(f"review.{phase}.extra_shards", extra, run_folder=run_dir)
+    return shards
+
+def _merge_verdicts(results: List[ReviewOutput]) -> ReviewOutput:
+    """Approved only if every shard approved; critiques of failing shards are combined."""
+    if len(results) == 1:
+        return results[0]
+    failed = [(idx, r) for idx, r in enumerate(results) if not r.is_approved]
+    if not failed:
+        return ReviewOutput(
+            is_approved=True,
+            critique="Looks good",
+            suggestions=[s for r in results for s in r.suggestions]
+        )
+    return ReviewOutput(
+        is_approved=False,
+        critique="\n".join(f"[Shard {idx + 1}/{len(results)}] {r.critique}" for idx, r in failed),
+        suggestions=[s for _, r in failed for s in r.suggestions]
+    )
 
-def universal_reviewer_agent(state: AgentState) -> AgentState:
+def skip_review(state: AgentState, phase: str, reason: str, **extra) -> AgentState:
     """
-    Reviews the output of the current phase against criteria.
-    Has access to the original PDF.
+    Approves a phase without a verdict. The skip is recorded in run_metrics.json
+    (review.unreviewed), so the bid manager can see which phases nobody checked.
+    """
+    append_metric("review.unreviewed", {"phase": phase, "reason": reason}, run_folder=state.get("run_folder"))
+    print(f"[Review] WARNING: '{phase}' approved without review ({reason}).")
+    return {"review_feedback": {phase: None}, "retry_count": {phase: 0}, **extra}
+
+def universal_reviewer_agent(state: AgentState, phase: Optional[str] = None) -> AgentState:
+    """
+    Reviews the output of one phase ('technical', 'commercial', 'matching', 'pricing')
+    against criteria. Has access to the original PDF. Large BOMs and match lists are
+    reviewed as a stratified sample (by category and document position) within a
+    token budget, split into shards that are reviewed in parallel.
+    Verdicts are memoized per shard; a retry that reproduces an output already
+    reviewed in this run ends the loop without another review.
+    Feedback and retry counts are written under the phase's own key.
+    Review is optional: with less than REVIEW_MIN_SECONDS of the run budget left
+    the phase is approved as it stands, so the run finishes with its last artifacts.
     """
-    phase = state.get("phase")
     print(f"--- Reviewer: Assessing Phase '{phase}' ---")
+
+    left = run_remaining()
+    if left is not None and left < REVIEW_MIN_SECONDS:
+        incr_metric("deadline.reviews_skipped", run_folder=state.get("run_folder"))
+        return skip_review(state, phase, f"{max(left, 0):.0f}s of the run budget left")
     
-    # 1. Select Criteria & Data
+    # 1. Select Criteria & Data (one entry per review shard)
     prompt_criteria = ""
-    data_to_review = ""
+    shard_data: List[str] = []
     
-    if phase == "extraction":
+    if phase == "technical":
         prompt_criteria = REVIEW_CRITERIA_EXTRACTION
-        # Load summary as a sample, or load all?
-        # Let's load BOM and Commercial as they are most critical.
-        if state.get("bom_path") and os.path.exists(state["bom_path"]):
-            bom = read_json_file(state["bom_path"])
+        # The BOM is the most critical technical extraction.
+        bom = load_artifact(state, "bom", "bom_path", default="BOM File Missing")
+        
+        if isinstance(bom, list):
+            shards = _sample_and_shard(state, phase, bom, bom_stratum)
+            reviewed = sum(len(shard) for shard in shards)
+            for idx, shard in enumerate(shards):
+                label = f"BOM Sample ({reviewed} of {len(bom)} items, stratified by category and position; part {idx + 1}/{len(shards)})"
+                shard_data.append(f"{label}: {json.dumps(shard, indent=2)}")
         else:
-            bom = "BOM File Missing"
+            shard_data.append(f"BOM Sample: {json.dumps(bom, indent=2)}")
 
-        if state.get("commercial_path") and os.path.exists(state["commercial_path"]):
-            comm = read_json_file(state["commercial_path"])
-        else:
-            comm = "Commercial File Missing"
-            
-        data_to_review = f"BOM Sample: {json.dumps(bom[:5] if isinstance(bom, list) else bom, indent=2)}\n\nCommercial Terms: {json.dumps(comm, indent=2)}"
+    elif phase == "commercial":
+        prompt_criteria = REVIEW_CRITERIA_EXTRACTION
+        comm = load_artifact(state, "commercial", "commercial_path", default="Commercial File Missing")
+        shard_data.append(f"Commercial Terms: {json.dumps(comm, indent=2)}")
         
     elif phase == "matching":
         prompt_criteria = REVIEW_CRITERIA_MATCHING
-        if state.get("matched_sku_path") and os.path.exists(state["matched_sku_path"]):
-            matches = read_json_file(state["matched_sku_path"])
-            data_to_review = json.dumps(matches, indent=2)
+        matches = load_artifact(state, "matched_skus", "matched_sku_path")
+        if isinstance(matches, list):
+            bom_by_item = {str(item.get("rfp_item_no")): item for item in load_artifact(state, "bom", "bom_path", default=[])}
+            stratum_of = lambda rec, idx, total: bom_stratum(bom_by_item.get(str(rec.get("rfp_item_no")), {}), idx, total)
+            shards = _sample_and_shard(state, phase, matches, stratum_of, _is_risky_match)
+            reviewed = sum(len(shard) for shard in shards)
+            for idx, shard in enumerate(shards):
+                shard_data.append(
+                    f"Matches reviewed: {reviewed} of {len(matches)} (all NO_MATCH / partial matches included; part {idx + 1}/{len(shards)})\n"
+                    f"{json.dumps(shard, indent=2)}"
+                )
+        elif matches is not None:
+            shard_data.append(json.dumps(matches, indent=2))
         else:
-            data_to_review = "Matched SKUs File Missing"
+            shard_data.append("Matched SKUs File Missing")
         
     elif phase == "pricing":
         prompt_criteria = REVIEW_CRITERIA_PRICING
         path_strat = os.path.join(state["run_folder"], "07_pricing_strategy.json")
-        if os.path.exists(path_strat):
+        strategy = state.get("pricing_strategy")
+        if strategy is None and os.path.exists(path_strat):
             strategy = read_json_file(path_strat)
-            data_to_review = json.dumps(strategy, indent=2)
+        if strategy is not None:
+            shard_data.append(json.dumps(strategy, indent=2))
         else:
-            data_to_review = "Pricing Strategy File Missing"
+            shard_data.append("Pricing Strategy File Missing")
         
     else:
         print(f"Unknown phase {phase}, skipping review.")
-        return {"review_feedback": None, "retry_count": 0}
+        return {}
 
-    # 2. Invoke LLM
-    with open(state["rfp_file_path"], "rb") as f:
-        pdf_data = f.read()
+    # 2. Non-converging loop: the worker's retry reproduced an output already reviewed
+    run_dir = state.get("run_folder")
+    artifact_fp = artifact_fingerprint(phase, "\n".join(shard_data))
+    history = list((state.get("review_history") or {}).get(phase, []))
+    retries = (state.get("retry_count") or {}).get(phase, 0)
+    if retries and artifact_fp in history:
+        retries_saved = max(MAX_RETRIES - retries, 0)
+        incr_metric(f"review.{phase}.stopped_identical", run_folder=run_dir)
+        incr_metric("review.calls_saved", len(shard_data), run_folder=run_dir)
+        incr_metric("review.retries_saved", retries_saved, run_folder=run_dir)
+        print(f"!!! Retry {retries} of '{phase}' reproduced an output that was already reviewed. "
+              f"Stopping the loop ({retries_saved} retry(ies) saved).")
+        return skip_review(state, phase, "identical retry")
+    history.append(artifact_fp)
 
-    system_msg = SystemMessage(content=PERSONA_SUPERVISOR)
-    
-    human_msg = HumanMessage(
-        content=[
-            {
-                "type": "text",
-                "text": prompt_criteria.format(data=data_to_review),
-            },
-            {
-                "type": "media",
-                "mime_type": "application/pdf",
-                "data": pdf_data,
-            },
-        ]
-    )
+    # 3. Invoke LLM (shards in parallel; unchanged shards reuse their verdict)
+    document_parts = build_document_parts(state)
+    document_fp = document_fingerprint(document_parts)
+    memo = get_review_memo()
+    model = get_node_config("reviewer").model
 
-    # Define the invoke function for retry mechanism
-    def do_invoke(api_key: str):
-        structured_llm = get_structured_llm(ReviewOutput, api_key=api_key)
-        return structured_llm.invoke([system_msg, human_msg])
+    def review_shard(data_to_review: str) -> ReviewOutput:
+        key = verdict_key(phase, prompt_criteria, data_to_review, document_fp, model)
+        cached = memo.get(key)
+        if cached is not None:
+            incr_metric("review.verdict_memo_hits", run_folder=run_dir)
+            incr_metric("review.calls_saved", run_folder=run_dir)
+            return ReviewOutput(**cached)
+        # Same RFP-document prefix as the extractors, so review calls reuse its context cache
+        invoke_fn = make_prefixed_invoke(
+            ReviewOutput,
+            "reviewer",
+            PERSONA_SUPERVISOR,
+            document_parts,
+            [{"type": "text", "text": prompt_criteria.format(data=data_to_review)}],
+            label="rfp-document",
+        )
+        verdict = invoke_with_retry(invoke_fn, node="reviewer")
+        memo.put(key, verdict.model_dump())
+        return verdict
 
     try:
-        result = invoke_with_retry(do_invoke)
+        if len(shard_data) == 1:
+            results = [review_shard(shard_data[0])]
+        else:
+            print(f"Reviewing {len(shard_data)} shards in parallel...")
+            with ThreadPoolExecutor(max_workers=len(shard_data)) as executor:
+                # Each shard runs in a copy of the run's context, so it sees the run deadline
+                results = list(executor.map(lambda data: contextvars.copy_context().run(review_shard, data), shard_data))
+        result = _merge_verdicts(results)
+    except DeadlineExceeded as e:
+        incr_metric("deadline.reviews_skipped", run_folder=run_dir)
+        return skip_review(state, phase, f"review cut short: {e}", review_history={phase: history})
+    except StructuredOutputError as e:
+        count_degraded(state, e)
+        return skip_review(state, phase, f"no valid verdict: {e}", review_history={phase: history})
     except Exception as e:
         print(f"Error in Reviewer: {e}")
         # Default to approve on error to prevent blocking
-        return {"review_feedback": None, "retry_count": 0}
+        return skip_review(state, phase, f"reviewer error: {e}", review_history={phase: history})
 
-    # 3. Handle Decision
+    # 4. Handle Decision
+    provenance = record_model(state, "reviewer", label=f"reviewer_{phase}")
     if result.is_approved:
         print(">> Review Passed.")
-        return {"review_feedback": None, "retry_count": 0}
+        if phase == "matching":
+            remember_approved_matches(state)
+        return {"review_feedback": {phase: None}, "retry_count": {phase: 0}, "review_history": {phase: history}, **provenance}
     else:
         print(f">> Review Failed. Critique: {result.critique}")
-        current_retries = state.get("retry_count", 0) + 1
-        return {"review_feedback": result.critique, "retry_count": current_retries}
+        current_retries = (state.get("retry_count") or {}).get(phase, 0) + 1
+        return {"review_feedback": {phase: result.critique}, "retry_count": {phase: current_retries}, "review_history": {phase: history}, **provenance}
+
+def make_reviewer(phase: str):
+    """Binds the reviewer to one phase, for use as a graph node."""
+    def reviewer(state: AgentState) -> AgentState:
+        return universal_reviewer_agent(state, phase)
+    reviewer.__name__ = f"review_{phase}"
+    return reviewer
@@ -0,0 +1,236 @@
+"""
+Incremental corrigendum / addendum reprocessing.
+
+Takes a finished run and a corrigendum PDF, extracts only what the corrigendum
+changes (one LLM call), applies the deltas to a copy of the run's BOM,
+constraints, commercial terms and summary, and re-runs only the phases whose
+inputs changed:
+
+- description, make, category or MII edits re-match those items only;
+  specification or standard edits re-match every item
+- quantity, unit, location or test edits only re-price (no matching)
+- commercial or summary edits refresh the pricing strategy, then re-price
+
+The amended bid goes to a new run folder (<run_id>-a1, -a2, ...) so the
+original stays as submitted; 08_amendment.json records the deltas, what was
+applied or rejected, the phases re-run and the bid total before and after.
+Re-run phases are not sent back through review; 08_amendment.json and
+run_metrics.json (review.unreviewed) say so. Re-matched items bypass the
+match memo, whose entries predate the corrigendum.
+
+Usage:
+    python -m src.amend data/runs/<run_id> corrigendum.pdf [--dry-run]
+    python -m src.amend data/runs/<run_id> --delta deltas.json     # deltas prepared by hand (no LLM call)
+"""
+import os
+import re
+import time
+import shutil
+import argparse
+from typing import Any, Dict, List, Optional
+from src.schemas import CorrigendumExtraction
+from src.utils.corrigendum import AmendmentPlan, apply_corrigendum
+from src.utils.file_utils import read_json_file, write_json_file, format_executive_summary_md, format_commercial_md
+from src.utils.run_archive import COMPLETION_MARKER, ensure_live_run, mark_run_completed
+
+# Artifact files of a run: state key -> file name
+ARTIFACT_FILES = {
+    "summary": "01_executive_summary.json",
+    "bom": "02_bill_of_materials.json",
+    "constraints": "03_technical_constraints.json",
+    "commercial": "04_commercial_logistics.json",
+    "matched_skus": "06_matched_skus.json",
+    "pricing_strategy": "07_pricing_strategy.json",
+    "final_bid": "07_final_bid.json",
+}
+AMENDMENT_FILE = "08_amendment.json"
+NOT_COPIED = ("run_metrics.json", COMPLETION_MARKER, "profile", "what_if_price_curve.csv")
+
+def load_run_artifacts(run_folder: str) -> Dict[str, Any]:
+    artifacts = {}
+    for key, name in ARTIFACT_FILES.items():
+        path = os.path.join(run_folder, name)
+        artifacts[key] = read_json_file(path) if os.path.exists(path) else None
+    return artifacts
+
+def amendment_folder(run_folder: str) -> str:
+    """Next free <run_id>-aN folder next to the run (amending an amendment counts on)."""
+    parent = os.path.dirname(os.path.normpath(run_folder))
+    base = re.sub(r"-a\d+$", "", os.path.basename(os.path.normpath(run_folder)))
+    number = 1
+    while os.path.exists(os.path.join(parent, f"{base}-a{number}")):
+        number += 1
+    return os.path.join(parent, f"{base}-a{number}")
+
+def bid_total(final_bid: Optional[List[Dict[str, Any]]]) -> float:
+    return round(sum(line.get("total_price_inc_tax", 0.0) for line in final_bid or []), 2)
+
+def merge_matches(previous: List[Dict[str, Any]], fresh: List[Dict[str, Any]], bom: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Previous matches for untouched items, fresh ones for re-matched items, in BOM order; removed items drop out."""
+    by_item = {str(rec.get("rfp_item_no")): rec for rec in previous or []}
+    by_item.update({str(rec.get("rfp_item_no")): rec for rec in fresh})
+    return [by_item[str(item.get("rfp_item_no"))] for item in bom if str(item.get("rfp_item_no")) in by_item]
+
+def rerun_phases(run_folder: str, catalog_path: str, original: Dict[str, Any], amended: Dict[str, Any], plan: AmendmentPlan) -> Dict[str, Any]:
+    """Re-runs matching (changed items only) and pricing as the plan requires; returns the updated artifacts."""
+    from src.agents.matching import sku_matcher_agent
+    from src.agents.pricing import pricing_agent, strategy_fingerprint
+    from src.utils.artifact_writer import persist_json
+
+    timings = {}
+    matches = amended.get("matched_skus") or []
+    if "matching" in plan.phases:
+        start = time.perf_counter()
+        subset = [item for item in amended["bom"] if str(item.get("rfp_item_no")) in set(plan.rematch_items)]
+        print(f"[Amend] Re-matching {len(subset)} of {len(amended['bom'])} BOM item(s)")
+        result = sku_matcher_agent({
+            "run_folder": run_folder,
+            "catalog_path": catalog_path,
+            "bom": subset,
+            "constraints": amended["constraints"],
+            "fresh_match_items": list(plan.rematch_items),  # Memoized matches predate the corrigendum
+            "review_feedback": {},
+        })
+        matches = merge_matches(matches, result.get("matched_skus") or [], amended["bom"])
+        timings["matching"] = round(time.perf_counter() - start, 3)
+    elif plan.removed_items:
+        matches = merge_matches(matches, [], amended["bom"])
+    persist_json(os.path.join(run_folder, ARTIFACT_FILES["matched_skus"]), matches)
+    amended["matched_skus"] = matches
+
+    if "pricing" in plan.phases:
+        start = time.perf_counter()
+        # The run's strategy is reused unless its inputs (summary, commercial terms) changed
+        strategy = original.get("pricing_strategy")
+        fingerprint = strategy_fingerprint(original.get("summary") or {}, original.get("commercial") or {}, None) if strategy else None
+        print(f"[Amend] Re-pricing{' with a refreshed strategy' if plan.restrategize else ''}")
+        result = pricing_agent({
+            "run_folder": run_folder,
+            "catalog_path": catalog_path,
+            "bom": amended["bom"],
+            "constraints": amended["constraints"],
+            "commercial": amended.get("commercial") or {},
+            "summary": amended.get("summary") or {},
+            "matched_skus": matches,
+            "pricing_strategy": strategy,
+            "pricing_strategy_fingerprint": fingerprint,
+            "review_feedback": {},
+        })
+        amended["final_bid"] = result.get("final_bid")
+        amended["pricing_strategy"] = result.get("pricing_strategy")
+        timings["pricing"] = round(time.perf_counter() - start, 3)
+    return timings
+
+def write_amended_artifacts(run_folder: str, amended: Dict[str, Any]):
+    from src.utils.artifact_writer import persist_json, persist_text
+
+    for key in ("bom", "constraints", "commercial", "summary"):
+        if amended.get(key) is not None:
+            persist_json(os.path.join(run_folder, ARTIFACT_FILES[key]), amended[key])
+    if amended.get("commercial"):
+        persist_text(os.path.join(run_folder, "04_commercial_logistics.md"), format_commercial_md(amended["commercial"]))
+    if amended.get("summary"):
+        persist_text(os.path.join(run_folder, "01_executive_summary.md"), format_executive_summary_md(amended["summary"]))
+
+def print_plan(plan: AmendmentPlan):
+    for line in plan.applied:
+        print(f"  applied:  {line}")
+    for line in plan.rejected:
+        print(f"  rejected: {line}")
+    print(f"[Amend] Phases to re-run: {', '.join(plan.phases) or 'none'}")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Apply a corrigendum/addendum to a finished run and re-run only what it affects")
+    parser.add_argument("run_folder", help="Finished run folder (data/runs/<run_id>)")
+    parser.add_argument("corrigendum", nargs="?", help="Corrigendum/addendum PDF")
+    parser.add_argument("--delta", default=None, help="CorrigendumExtraction JSON to apply instead of extracting one")
+    parser.add_argument("--catalog", default="data/catalog/products.csv")
+    parser.add_argument("--input-mode", default=None, help="How the corrigendum is sent: auto, text or pdf")
+    parser.add_argument("--dry-run", action="store_true", help="Show the deltas and the phases to re-run without writing anything")
+    args = parser.parse_args(argv)
+    if not args.corrigendum and not args.delta:
+        parser.error("a corrigendum PDF or --delta is required")
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    from src.utils.metrics import append_metric, incr_metric, set_metric, flush_run_metrics
+    from src.utils.artifact_writer import flush_artifacts
+
+    ensure_live_run(args.run_folder)  # Runs compacted by src.archive are restored on demand
+    start = time.perf_counter()
+    original = load_run_artifacts(args.run_folder)
+    if original["bom"] is None:
+        print(f"Error: {args.run_folder} has no {ARTIFACT_FILES['bom']}")
+        return
+
+    new_folder = amendment_folder(args.run_folder)
+    if args.delta:
+        delta = CorrigendumExtraction(**read_json_file(args.delta))
+    else:
+        from src.agents.base import StructuredOutputError
+        from src.agents.extractors import extract_corrigendum_deltas
+        try:
+            delta = extract_corrigendum_deltas(args.corrigendum, original, new_folder, args.input_mode)
+        except StructuredOutputError as e:
+            # Nothing is written, so the amendment can be retried (or given as --delta)
+            print(f"Error: could not extract the corrigendum's changes: {e}")
+            return
+    extract_seconds = round(time.perf_counter() - start, 3)
+
+    amended, plan = apply_corrigendum(original, delta)
+    print(f"[Amend] Corrigendum {delta.corrigendum_reference or '(no reference)'}: "
+          f"{len(plan.applied)} change(s) applied, {len(plan.rejected)} rejected")
+    print_plan(plan)
+    for note in delta.other_changes:
+        print(f"  for review: {note}")
+    if args.dry_run:
+        return
+
+    shutil.copytree(args.run_folder, new_folder, ignore=shutil.ignore_patterns(*NOT_COPIED))
+    write_amended_artifacts(new_folder, amended)
+    from src.agents.context_cache import set_cache_run, release_run_caches
+    from src.agents.pricing import close_bid_stream
+    set_cache_run(os.path.basename(new_folder))
+    try:
+        timings = rerun_phases(new_folder, args.catalog, original, amended, plan)
+    finally:
+        close_bid_stream(new_folder)
+        release_run_caches(os.path.basename(new_folder))
+
+    elapsed = round(time.perf_counter() - start, 3)
+    report = {
+        "parent_run": os.path.normpath(args.run_folder),
+        "corrigendum": args.corrigendum or args.delta,
+        "corrigendum_reference": delta.corrigendum_reference,
+        "delta": delta.model_dump(),
+        "applied": plan.applied,
+        "rejected": plan.rejected,
+        "for_review": delta.other_changes,
+        "phases": plan.phases,
+        "reviewed": False,  # Re-run phases are not sent back through review
+        "unreviewed_phases": plan.phases,
+        "rematched_items": plan.rematch_items,
+        "removed_items": plan.removed_items,
+        "strategy_refreshed": plan.restrategize,
+        "bid_total_before": bid_total(original.get("final_bid")),
+        "bid_total_after": bid_total(amended.get("final_bid") if "pricing" in plan.phases else original.get("final_bid")),
+        "seconds": {"extraction": extract_seconds, **timings, "total": elapsed},
+    }
+    write_json_file(os.path.join(new_folder, AMENDMENT_FILE), report)
+    set_metric("amend.parent_run", report["parent_run"], run_folder=new_folder)
+    incr_metric("amend.items_rematched", len(plan.rematch_items), run_folder=new_folder)
+    set_metric("amend.phases", plan.phases, run_folder=new_folder)
+    for phase in report["unreviewed_phases"]:
+        append_metric("review.unreviewed", {"phase": phase, "reason": "corrigendum re-run"}, run_folder=new_folder)
+    if report["unreviewed_phases"]:
+        print(f"[Amend] WARNING: re-run phase(s) {', '.join(report['unreviewed_phases'])} were not reviewed.")
+    flush_artifacts()
+    flush_run_metrics(new_folder)
+    mark_run_completed(new_folder)
+
+    print(f"\n--- Amendment Complete in {elapsed:.1f}s ---")
+    print(f"Bid total: {report['bid_total_before']:.2f} -> {report['bid_total_after']:.2f}")
+    print(f"Amended run: {new_folder}")
+
+if __name__ == "__main__":
+    main()
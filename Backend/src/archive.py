@@ -0,0 +1,97 @@
+"""
+Run-folder compaction and retention.
+
+Packs completed runs older than the retention window from data/runs into
+per-month compressed archives (runs-YYYY-MM.zip) with a SQLite lookup index.
+Recent, unfinished and failed runs (no run_complete.json, or for runs from
+before the marker, no final bid and annexure) stay live. Archived
+artifacts can be read individually or a whole run restored on demand.
+
+Usage:
+    python -m src.archive compact --keep-days 14 [--dry-run]
+    python -m src.archive list [--month 2025-03]
+    python -m src.archive cat <run_id> 07_final_bid.json
+    python -m src.archive restore <run_id>
+    python -m src.archive purge --before 2024-01
+"""
+import os
+import sys
+import time
+import argparse
+from typing import List, Optional
+from src.utils.run_archive import (
+    RUNS_DIR,
+    ARCHIVE_DIR,
+    RUN_RETENTION_DAYS,
+    RunArchive,
+    compactable_runs,
+    read_run_artifact
+)
+
+def compact(archive: RunArchive, runs_dir: str, keep_days: float, dry_run: bool = False):
+    run_dirs = compactable_runs(runs_dir, keep_days)
+    if dry_run:
+        for run_dir in run_dirs:
+            print(f"[Archive] Would archive {run_dir}")
+        print(f"[Archive] {len(run_dirs)} run(s) eligible (completed, untouched for {keep_days:g}+ days)")
+        return
+    start = time.perf_counter()
+    archived = archive.archive_runs(run_dirs)
+    files = sum(run["files"] for run in archived)
+    months = sorted({run["month"] for run in archived})
+    print(f"[Archive] Archived {len(archived)} run(s), {files} file(s) into {', '.join(months) or 'no'} archive(s) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compact, list, read and restore archived runs")
+    parser.add_argument("--runs-dir", default=RUNS_DIR)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compact_cmd = commands.add_parser("compact", help="Archive completed runs older than the retention window")
+    compact_cmd.add_argument("--keep-days", type=float, default=RUN_RETENTION_DAYS, help="Completed runs touched within this many days stay live")
+    compact_cmd.add_argument("--dry-run", action="store_true")
+
+    list_cmd = commands.add_parser("list", help="List archived runs")
+    list_cmd.add_argument("--month", default=None, help="YYYY-MM")
+
+    cat_cmd = commands.add_parser("cat", help="Print one artifact of a live or archived run")
+    cat_cmd.add_argument("run_id")
+    cat_cmd.add_argument("artifact", help="File name inside the run folder, e.g. 07_final_bid.json")
+
+    restore_cmd = commands.add_parser("restore", help="Extract an archived run back into the runs directory")
+    restore_cmd.add_argument("run_id")
+
+    purge_cmd = commands.add_parser("purge", help="Delete monthly archives older than a month")
+    purge_cmd.add_argument("--before", required=True, help="YYYY-MM; archives of earlier months are deleted")
+
+    args = parser.parse_args(argv)
+    archive = RunArchive(args.archive_dir)
+
+    if args.command == "compact":
+        compact(archive, args.runs_dir, args.keep_days, args.dry_run)
+    elif args.command == "list":
+        for run in archive.list_runs(args.month):
+            completed = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["completed_at"]))
+            print(f"{run['run_id']}  {run['month']}  completed {completed}  {run['files']} file(s)  {run['bytes']} bytes")
+    elif args.command == "cat":
+        try:
+            sys.stdout.buffer.write(read_run_artifact(args.run_id, args.artifact, args.runs_dir, archive))
+        except KeyError as e:
+            print(f"Error: {e.args[0]}")
+            sys.exit(1)
+    elif args.command == "restore":
+        if os.path.isdir(os.path.join(args.runs_dir, args.run_id)):
+            print(f"Error: {args.run_id} is already live in {args.runs_dir}")
+            sys.exit(1)
+        try:
+            print(f"[Archive] Restored to {archive.restore_run(args.run_id, args.runs_dir)}")
+        except KeyError as e:
+            print(f"Error: {e.args[0]}")
+            sys.exit(1)
+    elif args.command == "purge":
+        months = archive.purge_months(args.before)
+        print(f"[Archive] Deleted {len(months)} monthly archive(s): {', '.join(months) or '-'}")
+
+if __name__ == "__main__":
+    main()
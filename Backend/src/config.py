@@ -0,0 +1,69 @@
+import os
+import json
+import threading
+from typing import Dict, Optional
+from pydantic import BaseModel, Field
+
+# Defaults used by every node unless overridden
+DEFAULT_MODEL_NAME = "gemini-flash-latest"
+DEFAULT_TEMPERATURE = 0.1
+
+# Graph nodes that talk to the LLM
+LLM_NODES = ["technical", "commercial", "compliance", "summary", "matcher", "pricer", "reviewer", "corrigendum"]
+
+class NodeModelConfig(BaseModel):
+    model: str = Field(DEFAULT_MODEL_NAME, description="Gemini model name used by the node")
+    temperature: float = Field(DEFAULT_TEMPERATURE, description="Sampling temperature")
+    timeout: Optional[float] = Field(None, description="Per-request timeout in seconds (None = client default)")
+    budget: Optional[float] = Field(None, description="Seconds for one LLM step of the node, retries and backoff included (None or 0 = unlimited)")
+
+_lock = threading.Lock()
+_configs: Optional[Dict[str, NodeModelConfig]] = None
+
+def _load_configs() -> Dict[str, NodeModelConfig]:
+    """
+    Resolves per-node model settings.
+    Precedence (lowest -> highest):
+      1. Built-in defaults
+      2. JSON file at SWIFTBID_MODEL_CONFIG, e.g. {"default": {...}, "reviewer": {"model": "gemini-flash-lite-latest"}}
+      3. Environment: SWIFTBID_MODEL / SWIFTBID_TEMPERATURE / SWIFTBID_TIMEOUT / SWIFTBID_BUDGET (all nodes),
+         then SWIFTBID_<NODE>_MODEL / _TEMPERATURE / _TIMEOUT / _BUDGET (e.g. SWIFTBID_REVIEWER_MODEL)
+    """
+    file_settings = {}
+    config_path = os.environ.get("SWIFTBID_MODEL_CONFIG")
+    if config_path:
+        with open(config_path, "r", encoding="utf-8") as f:
+            file_settings = json.load(f)
+
+    def env_overrides(prefix: str) -> dict:
+        overrides = {}
+        if os.environ.get(f"{prefix}_MODEL"):
+            overrides["model"] = os.environ[f"{prefix}_MODEL"]
+        if os.environ.get(f"{prefix}_TEMPERATURE"):
+            overrides["temperature"] = float(os.environ[f"{prefix}_TEMPERATURE"])
+        if os.environ.get(f"{prefix}_TIMEOUT"):
+            overrides["timeout"] = float(os.environ[f"{prefix}_TIMEOUT"])
+        if os.environ.get(f"{prefix}_BUDGET"):
+            overrides["budget"] = float(os.environ[f"{prefix}_BUDGET"])
+        return overrides
+
+    default_settings = {**file_settings.get("default", {}), **env_overrides("SWIFTBID")}
+
+    configs = {"default": NodeModelConfig(**default_settings)}
+    for node in LLM_NODES:
+        settings = {
+            **default_settings,
+            **file_settings.get(node, {}),
+            **env_overrides(f"SWIFTBID_{node.upper()}"),
+        }
+        configs[node] = NodeModelConfig(**settings)
+    return configs
+
+def get_node_config(node: Optional[str] = None) -> NodeModelConfig:
+    """Returns the model configuration for a graph node (or the default one)."""
+    global _configs
+    if _configs is None:
+        with _lock:
+            if _configs is None:
+                _configs = _load_configs()
+    return _configs.get(node or "default", _configs["default"])
@@ -0,0 +1,209 @@
+"""
+RFP discovery crawler.
+
+Polls configured tender listing sources (JSON, RSS or HTML) concurrently and
+drops every new tender PDF into the watch-folder inbox, where `src.watch`
+queues it for a graph run.
+
+- Per-host politeness: bounded in-flight requests and a minimum gap between
+  requests to the same host; 429/503 Retry-After is honoured.
+- Conditional GETs: listings are re-requested with If-None-Match /
+  If-Modified-Since, so unchanged pages cost a 304 and no parsing.
+- Incremental cursors for sources that support them, plus a seen-set of
+  tenders, so a tender is downloaded once.
+- Validators and cursors are only stored once a page's new tenders are
+  downloaded, so a failed download is retried on the next poll.
+
+Usage:
+    python -m src.discover --sources data/discovery/sources.json --inbox data/inbox [--interval 300]
+    python -m src.discover --fixture 200 --inbox /tmp/inbox     # against a local fake portal server
+"""
+import os
+import re
+import time
+import hashlib
+import asyncio
+import argparse
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit, urlencode
+import httpx
+from src.utils.discovery import (
+    DISCOVERY_DB_PATH,
+    HOST_MIN_INTERVAL,
+    HOST_MAX_IN_FLIGHT,
+    SourceConfig,
+    DiscoveryState,
+    HostRateLimiter,
+    load_sources,
+    parse_listing
+)
+
+USER_AGENT = "SwiftBid-Discovery/0.1"
+DEFAULT_RETRY_AFTER = 30.0
+
+def _safe_name(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", text).strip("_")[:120]
+
+def tender_file_name(source_name: str, tender_id: str) -> str:
+    """Inbox file name for a tender; a short hash of the id keeps truncated or sanitized ids apart."""
+    digest = hashlib.sha1(tender_id.encode("utf-8")).hexdigest()[:10]
+    return f"{_safe_name(source_name)[:60]}__{_safe_name(tender_id)[:100]}-{digest}.pdf"
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return float(response.headers.get("retry-after", DEFAULT_RETRY_AFTER))
+    except ValueError:
+        return DEFAULT_RETRY_AFTER
+
+
+class DiscoveryCrawler:
+    """One poll = every enabled source concurrently; see module docstring."""
+
+    def __init__(self, sources: List[SourceConfig], inbox: str, state: DiscoveryState, limiter: HostRateLimiter,
+                 concurrency: int = 64, timeout: float = 30.0):
+        self.sources = [s for s in sources if s.enabled]
+        self.inbox = inbox
+        self.state = state
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._counters: Dict[str, Any] = {}
+
+    def _count(self, name: str, amount: int = 1):
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    async def _request(self, client: httpx.AsyncClient, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        host = urlsplit(url).netloc
+        await self.limiter.acquire(host)
+        try:
+            response = await client.get(url, headers=headers or {})
+        finally:
+            self.limiter.release(host)
+        if response.status_code in (429, 503):
+            self.limiter.back_off(host, _retry_after(response))
+            self._count("throttled")
+        return response
+
+    async def _download(self, client: httpx.AsyncClient, source: SourceConfig, tender: Dict[str, Any]) -> str:
+        response = await self._request(client, tender["pdf_url"])
+        response.raise_for_status()
+        if not response.content.startswith(b"%PDF"):
+            raise ValueError(f"{tender['pdf_url']} is not a PDF")
+        path = os.path.join(self.inbox, tender_file_name(source.name, str(tender["id"])))
+        # Written under a temporary name and renamed, so the watch daemon only sees complete files
+        with open(path + ".part", "wb") as f:
+            f.write(response.content)
+        os.replace(path + ".part", path)
+        self._count("downloaded")
+        self._count("download_bytes", len(response.content))
+        return path
+
+    async def _poll_source(self, client: httpx.AsyncClient, source: SourceConfig):
+        cursor = self.state.cursor(source.name)
+        url = source.url
+        if cursor and source.cursor_param:
+            url += ("&" if "?" in url else "?") + urlencode({source.cursor_param: cursor})
+
+        for _ in range(source.max_pages):
+            response = await self._request(client, url, self.state.validators(url))
+            self._count("pages")
+            if response.status_code == 304:
+                self._count("not_modified")
+                return
+            response.raise_for_status()
+            tenders, next_url, source_cursor = parse_listing(source.format, response.text, str(response.url))
+
+            keys = {f"{source.name}:{t['id']}": t for t in tenders}
+            fresh = self.state.unseen(list(keys))
+            self._count("new_tenders", len(fresh))
+            results = await asyncio.gather(*(self._download(client, source, keys[key]) for key in fresh), return_exceptions=True)
+            failed = False
+            for key, result in zip(fresh, results):
+                if isinstance(result, Exception):
+                    failed = True
+                    self._count("download_errors")
+                    print(f"[Discovery] {source.name}: could not download {keys[key]['pdf_url']}: {result}")
+                else:
+                    self.state.mark_seen(key, source.name, keys[key]["title"], keys[key]["pdf_url"], result)
+            if failed:
+                return  # Validators and cursor stay as they were, so the page is read again next poll
+
+            self.state.store_validators(url, response.headers.get("etag"), response.headers.get("last-modified"))
+            if source_cursor and source.cursor_param:
+                self.state.store_cursor(source.name, source_cursor)
+            if not next_url:
+                return
+            url = next_url
+
+    async def poll(self) -> Dict[str, Any]:
+        """Polls every source once and returns counters for the pass."""
+        os.makedirs(self.inbox, exist_ok=True)
+        self._counters = {"sources": len(self.sources), "pages": 0, "not_modified": 0, "new_tenders": 0, "downloaded": 0}
+        start = time.perf_counter()
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits, follow_redirects=True, headers={"user-agent": USER_AGENT}) as client:
+            results = await asyncio.gather(*(self._poll_source(client, s) for s in self.sources), return_exceptions=True)
+        errors = []
+        for source, result in zip(self.sources, results):
+            if isinstance(result, Exception):
+                errors.append(f"{source.name}: {result}")
+                print(f"[Discovery] {source.name} failed: {result}")
+        self._counters["source_errors"] = len(errors)
+        self._counters["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+        return dict(self._counters)
+
+def print_report(report: Dict[str, Any]):
+    print(f"[Discovery] {report['sources']} source(s) in {report['elapsed_seconds']}s: {report['pages']} page(s), "
+          f"{report['not_modified']} unchanged (304), {report['new_tenders']} new tender(s), "
+          f"{report['downloaded']} downloaded, {report['source_errors']} source error(s)")
+
+def run_fixture(args: argparse.Namespace, state: DiscoveryState, limiter: HostRateLimiter):
+    """Polls a local fake portal server: a cold pass, an unchanged pass, then a pass after new tenders are published."""
+    from src.utils.fake_portal import FakePortalServer
+
+    server = FakePortalServer(sources=args.fixture, hosts=args.fixture_hosts, latency=args.fixture_latency).start()
+    try:
+        crawler = DiscoveryCrawler([SourceConfig(**s) for s in server.source_configs()], args.inbox, state, limiter, args.concurrency)
+        for label in ("cold", "unchanged"):
+            print(f"--- {label} pass ---")
+            print_report(asyncio.run(crawler.poll()))
+        for index in range(0, args.fixture, 10):
+            server.publish(index, 2)
+        print(f"--- after publishing to {len(range(0, args.fixture, 10))} source(s) ---")
+        print_report(asyncio.run(crawler.poll()))
+        for host, stats in sorted(server.stats().items()):
+            gap = f"{stats['min_gap']:.3f}s" if stats["min_gap"] is not None else "-"
+            print(f"  host {host}: {stats['requests']} req, {stats['not_modified']} 304, {stats['pdf_downloads']} PDFs, "
+                  f"peak in-flight {stats['peak_in_flight']}, min gap {gap}")
+    finally:
+        server.stop()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Discover new RFPs on tender portals and drop them into the inbox")
+    parser.add_argument("--sources", default="data/discovery/sources.json", help="JSON list of sources (see SourceConfig)")
+    parser.add_argument("--inbox", default="data/inbox", help="Directory watched by src.watch")
+    parser.add_argument("--state", default=DISCOVERY_DB_PATH, help="SQLite crawler state (validators, cursors, seen tenders)")
+    parser.add_argument("--interval", type=float, default=0, help="Seconds between polls (0 = poll once)")
+    parser.add_argument("--concurrency", type=int, default=64, help="Open connections across all hosts")
+    parser.add_argument("--host-interval", type=float, default=HOST_MIN_INTERVAL, help="Minimum seconds between requests to one host")
+    parser.add_argument("--host-in-flight", type=int, default=HOST_MAX_IN_FLIGHT, help="Concurrent requests per host")
+    parser.add_argument("--fixture", type=int, default=0, help="Poll N sources on a local fake portal server instead")
+    parser.add_argument("--fixture-hosts", type=int, default=8)
+    parser.add_argument("--fixture-latency", default="fixed:0.05")
+    args = parser.parse_args(argv)
+
+    state = DiscoveryState(args.state)
+    limiter = HostRateLimiter(args.host_interval, args.host_in_flight)
+    if args.fixture:
+        run_fixture(args, state, limiter)
+        return
+
+    crawler = DiscoveryCrawler(load_sources(args.sources), args.inbox, state, limiter, args.concurrency)
+    while True:
+        print_report(asyncio.run(crawler.poll()))
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
@@ -1,122 +1,169 @@
+import functools
+import threading
+import contextvars
+from typing import Annotated, Any, Dict, Optional, get_origin, get_type_hints
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, START, END
+from langgraph.types import interrupt
 from src.state import AgentState
+from src.utils.profiling import RunProfiler
 from src.agents import (
     extract_technical_agent,
     extract_commercial_agent,
     extract_compliance_agent,
     extract_summary_agent,
-    consolidator_agent,
     sku_matcher_agent,
     pricing_agent,
-    universal_reviewer_agent
+    pricing_strategy_agent,
+    make_reviewer
 )
+from src.agents.review import MAX_RETRIES
 
-MAX_RETRIES = 3
+# Reviewed phases: phase -> (worker node that produced it, node to continue with on approval)
+REVIEWED_PHASES = {
+    "technical": ("extract_technical", "matcher"),
+    "matching": ("matcher", END),
+    "commercial": ("extract_commercial", "pricing_strategist"),
+    "pricing": ("pricer", END),
+}
 
-def create_extractor_subgraph():
+# State keys with a merge reducer (parallel branches each contribute their own entries)
+MERGED_KEYS = [key for key, hint in get_type_hints(AgentState, include_extras=True).items() if get_origin(hint) is Annotated]
+
+# Set by the tender scheduler for a run; once the event is set the run yields before its next node starts
+_preempt_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar("swiftbid_preempt_event", default=None)
+
+def set_preempt_event(event: Optional[threading.Event]):
+    """Makes the current run preemptible: when `event` is set, nodes interrupt instead of starting."""
+    _preempt_event.set(event)
+
+def preemptible(node: str, fn):
     """
-    Creates a subgraph for the extraction phase.
-    Flow: START -> [Parallel Agents] -> Consolidator -> END
+    Wraps a node so a preempted run stops at a node boundary. Nodes already running
+    finish and are checkpointed; the interrupted ones start from scratch on resume.
     """
-    workflow = StateGraph(AgentState)
+    @functools.wraps(fn)
+    def guarded(state):
+        event = _preempt_event.get()
+        if event is not None and event.is_set():
+            interrupt({"preempted_before": node})
+        return fn(state)
+    return guarded
 
-    # Add Nodes
-    workflow.add_node("extract_technical", extract_technical_agent)
-    workflow.add_node("extract_commercial", extract_commercial_agent)
-    workflow.add_node("extract_compliance", extract_compliance_agent)
-    workflow.add_node("extract_summary", extract_summary_agent)
-    workflow.add_node("consolidator", consolidator_agent)
+def make_router(phase: str):
+    """
+    Builds the routing function for one phase's reviewer.
+    Routes back to the worker if rejected, or forward if approved.
+    """
+    worker, next_node = REVIEWED_PHASES[phase]
 
-    # Parallel Start
-    workflow.add_edge(START, "extract_technical")
-    workflow.add_edge(START, "extract_commercial")
-    workflow.add_edge(START, "extract_compliance")
-    workflow.add_edge(START, "extract_summary")
+    def route_after_review(state: AgentState):
+        feedback = (state.get("review_feedback") or {}).get(phase)
+        retry_count = (state.get("retry_count") or {}).get(phase, 0)
 
-    # Fan-in to Consolidator
-    workflow.add_edge("extract_technical", "consolidator")
-    workflow.add_edge("extract_commercial", "consolidator")
-    workflow.add_edge("extract_compliance", "consolidator")
-    workflow.add_edge("extract_summary", "consolidator")
+        # 1. Check for Max Retries (Force Proceed)
+        if feedback and retry_count > MAX_RETRIES:
+            print(f"!!! Max Retries ({MAX_RETRIES}) reached for {phase}. Forcing progress.")
+            feedback = None # Clear feedback to force approval path
 
-    # End Subgraph
-    workflow.add_edge("consolidator", END)
+        # 2. Handle Rejection (Loop Back)
+        if feedback:
+            print(f"<<< Rejected. Looping back to {worker} (Attempt {retry_count + 1})")
+            return worker
 
-    return workflow.compile()
+        # 3. Handle Approval (Move Forward)
+        print(f">>> Approved. Moving forward from {phase}.")
+        return next_node
 
-def route_after_review(state: AgentState):
-    """
-    Determines the next step after review.
-    Routes back to the worker if rejected, or forward if approved.
-    """
-    feedback = state.get("review_feedback")
-    retry_count = state.get("retry_count", 0)
-    phase = state.get("phase")
-
-    # 1. Check for Max Retries (Force Proceed)
-    if feedback and retry_count > MAX_RETRIES:
-        print(f"!!! Max Retries ({MAX_RETRIES}) reached for {phase}. Forcing progress.")
-        feedback = None # Clear feedback to force approval path
-        # ideally we log this permanently somewhere
-
-    # 2. Handle Rejection (Loop Back)
-    if feedback:
-        print(f"<<< Rejected. Looping back to {phase} (Attempt {retry_count + 1})")
-        if phase == "extraction":
-            return "extractor"
-        elif phase == "matching":
-            return "matcher"
-        elif phase == "pricing":
-            return "pricer"
-    
-    # 3. Handle Approval (Move Forward)
-    print(f">>> Approved. Moving forward from {phase}.")
-    if phase == "extraction":
-        return "matcher"
-    elif phase == "matching":
-        return "pricer"
-    elif phase == "pricing":
-        return END
-    
-    return END
-
-def create_graph():
+    return route_after_review
+
+def add_reviewed_phase(workflow: StateGraph, phase: str, wrap):
+    """Sends the phase's worker output to its own reviewer, which loops back or moves on."""
+    worker, next_node = REVIEWED_PHASES[phase]
+    reviewer = f"review_{phase}"
+    workflow.add_node(reviewer, wrap(reviewer, make_reviewer(phase)))
+    workflow.add_edge(worker, reviewer)
+    workflow.add_conditional_edges(reviewer, make_router(phase), {worker: worker, next_node: next_node})
+
+def state_changes(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """The keys (and, for merged dicts, the entries) a branch changed, so parallel branches never write the same key."""
+    update = {}
+    for key, value in after.items():
+        old = before.get(key)
+        if key in MERGED_KEYS:
+            changed = {k: v for k, v in (value or {}).items() if k not in (old or {}) or old[k] != v}
+            if changed:
+                update[key] = changed
+        elif value != old:
+            update[key] = value
+    return update
+
+def make_branch(branch):
+    """Runs a compiled branch subgraph as one node of the main graph (it checkpoints under the run's thread)."""
+    def run_branch(state: AgentState, config: RunnableConfig):
+        return state_changes(state, branch.invoke(state, config))
+    return run_branch
+
+def create_graph(profiler: Optional[RunProfiler] = None, checkpointer: Any = None):
     """
-    Builds the Main Workflow with Universal Review Loop.
-    Flow: 
-    START -> Extractor -> Reviewer -> (Loop/Next)
-    Matcher -> Reviewer -> (Loop/Next)
-    Pricer -> Reviewer -> (Loop/END)
+    Builds the Main Workflow with a review loop per artifact.
+    A graph step waits for every node in it, so the technical and commercial
+    chains run as their own subgraphs: each moves on as soon as its own node
+    finishes, not when the slowest extractor does.
+      technical_branch:  extract_technical -> review_technical -> matcher -> review_matching
+      commercial_branch: extract_commercial -> review_commercial -> pricing_strategist
+                         extract_summary -> END (unreviewed)
+                         (both extractors start in the branch's first step, and that step
+                         ends only when both are done, so the summary is in place before
+                         review_commercial and the strategist run; a commercial retry
+                         re-runs extract_commercial alone. The strategy is speculative
+                         and runs alongside matching)
+      START -> [technical_branch, commercial_branch, extract_compliance]
+      [technical_branch, commercial_branch] -> pricer -> review_pricing -> END
+    With a profiler, every node is wrapped for per-node CPU and memory profiling.
+    A checkpointer makes runs resumable: the tender scheduler preempts a run
+    between nodes (see set_preempt_event) and resumes it from its checkpoint.
     """
-    
+    profile = profiler.wrap if profiler is not None else (lambda name, fn: fn)
+    wrap = lambda name, fn: preemptible(name, profile(name, fn))
+
+    # Technical branch
+    technical = StateGraph(AgentState)
+    technical.add_node("extract_technical", wrap("extract_technical", extract_technical_agent))
+    technical.add_node("matcher", wrap("matcher", sku_matcher_agent))
+    technical.add_edge(START, "extract_technical")
+    add_reviewed_phase(technical, "technical", wrap)
+    add_reviewed_phase(technical, "matching", wrap)
+
+    # Commercial branch
+    commercial = StateGraph(AgentState)
+    commercial.add_node("extract_commercial", wrap("extract_commercial", extract_commercial_agent))
+    commercial.add_node("extract_summary", wrap("extract_summary", extract_summary_agent))
+    commercial.add_node("pricing_strategist", wrap("pricing_strategist", pricing_strategy_agent))
+    commercial.add_edge(START, "extract_commercial")
+    commercial.add_edge(START, "extract_summary")
+    # No join into review_commercial: it would never fire again on a commercial retry, which re-runs extract_commercial alone
+    commercial.add_edge("extract_summary", END)
+    commercial.add_edge("pricing_strategist", END)
+    add_reviewed_phase(commercial, "commercial", wrap)
+
+    # Main workflow (branches inherit the checkpointer)
     workflow = StateGraph(AgentState)
+    workflow.add_node("technical_branch", make_branch(technical.compile()))
+    workflow.add_node("commercial_branch", make_branch(commercial.compile()))
+    workflow.add_node("extract_compliance", wrap("extract_compliance", extract_compliance_agent))
+    workflow.add_node("pricer", wrap("pricer", pricing_agent))
+
+    # Parallel Start
+    workflow.add_edge(START, "technical_branch")
+    workflow.add_edge(START, "commercial_branch")
+    workflow.add_edge(START, "extract_compliance")
+    workflow.add_edge("extract_compliance", END)
 
-    # Nodes
-    workflow.add_node("extractor", create_extractor_subgraph())
-    workflow.add_node("matcher", sku_matcher_agent)
-    workflow.add_node("pricer", pricing_agent)
-    workflow.add_node("reviewer", universal_reviewer_agent)
-
-    # Edges
-    workflow.add_edge(START, "extractor")
-    
-    # All workers send output to Reviewer
-    workflow.add_edge("extractor", "reviewer")
-    workflow.add_edge("matcher", "reviewer")
-    workflow.add_edge("pricer", "reviewer")
-
-    # Reviewer decides where to go next
-    workflow.add_conditional_edges(
-        "reviewer",
-        route_after_review,
-        {
-            "extractor": "extractor",
-            "matcher": "matcher",
-            "pricer": "pricer",
-            END: END
-        }
-    )
+    # Pricing waits for approved matches and the strategy
+    workflow.add_edge(["technical_branch", "commercial_branch"], "pricer")
+    add_reviewed_phase(workflow, "pricing", wrap)
 
     # Compile
-    app = workflow.compile()
+    app = workflow.compile(checkpointer=checkpointer)
     return app
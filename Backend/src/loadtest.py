@@ -0,0 +1,223 @@
+"""
+Load-test harness.
+
+Runs concurrent full graph runs against a local fake Gemini server (no real API
+calls) and reports sustained throughput, run and LLM latency percentiles,
+retries and per-key utilization. Use it to size a host: how many tenders per
+hour N keys sustain under a given quota.
+
+Usage:
+    python -m src.loadtest path/to/rfp.pdf --runs 20 --concurrency 4 --keys 3 \\
+        --latency lognormal:3,0.5 --quota 15/60 --key-rate-limit 1=0.2 --time-scale 0.1
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from src.utils.file_utils import write_json_file
+from src.utils.fake_gemini import FakeGeminiServer, load_fixtures
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99 (None when there are no samples)."""
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    p50, p95, p99 = np.percentile(np.asarray(values, dtype=float), [50, 95, 99])
+    return {"p50": round(float(p50), 3), "p95": round(float(p95), 3), "p99": round(float(p99), 3)}
+
+def parse_quota(spec: str) -> Tuple[int, float]:
+    """Parses 'requests/window_seconds', e.g. '15/60'."""
+    requests, window = spec.split("/")
+    return int(requests), float(window)
+
+def parse_key_values(specs: List[str]) -> Dict[int, str]:
+    """Parses ['1=0.2', '3=0.5'] into {1: '0.2', 3: '0.5'} (1-based key index)."""
+    return {int(index): value for index, value in (spec.split("=", 1) for spec in specs)}
+
+def fake_key(index: int) -> str:
+    return f"fake-key-{index}"
+
+def configure_environment(base_url: str, n_keys: int, output_dir: str, context_cache: bool = True):
+    """
+    Points the pipeline at the fake server with N fake keys and isolated state.
+    Must run before src.graph / src.agents are imported.
+    """
+    for name in list(os.environ):
+        if name == "GOOGLE_API_KEY" or name.startswith("GOOGLE_API_KEY_"):
+            del os.environ[name]
+    for index in range(1, n_keys + 1):
+        os.environ[f"GOOGLE_API_KEY_{index}"] = fake_key(index)
+    os.environ["SWIFTBID_GEMINI_BASE_URL"] = base_url
+    # Fresh key state and match memo, so earlier runs do not skew the numbers
+    os.environ["SWIFTBID_KEY_STATE_DB"] = os.path.join(output_dir, "key_state.db")
+    os.environ["SWIFTBID_MATCH_MEMO_DB"] = os.path.join(output_dir, "sku_match_memo.db")
+    os.environ["SWIFTBID_CONTEXT_CACHE"] = "1" if context_cache else "0"
+
+def run_load(pdf_path: str, runs: int, concurrency: int, output_dir: str, input_mode: Optional[str] = None,
+             run_budget: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Runs the graph `runs` times with at most `concurrency` runs in flight."""
+    from src.graph import create_graph
+    from src.state import make_initial_state
+    from src.agents.deadlines import RUN_BUDGET_SECONDS, set_run_budget
+    from src.agents.context_cache import set_cache_run, release_run_caches
+    from src.agents.pricing import close_bid_stream
+
+    app = create_graph()
+
+    def one_run(index: int) -> Dict[str, Any]:
+        run_id = f"load-{index:04d}"
+        run_dir = os.path.join(output_dir, "runs", run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        start = time.perf_counter()
+        set_run_budget(RUN_BUDGET_SECONDS if run_budget is None else run_budget)
+        set_cache_run(run_id)
+        try:
+            final_state = app.invoke(make_initial_state(run_id, run_dir, pdf_path, input_mode=input_mode))
+            ok = bool(final_state.get("pricing_bid_path"))
+            error = None
+        except Exception as e:
+            ok, error = False, str(e)
+        finally:
+            close_bid_stream(run_dir)
+            release_run_caches(run_id)
+        return {"run_id": run_id, "ok": ok, "seconds": time.perf_counter() - start, "error": error}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(one_run, range(runs)))
+
+def build_report(results: List[Dict[str, Any]], server_stats: Dict[str, Any], elapsed: float, process_metrics: Dict[str, Any], n_keys: int) -> Dict[str, Any]:
+    completed = [r for r in results if r["ok"]]
+    keys = {}
+    for index in range(1, n_keys + 1):
+        stats = server_stats["keys"].get(fake_key(index), {})
+        keys[fake_key(index)] = {
+            "requests": stats.get("requests", 0),
+            "ok": stats.get("ok", 0),
+            "rate_limited": stats.get("rate_limited", 0),
+            "malformed": stats.get("malformed", 0),
+            "peak_in_flight": stats.get("peak_in_flight", 0),
+            "input_tokens": stats.get("input_tokens", 0),
+            "cached_tokens": stats.get("cached_tokens", 0),
+            "caches_created": stats.get("caches_created", 0),
+            "caches_deleted": stats.get("caches_deleted", 0),
+            # Share of wall time the key spent serving requests (can exceed 1 with parallel calls)
+            "utilization": round(stats.get("busy_seconds", 0.0) / elapsed, 3) if elapsed else 0.0,
+        }
+    return {
+        "runs": len(results),
+        "completed": len(completed),
+        "failed": len(results) - len(completed),
+        "elapsed_seconds": round(elapsed, 3),
+        "tenders_per_hour": round(len(completed) / elapsed * 3600.0, 2) if elapsed else 0.0,
+        "run_latency_seconds": percentiles([r["seconds"] for r in completed]),
+        "llm_latency_seconds": percentiles(server_stats["latencies"]),
+        "llm_requests": sum(k["requests"] for k in keys.values()),
+        "llm_rate_limited": sum(k["rate_limited"] for k in keys.values()),
+        "llm_retries": process_metrics.get("llm.retries", 0),
+        "llm_malformed": sum(k["malformed"] for k in keys.values()),
+        "structured_output_repaired": process_metrics.get("structured_output.repaired", 0),
+        "structured_output_fixup_calls": process_metrics.get("structured_output.fixup_calls", 0),
+        "structured_output_recalls": process_metrics.get("structured_output.recalls", 0),
+        "input_tokens": sum(k["input_tokens"] for k in keys.values()),
+        "cached_tokens": sum(k["cached_tokens"] for k in keys.values()),
+        "caches_created": sum(k["caches_created"] for k in keys.values()),
+        "caches_deleted": sum(k["caches_deleted"] for k in keys.values()),
+        "limiter_decreases": process_metrics.get("limiter.decreases", 0),
+        "limiter_final_limit": process_metrics.get("limiter.limit"),
+        "key_cooldown_wait_seconds": process_metrics.get("keys.cooldown_wait_seconds", 0),
+        "deadline_exceeded_calls": process_metrics.get("deadline.exceeded", 0),
+        "hedges": {name: process_metrics.get(f"hedge.{name}", 0) for name in ("issued", "skipped", "wins", "abandoned")},
+        "keys": keys,
+        "errors": sorted({r["error"] for r in results if r["error"]}),
+    }
+
+def print_report(report: Dict[str, Any]):
+    print("\n=== Load Test Report ===")
+    print(f"Runs: {report['completed']}/{report['runs']} completed in {report['elapsed_seconds']}s "
+          f"-> {report['tenders_per_hour']} tenders/hour")
+    for label, key in (("Run latency", "run_latency_seconds"), ("LLM latency", "llm_latency_seconds")):
+        p = report[key]
+        print(f"{label:12s} p50={p['p50']}s p95={p['p95']}s p99={p['p99']}s")
+    print(f"LLM requests: {report['llm_requests']}, 429s: {report['llm_rate_limited']}, retries: {report['llm_retries']}, "
+          f"limiter decreases: {report['limiter_decreases']}")
+    if report["hedges"]["issued"] or report["hedges"]["skipped"]:
+        print("Hedges: " + ", ".join(f"{name} {count}" for name, count in report["hedges"].items()))
+    print(f"Malformed replies: {report['llm_malformed']}, repaired: {report['structured_output_repaired']}, "
+          f"follow-up calls: {report['structured_output_fixup_calls']}, full re-sends: {report['structured_output_recalls']}")
+    if report["deadline_exceeded_calls"]:
+        print(f"LLM calls stopped at a time budget: {report['deadline_exceeded_calls']}")
+    print(f"Input tokens: {report['input_tokens']} ({report['cached_tokens']} from context caches, {report['caches_created']} cache(s) created, {report['caches_deleted']} deleted)")
+    for key, stats in report["keys"].items():
+        print(f"  {key}: {stats['requests']} req, {stats['rate_limited']} throttled, "
+              f"utilization {stats['utilization']}, peak in-flight {stats['peak_in_flight']}")
+    for error in report["errors"]:
+        print(f"  error: {error}")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load-test the pipeline against a local fake Gemini server")
+    parser.add_argument("pdf_path", help="RFP PDF used for every run")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4, help="Graph runs in flight at once")
+    parser.add_argument("--keys", type=int, default=3, help="Number of fake API keys")
+    parser.add_argument("--latency", default="lognormal:3,0.5", help="fixed:S | uniform:A,B | normal:MEAN,SD | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--schema-latency", action="append", default=[], help="Per-schema latency, e.g. ReviewOutput=fixed:1 (repeatable)")
+    parser.add_argument("--rate-limit-prob", type=float, default=0.0, help="Probability of a random 429 on any key")
+    parser.add_argument("--key-rate-limit", action="append", default=[], help="Per-key 429 probability, e.g. 1=0.3 (repeatable)")
+    parser.add_argument("--quota", default=None, help="Per-key quota window 'requests/seconds', e.g. 15/60")
+    parser.add_argument("--key-quota", action="append", default=[], help="Per-key quota, e.g. 2=5/60 (repeatable)")
+    parser.add_argument("--malformed-prob", type=float, default=0.0, help="Share of structured replies truncated mid-JSON")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Multiplier on injected latency (e.g. 0.1 for quick runs)")
+    parser.add_argument("--fixtures", default=None, help="Directory of <SchemaTitle>.json canned responses")
+    parser.add_argument("--array-items", type=int, default=3, help="List length in synthesized responses (e.g. BOM size)")
+    parser.add_argument("--no-context-cache", action="store_true", help="Send prompt prefixes inline (baseline for comparison)")
+    parser.add_argument("--input-mode", default=None)
+    parser.add_argument("--budget", type=float, default=None, help="Run time budget in seconds (default SWIFTBID_RUN_BUDGET; 0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Output directory (default: data/loadtest/<timestamp>)")
+    args = parser.parse_args(argv)
+
+    if "src.agents.base" in sys.modules:
+        print("Warning: agents already imported; key and base URL settings may not apply.")
+
+    output_dir = args.output or os.path.join("data", "loadtest", time.strftime("%Y%m%d-%H%M%S"))
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.makedirs(output_dir, exist_ok=True)
+
+    server = FakeGeminiServer(
+        latency=args.latency,
+        latency_by_schema=dict(spec.split("=", 1) for spec in args.schema_latency),
+        rate_limit_prob=args.rate_limit_prob,
+        key_rate_limit_prob={fake_key(i): float(v) for i, v in parse_key_values(args.key_rate_limit).items()},
+        quota=parse_quota(args.quota) if args.quota else None,
+        key_quota={fake_key(i): parse_quota(v) for i, v in parse_key_values(args.key_quota).items()},
+        fixtures=load_fixtures(args.fixtures),
+        array_items=args.array_items,
+        time_scale=args.time_scale,
+        malformed_prob=args.malformed_prob,
+        seed=args.seed,
+    ).start()
+    print(f"[LoadTest] Fake Gemini server at {server.base_url}; {args.runs} run(s), concurrency {args.concurrency}, {args.keys} key(s)")
+    configure_environment(server.base_url, args.keys, output_dir, context_cache=not args.no_context_cache)
+
+    from src.utils.metrics import get_metrics
+    from src.utils.artifact_writer import flush_artifacts
+
+    start = time.perf_counter()
+    try:
+        results = run_load(args.pdf_path, args.runs, args.concurrency, output_dir, args.input_mode, args.budget)
+    finally:
+        flush_artifacts()
+        elapsed = time.perf_counter() - start
+        server.stop()
+
+    report = build_report(results, server.stats(), elapsed, get_metrics(), args.keys)
+    report["config"] = vars(args)
+    write_json_file(os.path.join(output_dir, "loadtest_report.json"), report)
+    print_report(report)
+    print(f"Report: {os.path.join(output_dir, 'loadtest_report.json')}")
+
+if __name__ == "__main__":
+    main()
@@ -19,11 +19,17 @@ PERSONA_SUPERVISOR = (
     "and provide actionable feedback to ensure the final bid is accurate and competitive."
 )
 
+PERSONA_JSON_REPAIR = (
+    "You are a data-cleaning assistant. You correct JSON so that it satisfies a schema, "
+    "changing only what the validation errors point at and never inventing information."
+)
+
 # --- Extraction Roles (used to format PERSONA_RFP_ANALYST) ---
 ROLE_TECHNICAL = "Technical Analysis and Engineering specifications"
 ROLE_COMMERCIAL = "Commercial Terms, Logistics, and Contract Law"
 ROLE_COMPLIANCE = "Vendor Compliance, Eligibility Criteria, and Tender Qualifications"
 ROLE_SUMMARY = "Executive Summarization and High-level Project Analysis"
+ROLE_CORRIGENDUM = "Tender Amendments, Corrigenda and Addenda"
 
 # --- Extraction Prompts ---
 EXTRACT_TECHNICAL_PROMPT = """
@@ -42,9 +48,38 @@ Crucial:
 EXTRACT_COMPLIANCE_PROMPT = "Extract the Compliance and Eligibility criteria from this RFP."
 EXTRACT_SUMMARY_PROMPT = "Extract the Executive Summary from this RFP. Pay special attention to the 'Validity of Offer' period (in days) and any key dates."
 
+EXTRACT_CORRIGENDUM_PROMPT = """
+The document above is a corrigendum/addendum to a tender we have already analysed.
+Extract ONLY what it changes, relative to the current extraction below. Do not repeat unchanged values.
+
+Current Bill of Materials:
+{bom}
+
+Current Technical Constraints:
+{constraints}
+
+Current Commercial Terms:
+{commercial}
+
+Current Executive Summary:
+{summary}
+
+Crucial:
+1. Refer to BOM items by their current 'rfp_item_no'. For an 'update', fill in only the fields that change.
+2. Use the field names of the current commercial terms and summary for term changes (dotted for nested fields).
+3. A revised date or quantity replaces the old one; 'extended by 2 weeks' must be resolved into the new value.
+4. Anything that does not fit these fields goes into 'other_changes' in one sentence each.
+"""
+
 # --- Task Prompts ---
+# Sent ahead of SKU_MATCH_TASK as a stable, cacheable prefix
+SKU_MATCH_CATALOG = """
+Product Catalog (CSV):
+{catalog_content}
+"""
+
 SKU_MATCH_TASK = """
-Task: You are the Technical Agent. For each item in the BOM, identify the Top 3 matching products from the Catalog.
+Task: You are the Technical Agent. For each item in the BOM, identify the Top 3 matching products from the Product Catalog provided above.
 
 Input BOM:
 {bom_items}
@@ -52,9 +87,6 @@ Input BOM:
 Input Technical Constraints:
 {constraints}
 
-Product Catalog (CSV):
-{catalog_content}
-
 Instructions:
 1. For each BOM item:
    - Identify up to 3 potential matches from the catalog.
@@ -139,4 +171,29 @@ Checklist:
 3. Are there any empty lists [] where there should be content?
 
 If data is missing or looks corrupt, reject it.
-"""
\ No newline at end of file
+"""
+
+# --- Structured Output Repair (text-only follow-ups, no document attached) ---
+REPAIR_ELEMENTS_TASK = """
+These elements of a `{schema_name}` response failed schema validation and were removed.
+
+Elements (with their position and validation errors):
+{elements}
+
+Return a corrected version of each element, keeping its position. Fix only the fields named in the errors
+(e.g. a number written as text, a missing unit that is stated in the description) and copy every other value unchanged.
+If a required value cannot be recovered from the element itself, return the element as null.
+"""
+
+REPAIR_OBJECT_TASK = """
+This `{schema_name}` response failed schema validation.
+
+Validation errors:
+{errors}
+
+Response:
+{payload}
+
+Return the corrected response. Fix only the fields named in the errors and copy every other value unchanged.
+Use only information present in the response.
+"""
@@ -0,0 +1,391 @@
+"""
+Deadline-aware tender scheduler.
+
+Runs a batch of RFPs through the graph ordered by submission deadline instead
+of arrival. The deadline comes from a quick text pre-scan at submission and is
+replaced by ExecutiveSummary.critical_dates.submission_deadline once the summary
+extractor has run. Same-day deadlines are ordered by estimated value.
+
+- Urgent runs (deadline within URGENT_HOURS) may use every run slot; other runs
+  leave `reserved` slots free, and the LLM limiter holds back a share of its
+  capacity while urgent runs are active.
+- An urgent tender that finds no free slot preempts the lowest-priority
+  non-urgent run. It yields before its next node starts (nodes already running
+  finish first) and resumes from its checkpoint.
+- Queue position and expected completion time are written to a status JSON.
+- Each run has a time budget (SWIFTBID_RUN_BUDGET) counted over its running
+  time only, so a preempted run resumes with what it had left.
+
+Usage:
+    python -m src.scheduler rfp_a.pdf rfp_b.pdf rfp_c.pdf --concurrency 2 --reserved 1
+"""
+import os
+import re
+import uuid
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from src.utils.file_utils import write_json_file
+from src.utils.pdf_text import get_text_layer
+
+URGENT_HOURS = float(os.environ.get("SWIFTBID_URGENT_HOURS", "48"))
+DEFAULT_DEADLINE_DAYS = float(os.environ.get("SWIFTBID_DEFAULT_DEADLINE_DAYS", "30"))  # When no deadline is found
+EXPECTED_RUN_SECONDS = float(os.environ.get("SWIFTBID_EXPECTED_RUN_SECONDS", "300"))   # Until real runs are measured
+RUN_TIME_SMOOTHING = 0.3
+
+_DATE_FORMATS = [
+    "%Y-%m-%d %H:%M", "%Y-%m-%d",
+    "%d-%m-%Y %H:%M", "%d-%m-%Y", "%d.%m.%Y %H:%M", "%d.%m.%Y", "%d/%m/%Y %H:%M", "%d/%m/%Y",
+    "%d %B %Y", "%d %b %Y", "%B %d %Y", "%b %d %Y", "%d-%b-%Y", "%d-%B-%Y",
+]
+_DATE_PATTERN = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:[ T]\d{1,2}:\d{2})?"
+    r"|\d{1,2}[./-]\d{1,2}[./-]\d{4}(?:\s+\d{1,2}:\d{2})?"
+    r"|\d{1,2}(?:st|nd|rd|th)?[ -][A-Za-z]{3,9},?[ -]\d{4}"
+    r"|[A-Za-z]{3,9} \d{1,2}(?:st|nd|rd|th)?,? \d{4}"
+)
+_DEADLINE_KEYWORDS = re.compile(
+    r"(bid\s+end\s+date|bid\s+submission\s+end|last\s+date(?:\s+and\s+time)?\s+(?:of|for)\s+(?:bid\s+)?submission"
+    r"|submission\s+deadline|due\s+date\s+(?:of|for)\s+submission|closing\s+date|bid\s+due\s+date)",
+    re.IGNORECASE,
+)
+_VALUE_PATTERN = re.compile(
+    r"(?:rs\.?|inr|₹)?\s*([\d,]+(?:\.\d+)?)\s*(crores?|cr\.?|lakhs?|lacs?)?",
+    re.IGNORECASE,
+)
+_VALUE_KEYWORDS = re.compile(r"estimated\s+(?:bid\s+|contract\s+|tender\s+)?(?:value|cost)", re.IGNORECASE)
+_EMD_KEYWORDS = re.compile(r"(?:emd|earnest\s+money(?:\s+deposit)?)\s*(?:amount)?", re.IGNORECASE)
+EMD_TO_VALUE = 50.0  # EMD is typically ~2% of the estimated value
+
+def parse_deadline(text: Optional[str]) -> Optional[datetime]:
+    """Parses the first date in text ('2025-03-20', '20.03.2025 15:00', '20 March 2025', ...)."""
+    if not text:
+        return None
+    for match in _DATE_PATTERN.finditer(text):
+        candidate = re.sub(r"(\d)(st|nd|rd|th)", r"\1", match.group(0)).replace(",", "").replace("T", " ")
+        for fmt in _DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(candidate, fmt)
+            except ValueError:
+                continue
+            # Date-only deadlines are taken as end of day
+            return parsed if ":" in candidate else parsed.replace(hour=23, minute=59)
+    return None
+
+def parse_value(text: Optional[str]) -> Optional[float]:
+    """Parses an INR amount ('Rs. 1,25,00,000', '2.5 Crore', '45 Lakh') into rupees."""
+    if not text:
+        return None
+    for match in _VALUE_PATTERN.finditer(text):
+        digits = match.group(1).replace(",", "")
+        if not digits or not any(ch.isdigit() for ch in digits):
+            continue
+        amount = float(digits)
+        unit = (match.group(2) or "").lower()
+        if unit.startswith("cr"):
+            amount *= 1e7
+        elif unit.startswith(("lakh", "lac")):
+            amount *= 1e5
+        if amount >= 1000:
+            return amount
+    return None
+
+def prescan_tender(pdf_path: str) -> Dict[str, Any]:
+    """
+    Cheap pre-scan of the RFP text layer (no LLM call) for the submission deadline
+    and estimated value. The text layer is cached, so the run reuses the extraction.
+    """
+    try:
+        text = get_text_layer(pdf_path) or ""
+    except Exception as e:
+        print(f"[Scheduler] Pre-scan failed for {pdf_path}: {e}")
+        text = ""
+
+    deadline = None
+    for match in _DEADLINE_KEYWORDS.finditer(text):
+        deadline = parse_deadline(text[match.end():match.end() + 120])
+        if deadline:
+            break
+
+    value = None
+    for match in _VALUE_KEYWORDS.finditer(text):
+        value = parse_value(text[match.end():match.end() + 80])
+        if value:
+            break
+    if value is None:
+        for match in _EMD_KEYWORDS.finditer(text):
+            emd = parse_value(text[match.end():match.end() + 60])
+            if emd:
+                value = emd * EMD_TO_VALUE
+                break
+    return {"deadline": deadline, "value": value}
+
+
+class TenderJob:
+    """One queued tender and its scheduling state."""
+
+    def __init__(self, pdf_path: str, seq: int):
+        self.pdf_path = pdf_path
+        self.seq = seq
+        self.run_id = str(uuid.uuid4())[:8]
+        self.run_folder = os.path.join("data", "runs", self.run_id)
+        self.submitted_at = datetime.now()
+        self.deadline: Optional[datetime] = None
+        self.deadline_source = "default"
+        self.value: Optional[float] = None
+        self.status = "queued"          # queued | running | done | failed
+        self.started = False            # True once the graph has a checkpoint to resume from
+        self.run_seconds = 0.0
+        self.preempt = threading.Event()
+        self.preemptions = 0
+        self.error: Optional[str] = None
+
+    def effective_deadline(self) -> datetime:
+        return self.deadline or self.submitted_at + timedelta(days=DEFAULT_DEADLINE_DAYS)
+
+    def is_urgent(self, now: datetime) -> bool:
+        return self.effective_deadline() - now <= timedelta(hours=URGENT_HOURS)
+
+    def priority_key(self):
+        """Earliest deadline day first; within a day, higher value first; then arrival order."""
+        return (self.effective_deadline().date(), -(self.value or 0.0), self.seq)
+
+
+class TenderScheduler:
+    """Runs queued tenders through the graph in deadline order (see module docstring)."""
+
+    def __init__(self, concurrency: int = 2, reserved: int = 1, status_path: Optional[str] = None, graph: Any = None,
+                 run_budget: Optional[float] = None):
+        from langgraph.checkpoint.memory import MemorySaver
+        from src.graph import create_graph
+        from src.agents.deadlines import RUN_BUDGET_SECONDS
+
+        self.concurrency = max(1, concurrency)
+        self.reserved = min(max(0, reserved), self.concurrency - 1)
+        self.status_path = status_path
+        self.run_budget = RUN_BUDGET_SECONDS if run_budget is None else run_budget
+        self._checkpointer = MemorySaver()
+        self._app = graph or create_graph(checkpointer=self._checkpointer)
+        self._lock = threading.RLock()
+        self._jobs: List[TenderJob] = []
+        self._running: Dict[str, TenderJob] = {}
+        self._threads: List[threading.Thread] = []
+        self._expected_run_seconds = EXPECTED_RUN_SECONDS
+        self._idle = threading.Condition(self._lock)
+
+    # --- Queue ---
+    def submit(self, pdf_path: str) -> TenderJob:
+        """Pre-scans and queues a tender, then starts whatever the priorities allow."""
+        scan = prescan_tender(pdf_path)
+        with self._lock:
+            job = TenderJob(pdf_path, seq=len(self._jobs))
+            if scan["deadline"]:
+                job.deadline, job.deadline_source = scan["deadline"], "prescan"
+            job.value = scan["value"]
+            self._jobs.append(job)
+        print(f"[Scheduler] Queued {os.path.basename(pdf_path)} as {job.run_id} "
+              f"(deadline {job.effective_deadline():%Y-%m-%d %H:%M} via {job.deadline_source}, value {job.value or 'unknown'})")
+        self._dispatch()
+        return job
+
+    def _queued(self) -> List[TenderJob]:
+        return sorted((j for j in self._jobs if j.status == "queued"), key=TenderJob.priority_key)
+
+    def _dispatch(self):
+        """Starts queued jobs into free slots and preempts a run for an urgent tender that has none."""
+        with self._lock:
+            now = datetime.now()
+            for job in self._queued():
+                urgent = job.is_urgent(now)
+                non_urgent_running = sum(1 for j in self._running.values() if not j.is_urgent(now))
+                slots_free = len(self._running) < self.concurrency
+                if slots_free and (urgent or non_urgent_running < self.concurrency - self.reserved):
+                    self._start(job)
+                elif urgent and not slots_free:
+                    victims = [j for j in self._running.values() if not j.is_urgent(now) and not j.preempt.is_set()]
+                    if victims:
+                        victim = max(victims, key=TenderJob.priority_key)
+                        print(f"[Scheduler] Preempting {victim.run_id} for urgent tender {job.run_id}")
+                        victim.preempt.set()
+                    break
+            self._update_limiter(now)
+            self._write_status()
+
+    def _update_limiter(self, now: datetime):
+        from src.agents.ratelimit import get_adaptive_limiter
+        get_adaptive_limiter().set_urgent_runs(sum(1 for j in self._running.values() if j.is_urgent(now)))
+
+    def _start(self, job: TenderJob):
+        job.status = "running"
+        job.preempt.clear()
+        self._running[job.run_id] = job
+        thread = threading.Thread(target=self._run, args=(job,), name=f"tender-{job.run_id}", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    # --- Execution ---
+    def _update_from_summary(self, job: TenderJob, summary: Dict[str, Any]):
+        deadline = parse_deadline((summary.get("critical_dates") or {}).get("submission_deadline"))
+        value = parse_value(summary.get("estimated_contract_value"))
+        with self._lock:
+            if deadline:
+                job.deadline, job.deadline_source = deadline, "summary"
+            if value:
+                job.value = value
+        print(f"[Scheduler] {job.run_id}: deadline {job.effective_deadline():%Y-%m-%d %H:%M} from {job.deadline_source}")
+
+    def _run(self, job: TenderJob):
+        from src.state import make_initial_state
+        from src.agents.ratelimit import set_run_urgency
+        from src.agents.deadlines import set_run_budget
+        from src.graph import set_preempt_event
+        from src.agents.context_cache import set_cache_run, release_run_caches
+        from src.agents.pricing import close_bid_stream
+        from langgraph.types import Command
+        from src.utils.artifact_writer import flush_artifacts
+        from src.utils.metrics import flush_run_metrics
+        from src.utils.run_archive import mark_run_completed
+
+        config = {"configurable": {"thread_id": job.run_id}}
+        if job.started:
+            # Resume from the checkpoint; the nodes that were about to start when the run yielded run now
+            pending = self._app.get_state(config).interrupts
+            graph_input = Command(resume={i.id: True for i in pending}) if pending else None
+        else:
+            os.makedirs(job.run_folder, exist_ok=True)
+            graph_input = make_initial_state(job.run_id, job.run_folder, job.pdf_path)
+            job.started = True
+
+        set_preempt_event(job.preempt)
+        set_cache_run(job.run_id)
+        set_run_urgency(job.is_urgent(datetime.now()))
+        # A resumed run keeps what is left of its budget (at least a moment, so it can wrap up)
+        set_run_budget(max(self.run_budget - job.run_seconds, 1.0) if self.run_budget > 0 else None)
+        start = time.monotonic()
+        finished = False
+        try:
+            # A preempted run is interrupted at node boundaries: nodes already running finish
+            # and are checkpointed, then the stream ends and the run waits for its next slot
+            for _, update in self._app.stream(graph_input, config, stream_mode="updates", subgraphs=True):
+                summary = (update.get("extract_summary") or {}).get("summary")
+                if summary:
+                    self._update_from_summary(job, summary)
+                    set_run_urgency(job.is_urgent(datetime.now()))
+                    self._dispatch()
+            finished = not self._app.get_state(config).next
+        except Exception as e:
+            job.error = str(e)
+            print(f"[Scheduler] {job.run_id} failed: {e}")
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                job.run_seconds += elapsed
+                del self._running[job.run_id]
+                if finished:
+                    job.status = "done"
+                    self._expected_run_seconds += RUN_TIME_SMOOTHING * (job.run_seconds - self._expected_run_seconds)
+                elif job.error:
+                    job.status = "failed"
+                else:
+                    job.status = "queued"
+                    job.preemptions += 1
+                    print(f"[Scheduler] {job.run_id} yielded after {job.run_seconds:.1f}s; it will resume from its checkpoint")
+            if job.status in ("done", "failed"):
+                close_bid_stream(job.run_folder)  # A preempted run keeps its stream for when it resumes
+                flush_artifacts()
+                release_run_caches(job.run_id)
+                flush_run_metrics(job.run_folder)
+                if job.status == "done":
+                    mark_run_completed(job.run_folder)
+                self._checkpointer.delete_thread(job.run_id)
+            self._dispatch()
+            with self._idle:
+                self._idle.notify_all()
+
+    def wait(self):
+        """Blocks until every submitted tender is done or failed."""
+        with self._idle:
+            self._idle.wait_for(lambda: all(j.status in ("done", "failed") for j in self._jobs))
+
+    # --- Status ---
+    def status(self) -> List[Dict[str, Any]]:
+        """Queue snapshot: position (0 = running), deadline, value and expected completion."""
+        with self._lock:
+            now = datetime.now()
+            expected = self._expected_run_seconds
+            # Slot availability: running jobs finish after their remaining expected time
+            slot_free_at = sorted(
+                now + timedelta(seconds=max(expected - job.run_seconds, expected * 0.1))
+                for job in self._running.values()
+            )
+            slot_free_at += [now] * (self.concurrency - len(slot_free_at))
+
+            rows = []
+            for job in self._running.values():
+                rows.append((job, 0, now + timedelta(seconds=max(expected - job.run_seconds, expected * 0.1))))
+            for position, job in enumerate(self._queued(), start=1):
+                slot_free_at.sort()
+                start_at = slot_free_at.pop(0)
+                eta = start_at + timedelta(seconds=max(expected - job.run_seconds, expected * 0.1))
+                slot_free_at.append(eta)
+                rows.append((job, position, eta))
+            for job in self._jobs:
+                if job.status in ("done", "failed"):
+                    rows.append((job, None, None))
+
+            return [{
+                "run_id": job.run_id,
+                "pdf_path": job.pdf_path,
+                "status": job.status,
+                "queue_position": position,
+                "deadline": job.effective_deadline().isoformat(timespec="minutes"),
+                "deadline_source": job.deadline_source,
+                "estimated_value": job.value,
+                "urgent": job.is_urgent(now),
+                "expected_completion": eta.isoformat(timespec="seconds") if eta else None,
+                "at_risk": bool(eta and eta > job.effective_deadline()),
+                "preemptions": job.preemptions,
+                "run_seconds": round(job.run_seconds, 1),
+                "error": job.error,
+            } for job, position, eta in rows]
+
+    def _write_status(self):
+        if self.status_path:
+            write_json_file(self.status_path, {
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+                "expected_run_seconds": round(self._expected_run_seconds, 1),
+                "tenders": self.status(),
+            })
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run queued tenders in submission-deadline order")
+    parser.add_argument("pdf_paths", nargs="+", help="RFP PDFs, in arrival order")
+    parser.add_argument("--concurrency", type=int, default=2, help="Graph runs in flight at once")
+    parser.add_argument("--reserved", type=int, default=1, help="Run slots kept free for urgent tenders")
+    parser.add_argument("--status", default="data/runs/queue_status.json", help="Queue status JSON (positions and ETAs)")
+    parser.add_argument("--budget", type=float, default=None, help="Run time budget in seconds (default SWIFTBID_RUN_BUDGET; 0 = unlimited)")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    os.makedirs(os.path.dirname(args.status) or ".", exist_ok=True)
+    scheduler = TenderScheduler(args.concurrency, args.reserved, status_path=args.status, run_budget=args.budget)
+    for pdf_path in args.pdf_paths:
+        if not os.path.exists(pdf_path):
+            print(f"Error: File not found at {pdf_path}")
+            continue
+        scheduler.submit(pdf_path)
+    scheduler.wait()
+
+    print("\n--- Queue Complete ---")
+    for row in scheduler.status():
+        print(f"{row['run_id']}  {row['status']:6s}  deadline {row['deadline']} ({row['deadline_source']})  "
+              f"preemptions {row['preemptions']}  {row['pdf_path']}")
+    print(f"Queue status: {args.status}")
+
+if __name__ == "__main__":
+    main()
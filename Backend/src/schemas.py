@@ -99,6 +99,41 @@ class ExtractionOutput(BaseModel):
     commercial_logistics: CommercialLogistics
     compliance_eligibility: ComplianceEligibility
 
+# --- Corrigendum / Addendum Schema (deltas against an existing run) ---
+class BOMItemChange(BaseModel):
+    action: str = Field(..., description="'update', 'add' or 'remove'")
+    rfp_item_no: str = Field(..., description="Item number as per the original RFP (a new number for added items)")
+    description: Optional[str] = Field(None, description="New description, only if it changed (required for added items)")
+    quantity: Optional[float] = Field(None, description="New quantity, only if it changed")
+    unit: Optional[str] = Field(None, description="New unit of measure, only if it changed")
+    category: Optional[str] = Field(None, description="New category, only if it changed")
+    delivery_location: Optional[str] = Field(None, description="New delivery location, only if it changed")
+    requested_make: Optional[str] = Field(None, description="New requested make/brand, only if it changed")
+    requires_mii_declaration: Optional[bool] = Field(None, description="New MII declaration requirement, only if it changed")
+
+class SpecificationChange(BaseModel):
+    action: str = Field(..., description="'update', 'add' or 'remove'")
+    component: str = Field(..., description="Component as in the current specifications (e.g., 'Conductor')")
+    parameter: str = Field(..., description="Parameter as in the current specifications (e.g., 'Diameter')")
+    value: Optional[str] = Field(None, description="New required value (not needed for 'remove')")
+    tolerance: Optional[str] = Field(None, description="New tolerance, if stated")
+
+class TermChange(BaseModel):
+    field: str = Field(..., description="Dotted field name, e.g. 'delivery_period_weeks', 'liquidated_damages.rate_per_week', 'critical_dates.submission_deadline'")
+    new_value: str = Field(..., description="The amended value as stated in the corrigendum")
+
+class CorrigendumExtraction(BaseModel):
+    corrigendum_reference: Optional[str] = Field(None, description="Corrigendum/addendum number or reference")
+    bom_changes: List[BOMItemChange] = Field(default_factory=list, description="Changed, added or removed BOM items")
+    specification_changes: List[SpecificationChange] = Field(default_factory=list, description="Changed, added or removed technical specifications")
+    standards_added: List[str] = Field(default_factory=list, description="Applicable standards added")
+    standards_removed: List[str] = Field(default_factory=list, description="Applicable standards withdrawn")
+    tests_added: List[str] = Field(default_factory=list, description="Testing requirements added")
+    tests_removed: List[str] = Field(default_factory=list, description="Testing requirements withdrawn")
+    commercial_changes: List[TermChange] = Field(default_factory=list, description="Changed commercial and logistics terms")
+    summary_changes: List[TermChange] = Field(default_factory=list, description="Changed dates, estimated value or scope")
+    other_changes: List[str] = Field(default_factory=list, description="Amendments that fit none of the above (e.g., eligibility, documents)")
+
 # --- 6. Matcher Schema (Technical Agent) ---
 class SKUCandidate(BaseModel):
     sku_id: str = Field(..., description="The SKU ID from the catalog")
@@ -1,9 +1,14 @@
-from typing import TypedDict, Optional
+from typing import TypedDict, Optional, Dict, List, Any, Annotated
+
+def merge_dicts(left: Optional[dict], right: Optional[dict]) -> dict:
+    """Reducer that lets parallel nodes contribute keys to the same dict."""
+    return {**(left or {}), **(right or {})}
 
 class AgentState(TypedDict):
     rfp_file_path: str
     run_folder: str
     catalog_path: str
+    input_mode: Optional[str]  # 'auto', 'text' or 'pdf' (see src/utils/pdf_text.py)
     
     # Artifact Paths
     summary_path: Optional[str]
@@ -15,7 +20,45 @@ class AgentState(TypedDict):
     matched_sku_path: Optional[str]
     pricing_bid_path: Optional[str]
     
-    # Review Loop State
-    phase: str  # 'extraction', 'matching', 'pricing'
-    review_feedback: Optional[str]
-    retry_count: int
+    # In-memory Artifacts (persisted to the paths above by the background writer)
+    summary: Optional[Dict[str, Any]]
+    bom: Optional[List[Dict[str, Any]]]
+    constraints: Optional[Dict[str, Any]]
+    commercial: Optional[Dict[str, Any]]
+    matched_skus: Optional[List[Dict[str, Any]]]
+    pricing_strategy: Optional[Dict[str, Any]]
+    pricing_strategy_fingerprint: Optional[str]  # Hash of the strategy's inputs, to detect stale speculation
+    final_bid: Optional[List[Dict[str, Any]]]
+    fresh_match_items: Optional[List[str]]  # rfp_item_no of items the match memo must not serve (changed by a corrigendum)
+    
+    # Review Loop State (keyed by phase: 'technical', 'commercial', 'matching', 'pricing')
+    # Phases run concurrently, so each keeps its own feedback and retry counter.
+    review_feedback: Annotated[Dict[str, Optional[str]], merge_dicts]
+    retry_count: Annotated[Dict[str, int], merge_dicts]
+    review_history: Annotated[Dict[str, List[str]], merge_dicts]  # Fingerprints of the outputs each phase's review saw
+
+    # Provenance: node -> model that produced its output
+    models_used: Annotated[Dict[str, str], merge_dicts]
+
+
+def make_initial_state(run_id: str, run_folder: str, rfp_file_path: str, input_mode: Optional[str] = None, catalog_path: str = "data/catalog/products.csv") -> Dict[str, Any]:
+    """Initial graph state for a run (run_id is informational, not part of AgentState)."""
+    return {
+        "run_id": run_id,
+        "run_folder": run_folder,
+        "rfp_file_path": rfp_file_path,
+        "input_mode": input_mode,
+        "catalog_path": catalog_path,
+        # Other fields start as None/Empty, populated by agents
+        "summary_path": "",
+        "bom_path": "",
+        "constraints_path": "",
+        "commercial_path": "",
+        "compliance_path": "",
+        "matched_sku_path": None,
+        "pricing_bid_path": None,
+        # Review state, keyed by phase
+        "review_feedback": {},
+        "retry_count": {},
+        "review_history": {}
+    }
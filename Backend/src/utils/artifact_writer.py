@@ -0,0 +1,99 @@
+import os
+import queue
+import threading
+from typing import Any, List, Optional, Tuple
+from src.utils.file_utils import read_json_file, write_json_file, write_markdown_file
+
+class ArtifactWriter:
+    """
+    Background (write-behind) persistence for run artifacts.
+    Agents hand artifacts to the next node through AgentState and enqueue the
+    file write here, so no node waits on disk I/O or JSON serialization.
+    Enqueued data must not be mutated afterwards. Call flush() at the end of a run.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Optional[Tuple[str, str, Any]]]" = queue.Queue()
+        self._errors: List[str] = []
+        self._errors_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._worker, name="artifact-writer", daemon=True)
+        self._thread.start()
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                kind, path, data = item
+                if kind == "json":
+                    write_json_file(path, data)
+                elif kind == "append":
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write(data)
+                else:
+                    write_markdown_file(path, data)
+            except Exception as e:
+                with self._errors_lock:
+                    self._errors.append(f"{item[1]}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def write_json(self, path: str, data: Any):
+        self._queue.put(("json", path, data))
+
+    def write_text(self, path: str, content: str):
+        self._queue.put(("text", path, content))
+
+    def append_text(self, path: str, content: str):
+        self._queue.put(("append", path, content))
+
+    def flush(self) -> List[str]:
+        """Blocks until every queued artifact is on disk. Returns (and clears) write errors."""
+        self._queue.join()
+        with self._errors_lock:
+            errors, self._errors = self._errors, []
+        for error in errors:
+            print(f"[ArtifactWriter] Failed to persist {error}")
+        return errors
+
+
+# Global writer instance
+_writer: Optional[ArtifactWriter] = None
+_writer_lock = threading.Lock()
+
+def get_artifact_writer() -> ArtifactWriter:
+    """Get or create the global artifact writer."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ArtifactWriter()
+    return _writer
+
+def persist_json(path: str, data: Any):
+    """Queues a JSON artifact for background persistence."""
+    get_artifact_writer().write_json(path, data)
+
+def persist_text(path: str, content: str):
+    """Queues a text/markdown/CSV artifact for background persistence."""
+    get_artifact_writer().write_text(path, content)
+
+def persist_append(path: str, content: str):
+    """Queues text to append to an artifact (after any earlier queued write to it)."""
+    get_artifact_writer().append_text(path, content)
+
+def flush_artifacts() -> List[str]:
+    """Waits for all queued artifacts to be written."""
+    return get_artifact_writer().flush()
+
+def load_artifact(state: dict, key: str, path_key: Optional[str] = None, default: Any = None) -> Any:
+    """
+    Returns an artifact from state, falling back to its file on disk
+    (for runs resumed from an older state that only carried paths).
+    """
+    value = state.get(key)
+    if value is not None:
+        return value
+    path = state.get(path_key) if path_key else None
+    if path and os.path.exists(path):
+        return read_json_file(path)
+    return default
@@ -0,0 +1,216 @@
+import re
+import copy
+from typing import Any, Dict, List, Tuple
+from pydantic import BaseModel, Field, ValidationError
+from src.schemas import (
+    BOMItem,
+    CommercialLogistics,
+    CorrigendumExtraction,
+    ExecutiveSummary,
+    SpecificationItem,
+    TermChange
+)
+
+# BOM fields whose change invalidates an item's SKU match; the rest only change its price
+MATCH_FIELDS = ("description", "category", "requested_make", "requires_mii_declaration")
+PRICE_FIELDS = ("quantity", "unit", "delivery_location")
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+class AmendmentPlan(BaseModel):
+    """What a corrigendum changed and which phases have to run again."""
+    applied: List[str] = Field(default_factory=list, description="Changes applied to the stored artifacts")
+    rejected: List[str] = Field(default_factory=list, description="Changes that could not be applied, with the reason")
+    rematch_items: List[str] = Field(default_factory=list, description="BOM items whose SKU match must be redone")
+    removed_items: List[str] = Field(default_factory=list, description="BOM items withdrawn by the corrigendum")
+    rematch_all: bool = Field(False, description="Specifications or standards changed, so every item is re-matched")
+    reprice: bool = Field(False, description="Quantities, tests or terms changed, so the bid is re-priced")
+    restrategize: bool = Field(False, description="Inputs of the pricing strategy (summary, commercial terms) changed")
+
+    @property
+    def phases(self) -> List[str]:
+        phases = []
+        if self.rematch_items:
+            phases.append("matching")
+        if self.rematch_items or self.removed_items or self.reprice or self.restrategize:
+            phases.append("pricing")
+        return phases
+
+def _short_error(error: ValidationError) -> str:
+    first = error.errors()[0]
+    return f"{'.'.join(str(p) for p in first['loc'])}: {first['msg']}"
+
+def apply_bom_changes(bom: List[Dict[str, Any]], delta: CorrigendumExtraction, plan: AmendmentPlan) -> List[Dict[str, Any]]:
+    """Updates, adds and removes BOM items; match-relevant edits mark the item for re-matching."""
+    items = {str(item.get("rfp_item_no")): dict(item) for item in bom}
+    order = list(items)
+    for change in delta.bom_changes:
+        item_no = str(change.rfp_item_no).strip()
+        action = change.action.strip().lower()
+        if action == "remove":
+            if item_no not in items:
+                plan.rejected.append(f"BOM item {item_no}: cannot remove, not in the BOM")
+                continue
+            del items[item_no]
+            order.remove(item_no)
+            plan.removed_items.append(item_no)
+            plan.applied.append(f"BOM item {item_no} removed")
+            continue
+        if action not in ("update", "add"):
+            plan.rejected.append(f"BOM item {item_no}: unknown action '{change.action}'")
+            continue
+
+        fields = {k: getattr(change, k) for k in MATCH_FIELDS + PRICE_FIELDS if getattr(change, k) is not None}
+        current = items.get(item_no)
+        if current is None and action == "update":
+            plan.rejected.append(f"BOM item {item_no}: cannot update, not in the BOM")
+            continue
+        if current is not None:
+            fields = {k: v for k, v in fields.items() if current.get(k) != v}
+            if not fields:
+                continue
+        try:
+            updated = BOMItem(**{**(current or {}), **fields, "rfp_item_no": item_no}).model_dump()
+        except ValidationError as e:
+            plan.rejected.append(f"BOM item {item_no}: {_short_error(e)}")
+            continue
+
+        if current is None:
+            order.append(item_no)
+            plan.applied.append(f"BOM item {item_no} added ({updated['quantity']:g} {updated['unit']})")
+        else:
+            plan.applied.append(f"BOM item {item_no}: " + ", ".join(f"{k} {current.get(k)!r} -> {v!r}" for k, v in fields.items()))
+        items[item_no] = updated
+        if current is None or any(k in MATCH_FIELDS for k in fields):
+            plan.rematch_items.append(item_no)
+        else:
+            plan.reprice = True
+    return [items[item_no] for item_no in order]
+
+def _edit_list(values: List[str], added: List[str], removed: List[str], label: str, plan: AmendmentPlan) -> Tuple[List[str], bool]:
+    """Adds/removes strings (compared case-insensitively); returns (values, changed)."""
+    result, changed = list(values), False
+    for value in removed:
+        match = next((v for v in result if v.strip().lower() == value.strip().lower()), None)
+        if match is None:
+            plan.rejected.append(f"{label} '{value}': cannot remove, not listed")
+            continue
+        result.remove(match)
+        plan.applied.append(f"{label} removed: {match}")
+        changed = True
+    for value in added:
+        if any(v.strip().lower() == value.strip().lower() for v in result):
+            continue
+        result.append(value)
+        plan.applied.append(f"{label} added: {value}")
+        changed = True
+    return result, changed
+
+def apply_constraint_changes(constraints: Dict[str, Any], delta: CorrigendumExtraction, plan: AmendmentPlan) -> Dict[str, Any]:
+    """Specification and standard changes re-match every item; test changes only re-price."""
+    constraints = copy.deepcopy(constraints)
+    specs = constraints.get("specifications", [])
+    key = lambda component, parameter: (component.strip().lower(), parameter.strip().lower())
+    for change in delta.specification_changes:
+        label = f"Specification {change.component} / {change.parameter}"
+        position = next((i for i, s in enumerate(specs) if key(s["component"], s["parameter"]) == key(change.component, change.parameter)), None)
+        action = change.action.strip().lower()
+        if action == "remove":
+            if position is None:
+                plan.rejected.append(f"{label}: cannot remove, not specified")
+                continue
+            specs.pop(position)
+            plan.applied.append(f"{label} removed")
+        elif action in ("update", "add") and change.value:
+            previous = specs[position] if position is not None else {}
+            spec = SpecificationItem(
+                component=change.component, parameter=change.parameter, value=change.value,
+                tolerance=change.tolerance if change.tolerance is not None else previous.get("tolerance"),
+                page_ref=previous.get("page_ref"),
+            ).model_dump()
+            if position is None:
+                specs.append(spec)
+            else:
+                specs[position] = spec
+            plan.applied.append(f"{label}: {previous.get('value')!r} -> {change.value!r}")
+        else:
+            plan.rejected.append(f"{label}: unknown action '{change.action}' or no value")
+            continue
+        plan.rematch_all = True
+    constraints["specifications"] = specs
+
+    standards, changed = _edit_list(constraints.get("applicable_standards", []), delta.standards_added, delta.standards_removed, "Standard", plan)
+    constraints["applicable_standards"] = standards
+    plan.rematch_all = plan.rematch_all or changed
+
+    tests, changed = _edit_list(constraints.get("testing_requirements", []), delta.tests_added, delta.tests_removed, "Test", plan)
+    constraints["testing_requirements"] = tests
+    plan.reprice = plan.reprice or changed
+    return constraints
+
+def _set_path(data: Dict[str, Any], path: List[str], value: Any) -> Dict[str, Any]:
+    data = copy.deepcopy(data)
+    node = data
+    for part in path[:-1]:
+        if not isinstance(node.get(part), dict):
+            node[part] = {}
+        node = node[part]
+    node[path[-1]] = value
+    return data
+
+def apply_term_changes(data: Dict[str, Any], changes: List[TermChange], model: Any, label: str, plan: AmendmentPlan) -> Tuple[Dict[str, Any], bool]:
+    """
+    Applies dotted-field changes to a commercial/summary artifact. Each result is
+    validated against the model; a value like '12 weeks' is retried as its number.
+    Returns (data, changed).
+    """
+    changed = False
+    for change in changes:
+        path = [part.strip() for part in change.field.split(".") if part.strip()]
+        if not path or path[0] not in model.model_fields:
+            plan.rejected.append(f"{label} {change.field}: unknown field")
+            continue
+        candidates = [change.new_value]
+        number = _NUMBER.search(change.new_value)
+        if number and number.group(0) != change.new_value.strip():
+            candidates.append(number.group(0))
+        for value in candidates:
+            try:
+                updated = model(**_set_path(data, path, value)).model_dump()
+                break
+            except ValidationError as e:
+                error = _short_error(e)
+        else:
+            plan.rejected.append(f"{label} {change.field}: {error}")
+            continue
+        old = data
+        for part in path:
+            old = old.get(part) if isinstance(old, dict) else None
+        if updated == data:
+            continue
+        data, changed = updated, True
+        plan.applied.append(f"{label} {change.field}: {old!r} -> {change.new_value!r}")
+    return data, changed
+
+def apply_corrigendum(artifacts: Dict[str, Any], delta: CorrigendumExtraction) -> Tuple[Dict[str, Any], AmendmentPlan]:
+    """
+    Applies extracted deltas to a run's artifacts ({"bom", "constraints",
+    "commercial", "summary"}) without touching the originals, and works out the
+    phases to re-run: match-relevant item edits re-match those items, spec or
+    standard edits re-match everything, quantity/test edits only re-price, and
+    commercial or summary edits also refresh the pricing strategy.
+    """
+    plan = AmendmentPlan()
+    updated = dict(artifacts)
+    updated["bom"] = apply_bom_changes(artifacts.get("bom") or [], delta, plan)
+    updated["constraints"] = apply_constraint_changes(artifacts.get("constraints") or {}, delta, plan)
+
+    if delta.commercial_changes:
+        updated["commercial"], changed = apply_term_changes(artifacts.get("commercial") or {}, delta.commercial_changes, CommercialLogistics, "Commercial", plan)
+        plan.restrategize = plan.restrategize or changed
+    if delta.summary_changes:
+        updated["summary"], changed = apply_term_changes(artifacts.get("summary") or {}, delta.summary_changes, ExecutiveSummary, "Summary", plan)
+        plan.restrategize = plan.restrategize or changed
+
+    if plan.rematch_all:
+        plan.rematch_items = [str(item.get("rfp_item_no")) for item in updated["bom"]]
+    return updated, plan
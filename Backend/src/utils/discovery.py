@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+import xml.etree.ElementTree as ET
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+from pydantic import BaseModel, Field
+
+DISCOVERY_DB_PATH = os.environ.get("SWIFTBID_DISCOVERY_DB", "data/cache/discovery.db")
+HOST_MIN_INTERVAL = float(os.environ.get("SWIFTBID_DISCOVERY_HOST_INTERVAL", "1.0"))   # Seconds between requests to one host
+HOST_MAX_IN_FLIGHT = int(os.environ.get("SWIFTBID_DISCOVERY_HOST_IN_FLIGHT", "2"))
+
+_PDF_LINK = re.compile(r'<a\s[^>]*href="([^"]+\.pdf)"[^>]*>(.*?)</a>', re.IGNORECASE | re.DOTALL)
+_TAGS = re.compile(r"<[^>]+>")
+
+class SourceConfig(BaseModel):
+    name: str = Field(..., description="Unique source name, e.g. 'cppp-telecom'")
+    url: str = Field(..., description="Listing URL")
+    format: str = Field("json", description="Listing format: json, rss or html")
+    cursor_param: Optional[str] = Field(None, description="Query parameter that asks the source for tenders after a cursor")
+    max_pages: int = Field(5, description="Listing pages followed per poll")
+    enabled: bool = True
+
+def load_sources(path: str) -> List[SourceConfig]:
+    """Reads a JSON list of sources (or {"sources": [...]})."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("sources", [])
+    return [SourceConfig(**entry) for entry in data]
+
+def _iso(value: Optional[str]) -> Optional[str]:
+    """RSS pubDate / ISO date -> ISO string (comparable as text), or None."""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).isoformat()
+    except (TypeError, ValueError):
+        return value.strip()
+
+def parse_listing(fmt: str, body: str, base_url: str) -> Tuple[List[Dict[str, Any]], Optional[str], Optional[str]]:
+    """
+    Parses a listing page into tenders [{"id", "title", "pdf_url", "published"}].
+    Returns (tenders, next_page_url, cursor_from_source).
+    """
+    if fmt == "json":
+        data = json.loads(body)
+        tenders = [{
+            "id": str(t.get("id") or t.get("pdf_url")),
+            "title": t.get("title", ""),
+            "pdf_url": urljoin(base_url, t["pdf_url"]),
+            "published": _iso(t.get("published")),
+        } for t in data.get("tenders", []) if t.get("pdf_url")]
+        next_url = urljoin(base_url, data["next"]) if data.get("next") else None
+        return tenders, next_url, data.get("cursor")
+    if fmt == "rss":
+        root = ET.fromstring(body)
+        tenders = []
+        for item in root.iter("item"):
+            enclosure = item.find("enclosure")
+            link = enclosure.get("url") if enclosure is not None else item.findtext("link")
+            if not link:
+                continue
+            tenders.append({
+                "id": item.findtext("guid") or link,
+                "title": (item.findtext("title") or "").strip(),
+                "pdf_url": urljoin(base_url, link),
+                "published": _iso(item.findtext("pubDate")),
+            })
+        return tenders, None, None
+    if fmt == "html":
+        tenders = []
+        for href, text in _PDF_LINK.findall(body):
+            url = urljoin(base_url, href)
+            tenders.append({"id": url, "title": " ".join(_TAGS.sub(" ", text).split()), "pdf_url": url, "published": None})
+        return tenders, None, None
+    raise ValueError(f"Unknown listing format: {fmt}")
+
+
+class HostRateLimiter:
+    """
+    Per-host politeness for asyncio crawls: at most max_in_flight requests per
+    host and at least min_interval seconds between request starts. A 429/503
+    Retry-After pushes the host's next slot back.
+    """
+
+    def __init__(self, min_interval: float = HOST_MIN_INTERVAL, max_in_flight: int = HOST_MAX_IN_FLIGHT):
+        self.min_interval = min_interval
+        self.max_in_flight = max_in_flight
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+
+    def _host(self, host: str) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        state = self._hosts.get(host)
+        if state is None or state["loop"] is not loop:
+            # asyncio primitives belong to one event loop; the next slot time carries over between polls
+            state = self._hosts[host] = {
+                "loop": loop,
+                "lock": asyncio.Lock(),
+                "slots": asyncio.Semaphore(self.max_in_flight),
+                "next_at": state["next_at"] if state else 0.0,
+            }
+        return state
+
+    async def acquire(self, host: str):
+        state = self._host(host)
+        await state["slots"].acquire()
+        async with state["lock"]:
+            wait = state["next_at"] - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            state["next_at"] = time.monotonic() + self.min_interval
+
+    def release(self, host: str):
+        self._host(host)["slots"].release()
+
+    def back_off(self, host: str, seconds: float):
+        state = self._host(host)
+        state["next_at"] = max(state["next_at"], time.monotonic() + seconds)
+
+
+class DiscoveryState:
+    """
+    Thread-safe SQLite state of the crawler: HTTP validators per listing URL
+    (ETag / Last-Modified), an incremental cursor per source and the set of
+    tenders already seen.
+    """
+
+    def __init__(self, db_path: str = DISCOVERY_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS validators (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE IF NOT EXISTS cursors (
+                source TEXT PRIMARY KEY,
+                cursor TEXT NOT NULL,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE IF NOT EXISTS seen (
+                tender_key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                title TEXT,
+                pdf_url TEXT NOT NULL,
+                path TEXT,
+                first_seen TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        )
+        self._conn.commit()
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Conditional-request headers for a URL fetched before."""
+        with self._lock:
+            row = self._conn.execute("SELECT etag, last_modified FROM validators WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def store_validators(self, url: str, etag: Optional[str], last_modified: Optional[str]):
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO validators (url, etag, last_modified) VALUES (?, ?, ?)",
+                (url, etag, last_modified),
+            )
+            self._conn.commit()
+
+    def cursor(self, source: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT cursor FROM cursors WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else None
+
+    def store_cursor(self, source: str, cursor: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO cursors (source, cursor) VALUES (?, ?)", (source, cursor))
+            self._conn.commit()
+
+    def unseen(self, keys: List[str]) -> List[str]:
+        if not keys:
+            return []
+        placeholders = ",".join("?" for _ in keys)
+        with self._lock:
+            seen = {r[0] for r in self._conn.execute(f"SELECT tender_key FROM seen WHERE tender_key IN ({placeholders})", keys)}
+        return [key for key in keys if key not in seen]
+
+    def mark_seen(self, key: str, source: str, title: str, pdf_url: str, path: Optional[str]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO seen (tender_key, source, title, pdf_url, path) VALUES (?, ?, ?, ?, ?)",
+                (key, source, title, pdf_url, path),
+            )
+            self._conn.commit()
@@ -0,0 +1,342 @@
+import os
+import json
+import math
+import time
+import random
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from src.utils.file_utils import read_json_file
+
+LatencyFn = Callable[[random.Random], float]
+STREAM_CHUNK_CHARS = 400    # Characters per streamed chunk
+FIRST_CHUNK_SHARE = 0.2     # Share of a streamed reply's latency spent before the first chunk
+
+def parse_latency(spec: str) -> LatencyFn:
+    """
+    Parses a latency distribution in seconds:
+    'fixed:2', 'uniform:1,4', 'normal:3,0.5' (mean, sd) or 'lognormal:3,0.6' (median, sigma).
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v.strip()]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+def synthesize(schema: Dict[str, Any], rng: random.Random, array_items: int = 3, defs: Optional[Dict[str, Any]] = None, name: str = "value", index: int = 1) -> Any:
+    """
+    Builds a valid instance of a JSON schema (as sent in responseJsonSchema).
+    Strings are '<property>-<index>', so list items of different responses line up
+    (e.g. BOM rfp_item_no and match rfp_item_no).
+    """
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return synthesize(defs[schema["$ref"].rsplit("/", 1)[-1]], rng, array_items, defs, name, index)
+    if "anyOf" in schema:
+        options = [s for s in schema["anyOf"] if s.get("type") != "null"] or schema["anyOf"]
+        return synthesize(options[0], rng, array_items, defs, name, index)
+    if "enum" in schema:
+        return schema["enum"][0]
+
+    kind = schema.get("type", "object")
+    if kind == "object":
+        return {
+            prop: synthesize(sub, rng, array_items, defs, prop, index)
+            for prop, sub in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [synthesize(schema.get("items", {}), rng, array_items, defs, name, i) for i in range(1, array_items + 1)]
+    if kind == "string":
+        return f"{name}-{index}"
+    if kind == "integer":
+        return rng.randint(1, 100)
+    if kind == "number":
+        return round(rng.uniform(1, 100), 2)
+    if kind == "boolean":
+        return True
+    return None
+
+
+class FakeGeminiServer:
+    """
+    Local HTTP stand-in for the Gemini generateContent endpoint, for load tests.
+    Point ChatGoogleGenerativeAI at base_url (SWIFTBID_GEMINI_BASE_URL).
+
+    - latency: default distribution plus per-schema overrides (keyed by schema title)
+    - rate_limit_prob / key_rate_limit_prob: random 429s, globally or per API key
+    - quota: (requests, window_seconds) per key; excess requests get a 429 with
+      the seconds left in the window as retryDelay, like the real per-minute quotas
+    - fixtures: schema title -> response object; other schemas are synthesized
+    - time_scale: multiplies every injected latency
+    - streaming: streamGenerateContent replies arrive as server-sent events in
+      STREAM_CHUNK_CHARS pieces, the first after FIRST_CHUNK_SHARE of the latency
+    - malformed_prob: share of structured replies cut off mid-JSON, as when the
+      output token limit is hit
+    - context caching: cachedContents.create and delete are supported; calls that reference a
+      cache report cachedContentTokenCount and get latency cut in proportion to
+      the cached share of the prompt (scaled by cached_latency_factor)
+    """
+
+    def __init__(
+        self,
+        latency: str = "lognormal:3,0.5",
+        latency_by_schema: Optional[Dict[str, str]] = None,
+        rate_limit_prob: float = 0.0,
+        key_rate_limit_prob: Optional[Dict[str, float]] = None,
+        quota: Optional[Tuple[int, float]] = None,
+        key_quota: Optional[Dict[str, Tuple[int, float]]] = None,
+        rate_limit_retry_seconds: float = 2.0,
+        fixtures: Optional[Dict[str, Any]] = None,
+        array_items: int = 3,
+        time_scale: float = 1.0,
+        malformed_prob: float = 0.0,
+        cached_latency_factor: float = 0.25,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self._latency = parse_latency(latency)
+        self._latency_by_schema = {title: parse_latency(spec) for title, spec in (latency_by_schema or {}).items()}
+        self.rate_limit_prob = rate_limit_prob
+        self.key_rate_limit_prob = key_rate_limit_prob or {}
+        self.quota = quota
+        self.key_quota = key_quota or {}
+        self.rate_limit_retry_seconds = rate_limit_retry_seconds
+        self.fixtures = fixtures or {}
+        self.array_items = array_items
+        self.time_scale = time_scale
+        self.malformed_prob = malformed_prob
+        self.cached_latency_factor = cached_latency_factor
+        self._caches: Dict[str, Dict[str, Any]] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._windows: Dict[str, Deque[float]] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._latencies: List[float] = []
+        self._started_at = time.monotonic()
+
+        server = self
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("content-length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                status, payload = server.handle(self.path, self.headers.get("x-goog-api-key", ""), body)
+                if status == 200 and "chunks" in payload:
+                    self._write_stream(payload)
+                    return
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_DELETE(self):
+                status, payload = server.delete_cache(self.path.split("?")[0])
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _write_stream(self, payload):
+                """Server-sent events, one generateContent response per chunk, paced like token output."""
+                self.send_response(200)
+                self.send_header("content-type", "text/event-stream")
+                self.send_header("connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                for index, chunk in enumerate(payload["chunks"]):
+                    if index:
+                        time.sleep(payload["chunk_delay"])
+                    self.wfile.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode("utf-8"))
+                    self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGeminiServer":
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-gemini", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _key_stats(self, key: str) -> Dict[str, Any]:
+        return self._stats.setdefault(key, {
+            "requests": 0, "ok": 0, "rate_limited": 0, "busy_seconds": 0.0, "in_flight": 0, "peak_in_flight": 0,
+            "input_tokens": 0, "cached_tokens": 0, "caches_created": 0, "caches_deleted": 0, "cache_write_tokens": 0, "malformed": 0,
+        })
+
+    def _throttle(self, key: str, now: float) -> Optional[float]:
+        """Returns a retry delay if this request is rejected with a 429, else None."""
+        quota = self.key_quota.get(key, self.quota)
+        if quota:
+            limit, window = quota
+            stamps = self._windows.setdefault(key, deque())
+            while stamps and now - stamps[0] >= window:
+                stamps.popleft()
+            if len(stamps) >= limit:
+                return window - (now - stamps[0])
+            stamps.append(now)
+        if self._rng.random() < self.key_rate_limit_prob.get(key, self.rate_limit_prob):
+            return self.rate_limit_retry_seconds
+        return None
+
+    def handle(self, path: str, api_key: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        if path.split("?")[0].endswith("/cachedContents"):
+            return self._create_cache(api_key, body)
+        stream = ":streamGenerateContent" in path
+        if ":generateContent" not in path and not stream:
+            return 404, {"error": {"code": 404, "message": f"Unsupported path {path}", "status": "NOT_FOUND"}}
+
+        schema = (body.get("generationConfig") or {}).get("responseJsonSchema") or {}
+        title = schema.get("title", "")
+        prompt_tokens = len(json.dumps(body)) // 4
+        cached_tokens = 0
+        if body.get("cachedContent"):
+            if body.get("systemInstruction"):
+                return 400, {"error": {"code": 400, "status": "INVALID_ARGUMENT", "message":
+                    "CachedContent can not be used with GenerateContent request setting system_instruction, tools or tool_config."}}
+            with self._lock:
+                cache = self._caches.get(body["cachedContent"])
+            if cache is None or cache["api_key"] != api_key or cache["expires"] < time.time():
+                return 404, {"error": {"code": 404, "status": "NOT_FOUND", "message": "CachedContent not found (or permission denied)"}}
+            cached_tokens = cache["tokens"]
+
+        with self._lock:
+            stats = self._key_stats(api_key)
+            stats["requests"] += 1
+            retry_delay = self._throttle(api_key, time.monotonic())
+            if retry_delay is not None:
+                stats["rate_limited"] += 1
+            latency = self._latency_by_schema.get(title, self._latency)(self._rng) * self.time_scale
+            # Cached prefix tokens are not re-processed, which shortens time to first token
+            latency *= 1.0 - (1.0 - self.cached_latency_factor) * cached_tokens / (cached_tokens + prompt_tokens or 1)
+            if retry_delay is None:
+                stats["in_flight"] += 1
+                stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+
+        if retry_delay is not None:
+            return 429, {"error": {
+                "code": 429,
+                "message": f"Resource has been exhausted (e.g. check quota). Please retry in {retry_delay:.1f}s.",
+                "status": "RESOURCE_EXHAUSTED",
+                "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": f"{math.ceil(max(retry_delay, 0.0))}s"}],
+            }}
+
+        try:
+            time.sleep(latency * FIRST_CHUNK_SHARE if stream else latency)
+            if title in self.fixtures:
+                response = self.fixtures[title]
+            elif schema:
+                with self._lock:
+                    response = synthesize(schema, self._rng, self.array_items)
+            else:
+                response = "Synthetic response."
+            text = response if isinstance(response, str) else json.dumps(response)
+            with self._lock:
+                malformed = schema and self._rng.random() < self.malformed_prob
+                if malformed:
+                    stats["malformed"] += 1
+            if malformed:
+                text = text[: len(text) * 2 // 3]
+        finally:
+            with self._lock:
+                stats["in_flight"] -= 1
+                stats["busy_seconds"] += latency
+                stats["ok"] += 1
+                stats["input_tokens"] += prompt_tokens + cached_tokens
+                stats["cached_tokens"] += cached_tokens
+                self._latencies.append(latency)
+
+        usage = {
+            "promptTokenCount": prompt_tokens + cached_tokens,
+            "cachedContentTokenCount": cached_tokens,
+            "candidatesTokenCount": len(text) // 4,
+            "totalTokenCount": prompt_tokens + cached_tokens + len(text) // 4,
+        }
+        if stream:
+            pieces = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)] or [""]
+            chunks = [{
+                "candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}, **({"finishReason": "STOP"} if i == len(pieces) - 1 else {})}],
+                **({"usageMetadata": usage} if i == len(pieces) - 1 else {}),
+                "modelVersion": "fake-gemini",
+            } for i, piece in enumerate(pieces)]
+            return 200, {"chunks": chunks, "chunk_delay": latency * (1.0 - FIRST_CHUNK_SHARE) / len(pieces)}
+        return 200, {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+            "usageMetadata": usage,
+            "modelVersion": "fake-gemini",
+        }
+
+    def _create_cache(self, api_key: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Stand-in for cachedContents.create: remembers the prefix size until the TTL runs out."""
+        tokens = len(json.dumps([body.get("contents"), body.get("systemInstruction")])) // 4
+        ttl = float(str(body.get("ttl", "3600s")).rstrip("s"))
+        with self._lock:
+            name = f"cachedContents/fake-{len(self._caches) + 1}"
+            self._caches[name] = {"api_key": api_key, "tokens": tokens, "expires": time.time() + ttl}
+            stats = self._key_stats(api_key)
+            stats["caches_created"] += 1
+            stats["cache_write_tokens"] += tokens
+        expire_time = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + ttl))
+        return 200, {
+            "name": name,
+            "model": body.get("model"),
+            "displayName": body.get("displayName", ""),
+            "expireTime": expire_time,
+            "usageMetadata": {"totalTokenCount": tokens},
+        }
+
+    def delete_cache(self, path: str) -> Tuple[int, Dict[str, Any]]:
+        """Stand-in for cachedContents.delete."""
+        name = path[path.find("cachedContents/"):]
+        with self._lock:
+            cache = self._caches.pop(name, None)
+            if cache is None:
+                return 404, {"error": {"code": 404, "message": f"{name} not found", "status": "NOT_FOUND"}}
+            self._key_stats(cache["api_key"])["caches_deleted"] += 1
+        return 200, {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-key counters and served latencies (successful requests only)."""
+        with self._lock:
+            return {
+                "elapsed_seconds": time.monotonic() - self._started_at,
+                "keys": {key: dict(values) for key, values in self._stats.items()},
+                "latencies": list(self._latencies),
+            }
+
+
+def load_fixtures(directory: Optional[str]) -> Dict[str, Any]:
+    """Loads <SchemaTitle>.json files from a directory as canned responses."""
+    fixtures = {}
+    if directory and os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                fixtures[name[:-5]] = read_json_file(os.path.join(directory, name))
+    return fixtures
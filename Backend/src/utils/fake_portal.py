@@ -0,0 +1,245 @@
+import time
+import json
+import random
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+from xml.sax.saxutils import escape
+from src.utils.fake_gemini import parse_latency
+
+LISTING_FORMATS = ("json", "rss", "html")
+
+def tender_pdf(lines: List[str]) -> bytes:
+    """A minimal one-page PDF with a text layer (enough for the pre-scan and the text extractor)."""
+    def literal(text: str) -> str:
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    stream = "BT /F1 11 Tf 50 800 Td " + " 0 -16 Td ".join(f"({literal(line)}) Tj" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return out
+
+
+class FakePortalServer:
+    """
+    Local stand-in for tender portals, for testing the discovery crawler.
+    Sources are spread over several "hosts" (one HTTP server per port) and
+    cycle through JSON (paged, with a `since` cursor), RSS and HTML listings.
+
+    - Listings carry ETag and Last-Modified and answer conditional requests with 304.
+    - publish() adds tenders to a source, so incremental polls can be checked.
+    - latency: per-request delay distribution (fake_gemini syntax), times time_scale.
+    - stats() reports per-host requests, 304s, PDF downloads, peak in-flight
+      requests and the smallest gap between request starts.
+    """
+
+    def __init__(
+        self,
+        sources: int = 50,
+        hosts: int = 5,
+        tenders_per_source: int = 3,
+        page_size: int = 10,
+        latency: str = "fixed:0.05",
+        time_scale: float = 1.0,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+    ):
+        self.page_size = page_size
+        self.time_scale = time_scale
+        self._latency = parse_latency(latency)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._clock = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self._sources: List[Dict[str, Any]] = []
+        self._stats: Dict[int, Dict[str, Any]] = {}
+
+        server = self
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, headers, body = server.handle(self.server.host_index, self.path, self.headers)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("content-length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._servers = []
+        for index in range(hosts):
+            httpd = ThreadingHTTPServer((host, 0), Handler)
+            httpd.daemon_threads = True
+            httpd.host_index = index
+            self._servers.append(httpd)
+        for index in range(sources):
+            self._sources.append({
+                "name": f"portal-{index:03d}",
+                "format": LISTING_FORMATS[index % len(LISTING_FORMATS)],
+                "host": index % hosts,
+                "tenders": [],
+                "updated": self._clock,
+            })
+            self.publish(index, tenders_per_source)
+
+    def base_url(self, host_index: int) -> str:
+        host, port = self._servers[host_index].server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakePortalServer":
+        for httpd in self._servers:
+            threading.Thread(target=httpd.serve_forever, name="fake-portal", daemon=True).start()
+        return self
+
+    def stop(self):
+        for httpd in self._servers:
+            httpd.shutdown()
+            httpd.server_close()
+
+    def source_configs(self) -> List[Dict[str, Any]]:
+        """Source entries for the crawler (see SourceConfig)."""
+        return [{
+            "name": source["name"],
+            "url": f"{self.base_url(source['host'])}/sources/{index}/listing",
+            "format": source["format"],
+            "cursor_param": "since" if source["format"] == "json" else None,
+        } for index, source in enumerate(self._sources)]
+
+    def publish(self, source_index: int, count: int = 1):
+        """Adds new tenders to a source (its listing changes)."""
+        with self._lock:
+            source = self._sources[source_index]
+            for _ in range(count):
+                self._clock += timedelta(minutes=1)
+                number = len(source["tenders"]) + 1
+                deadline = (self._clock + timedelta(days=self._rng.randint(3, 40))).strftime("%d-%m-%Y")
+                source["tenders"].append({
+                    "id": f"{source['name']}-T{number:04d}",
+                    "title": f"Supply of {self._rng.choice([10, 20, 50, 100])} Pair PIJF Armoured Cable ({source['name']} #{number})",
+                    "published": self._clock.isoformat(),
+                    "deadline": deadline,
+                    "value_lakhs": self._rng.randint(5, 500),
+                })
+            source["updated"] = self._clock
+
+    def _host_stats(self, host_index: int) -> Dict[str, Any]:
+        return self._stats.setdefault(host_index, {
+            "requests": 0, "not_modified": 0, "pdf_downloads": 0, "bytes": 0,
+            "in_flight": 0, "peak_in_flight": 0, "last_start": None, "min_gap": None,
+        })
+
+    def handle(self, host_index: int, path: str, headers: Any) -> Tuple[int, Dict[str, str], bytes]:
+        now = time.monotonic()
+        with self._lock:
+            stats = self._host_stats(host_index)
+            stats["requests"] += 1
+            if stats["last_start"] is not None:
+                gap = now - stats["last_start"]
+                stats["min_gap"] = gap if stats["min_gap"] is None else min(stats["min_gap"], gap)
+            stats["last_start"] = now
+            stats["in_flight"] += 1
+            stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+            delay = self._latency(self._rng) * self.time_scale
+        try:
+            time.sleep(delay)
+            status, out_headers, body = self._respond(path, headers)
+        finally:
+            with self._lock:
+                stats["in_flight"] -= 1
+                stats["bytes"] += len(body) if status == 200 else 0
+                stats["not_modified"] += status == 304
+                stats["pdf_downloads"] += status == 200 and path.endswith(".pdf")
+        return status, out_headers, body
+
+    def _respond(self, path: str, headers: Any) -> Tuple[int, Dict[str, str], bytes]:
+        parts = urlsplit(path)
+        segments = parts.path.strip("/").split("/")
+        if len(segments) < 3 or segments[0] != "sources" or not segments[1].isdigit() or int(segments[1]) >= len(self._sources):
+            return 404, {"content-type": "text/plain"}, b"not found"
+        with self._lock:
+            source = self._sources[int(segments[1])]
+            tenders = list(source["tenders"])
+            updated = source["updated"]
+        if segments[2] == "tenders" and len(segments) == 4:
+            tender = next((t for t in tenders if f"{t['id']}.pdf" == segments[3]), None)
+            if tender is None:
+                return 404, {"content-type": "text/plain"}, b"not found"
+            body = tender_pdf([
+                tender["title"],
+                f"Tender ID: {tender['id']}",
+                f"Bid Submission End Date: {tender['deadline']}",
+                f"Estimated Value: Rs {tender['value_lakhs']} Lakhs",
+                # Enough body text that pdf_text does not treat the page as scanned
+                "Scope of Work: supply, testing and delivery of jelly filled telecom cable",
+                "conforming to the relevant standard, with type test reports and warranty.",
+            ])
+            return 200, {"content-type": "application/pdf"}, body
+
+        query = parse_qs(parts.query)
+        body, content_type = self._listing(int(segments[1]), source, tenders, query)
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        last_modified = format_datetime(updated, usegmt=True)
+        out_headers = {"content-type": content_type, "etag": etag, "last-modified": last_modified}
+        if headers.get("if-none-match") == etag:
+            return 304, out_headers, b""
+        since = headers.get("if-modified-since")
+        if since and not headers.get("if-none-match"):
+            try:
+                if updated.replace(microsecond=0) <= parsedate_to_datetime(since):
+                    return 304, out_headers, b""
+            except (TypeError, ValueError):
+                pass
+        return 200, out_headers, body
+
+    def _listing(self, index: int, source: Dict[str, Any], tenders: List[Dict[str, Any]], query: Dict[str, List[str]]) -> Tuple[bytes, str]:
+        pdf_path = lambda t: f"/sources/{index}/tenders/{t['id']}.pdf"
+        if source["format"] == "json":
+            since = (query.get("since") or [""])[0]
+            page = int((query.get("page") or ["1"])[0])
+            newer = [t for t in tenders if t["published"] > since]
+            chunk = newer[(page - 1) * self.page_size:page * self.page_size]
+            more = page * self.page_size < len(newer)
+            data = {
+                "tenders": [{"id": t["id"], "title": t["title"], "pdf_url": pdf_path(t), "published": t["published"]} for t in chunk],
+                "next": f"/sources/{index}/listing?since={since}&page={page + 1}" if more else None,
+                "cursor": chunk[-1]["published"] if chunk else (since or None),
+            }
+            return json.dumps(data).encode("utf-8"), "application/json"
+        latest = list(reversed(tenders))[:self.page_size]
+        if source["format"] == "rss":
+            items = "".join(
+                f"<item><title>{escape(t['title'])}</title><guid>{t['id']}</guid>"
+                f"<pubDate>{format_datetime(datetime.fromisoformat(t['published']), usegmt=True)}</pubDate>"
+                f"<enclosure url=\"{pdf_path(t)}\" type=\"application/pdf\"/></item>"
+                for t in latest
+            )
+            return f"<?xml version=\"1.0\"?><rss version=\"2.0\"><channel><title>{source['name']}</title>{items}</channel></rss>".encode("utf-8"), "application/rss+xml"
+        links = "".join(f"<li><a href=\"{pdf_path(t)}\">{escape(t['title'])}</a></li>" for t in latest)
+        return f"<html><body><h1>{source['name']}</h1><ul>{links}</ul></body></html>".encode("utf-8"), "text/html"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                host: {k: v for k, v in values.items() if k not in ("in_flight", "last_start")}
+                for host, values in self._stats.items()
+            }
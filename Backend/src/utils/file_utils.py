@@ -1,5 +1,6 @@
 import json
 import os
+from functools import lru_cache
 from typing import Any
 
 def read_text_file(path: str) -> str:
@@ -9,6 +10,17 @@ def read_text_file(path: str) -> str:
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
 
+@lru_cache(maxsize=8)
+def _read_binary_cached(path: str, mtime: float) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def read_binary_file(path: str) -> bytes:
+    """Reads a binary file (e.g. the RFP PDF), cached in memory until the file changes."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File not found: {path}")
+    return _read_binary_cached(path, os.path.getmtime(path))
+
 def read_json_file(path: str) -> Any:
     """Reads content from a JSON file."""
     if not os.path.exists(path):
@@ -17,6 +29,13 @@ def read_json_file(path: str) -> Any:
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
+def write_text_file(path: str, content: str):
+    """Writes a text file atomically (temp file + rename), so readers never see a partial file."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
 def write_markdown_file(path: str, content: str):
     """Writes content to a markdown file."""
     with open(path, "w", encoding="utf-8") as f:
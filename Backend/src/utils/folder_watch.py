@@ -0,0 +1,245 @@
+import os
+import sys
+import time
+import struct
+import select
+import sqlite3
+import hashlib
+import threading
+import ctypes
+import ctypes.util
+from typing import Any, Dict, List, Optional
+
+INGEST_DB_PATH = os.environ.get("SWIFTBID_INGEST_DB", "data/cache/ingest_ledger.db")
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT = struct.Struct("iIII")   # wd, mask, cookie, len
+
+# Partial downloads and editor/office temp files are never ingested
+TEMP_PREFIXES = (".", "~$")
+TEMP_SUFFIXES = (".part", ".tmp", ".crdownload", ".download")
+
+def is_candidate(path: str) -> bool:
+    name = os.path.basename(path)
+    lowered = name.lower()
+    return lowered.endswith(".pdf") and not name.startswith(TEMP_PREFIXES) and not lowered.endswith(TEMP_SUFFIXES)
+
+def list_candidates(directories: List[str]) -> List[str]:
+    paths = []
+    for directory in directories:
+        for entry in os.scandir(directory):
+            if entry.is_file() and is_candidate(entry.path):
+                paths.append(entry.path)
+    return paths
+
+def content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def looks_complete_pdf(path: str) -> bool:
+    """A fully written PDF ends with an %%EOF marker (possibly followed by a little whitespace)."""
+    with open(path, "rb") as f:
+        f.seek(max(0, os.path.getsize(path) - 1024))
+        return b"%%EOF" in f.read()
+
+
+class InotifyWatcher:
+    """
+    Linux inotify via ctypes. poll() returns the candidate files touched since the
+    last call, or every candidate after a queue overflow.
+    """
+
+    def __init__(self, directories: List[str]):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self.directories = directories
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, str] = {}
+        for directory in directories:
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                os.close(self._fd)
+                raise OSError(errno, f"inotify_add_watch failed for {directory}")
+            self._dirs[wd] = directory
+
+    def poll(self, timeout: float) -> List[str]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        paths, offset = [], 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                return list_candidates(self.directories)
+            if mask & IN_ISDIR or wd not in self._dirs or not name:
+                continue
+            path = os.path.join(self._dirs[wd], os.fsdecode(name))
+            if is_candidate(path) and path not in paths:
+                paths.append(path)
+        return paths
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Fallback for platforms or filesystems without inotify (e.g. network shares): lists the directories."""
+
+    def __init__(self, directories: List[str], interval: float = 5.0):
+        self.directories = directories
+        self.interval = interval
+        self._last = 0.0
+
+    def poll(self, timeout: float) -> List[str]:
+        wait = self._last + self.interval - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(0.0, wait))
+        self._last = time.monotonic()
+        return list_candidates(self.directories)
+
+    def close(self):
+        pass
+
+def make_watcher(directories: List[str], polling: bool = False, interval: float = 5.0):
+    """inotify where available, directory polling otherwise."""
+    if not polling:
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError) as e:
+            print(f"[Watch] inotify unavailable ({e}); polling every {interval:g}s")
+    return PollingWatcher(directories, interval)
+
+
+class SettleTracker:
+    """
+    Debounces files that are still being written: a file is ready once its size
+    and mtime have not changed for settle_seconds and it ends like a complete PDF
+    (or has been stable for incomplete_grace seconds without one).
+    """
+
+    def __init__(self, settle_seconds: float = 2.0, incomplete_grace: float = 60.0):
+        self.settle_seconds = settle_seconds
+        self.incomplete_grace = incomplete_grace
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._handled: Dict[str, tuple] = {}   # path -> (size, mtime) when it was last handed out
+
+    def __len__(self):
+        return len(self._pending)
+
+    def note(self, path: str, now: float):
+        """Registers a file that may have changed; files unchanged since they were handed out are ignored."""
+        if path in self._pending:
+            return
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+        if self._handled.get(path) == (stat.st_size, stat.st_mtime_ns):
+            return
+        self._pending[path] = {"landed_at": now, "signature": None, "stable_since": now}
+
+    def ready(self, now: float) -> List[Dict[str, Any]]:
+        """Returns [{"path", "landed_at"}] for files that finished writing; drops files that vanished."""
+        done = []
+        for path, entry in list(self._pending.items()):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                del self._pending[path]
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if signature != entry["signature"]:
+                entry["signature"], entry["stable_since"] = signature, now
+                continue
+            stable_for = now - entry["stable_since"]
+            if stat.st_size == 0 or stable_for < self.settle_seconds:
+                continue
+            if stable_for < self.incomplete_grace and not looks_complete_pdf(path):
+                continue
+            del self._pending[path]
+            self._handled[path] = signature
+            done.append({"path": path, "landed_at": entry["landed_at"]})
+        return done
+
+
+class IngestLedger:
+    """
+    Thread-safe SQLite record of ingested files by content hash, so a file
+    dropped twice (or under another name) is processed once and queued work
+    survives a daemon restart.
+    """
+
+    def __init__(self, db_path: str = INGEST_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ingested (
+                content_hash TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                run_id TEXT,
+                status TEXT NOT NULL,
+                queued_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        self._conn.commit()
+
+    def lookup(self, digest: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT path, run_id, status FROM ingested WHERE content_hash = ?", (digest,)).fetchone()
+        return {"path": row[0], "run_id": row[1], "status": row[2]} if row else None
+
+    def record(self, digest: str, path: str, run_id: str):
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO ingested (content_hash, path, run_id, status) VALUES (?, ?, ?, 'queued')
+                ON CONFLICT(content_hash) DO UPDATE SET
+                    path = excluded.path, run_id = excluded.run_id, status = 'queued', updated_at = CURRENT_TIMESTAMP
+                """,
+                (digest, path, run_id),
+            )
+            self._conn.commit()
+
+    def set_status(self, run_id: str, status: str):
+        with self._lock:
+            self._conn.execute("UPDATE ingested SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE run_id = ?", (status, run_id))
+            self._conn.commit()
+
+    def set_status_by_hash(self, digest: str, status: str):
+        with self._lock:
+            self._conn.execute("UPDATE ingested SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE content_hash = ?", (status, digest))
+            self._conn.commit()
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Files queued by an earlier daemon that never finished (re-queued on start)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT content_hash, path FROM ingested WHERE status = 'queued'").fetchall()
+        return [{"content_hash": digest, "path": path} for digest, path in rows]
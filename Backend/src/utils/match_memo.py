@@ -0,0 +1,123 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+# Default location of the persistent BOM item -> SKU memo
+MEMO_DB_PATH = os.environ.get("SWIFTBID_MATCH_MEMO_DB", "data/cache/sku_match_memo.db")
+
+def normalize_description(description: str) -> str:
+    """
+    Normalizes a BOM description so trivially different spellings share a key.
+    e.g. '50 Pair, 0.5 mm PIJF  Armoured' -> '50 pair 0.5mm pijf armoured'
+    """
+    text = (description or "").lower()
+    text = re.sub(r"(\d)\s+(mm|sqmm|km|m)\b", r"\1\2", text)
+    text = re.sub(r"[^a-z0-9.\s/-]", " ", text)
+    return " ".join(text.split())
+
+def constraints_fingerprint(constraints: Any) -> str:
+    """Hashes the parts of TechnicalConstraints that influence SKU selection."""
+    if not isinstance(constraints, dict):
+        constraints = {}
+    standards = sorted(str(s).strip().lower() for s in constraints.get("applicable_standards", []))
+    specs = sorted(
+        "|".join(str(spec.get(k) or "").strip().lower() for k in ("component", "parameter", "value", "tolerance"))
+        for spec in constraints.get("specifications", [])
+        if isinstance(spec, dict)
+    )
+    payload = json.dumps({"standards": standards, "specs": specs}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def catalog_version(catalog_path: str) -> str:
+    """Returns a content hash of the product catalog file."""
+    with open(catalog_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+def memo_key(description: str, constraints_fp: str, catalog_ver: str, requested_make: Optional[str] = None, requires_mii: bool = False) -> str:
+    """
+    Builds the memo key for a single BOM item. The requested make and the MII
+    declaration decide which SKUs are acceptable, so they are part of the key.
+    """
+    make = " ".join((requested_make or "").lower().split())
+    raw = f"{normalize_description(description)}::{make}::{'mii' if requires_mii else ''}::{constraints_fp}::{catalog_ver}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MatchMemo:
+    """
+    Thread-safe SQLite store of approved SKURecommendations, shared across runs.
+    """
+
+    def __init__(self, db_path: str = MEMO_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sku_matches (
+                memo_key TEXT PRIMARY KEY,
+                normalized_description TEXT NOT NULL,
+                catalog_version TEXT NOT NULL,
+                recommendation TEXT NOT NULL,
+                approvals INTEGER NOT NULL DEFAULT 1,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        self._conn.commit()
+
+    def lookup(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Returns {memo_key: recommendation_dict} for the keys that are present."""
+        if not keys:
+            return {}
+        placeholders = ",".join("?" for _ in keys)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT memo_key, recommendation FROM sku_matches WHERE memo_key IN ({placeholders})",
+                keys,
+            ).fetchall()
+        return {key: json.loads(rec) for key, rec in rows}
+
+    def store(self, entries: List[Dict[str, Any]]):
+        """
+        Upserts approved recommendations.
+        Each entry: {"memo_key", "normalized_description", "catalog_version", "recommendation"}
+        """
+        if not entries:
+            return
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO sku_matches (memo_key, normalized_description, catalog_version, recommendation)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(memo_key) DO UPDATE SET
+                    recommendation = excluded.recommendation,
+                    approvals = approvals + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                [
+                    (e["memo_key"], e["normalized_description"], e["catalog_version"], json.dumps(e["recommendation"]))
+                    for e in entries
+                ],
+            )
+            self._conn.commit()
+
+
+# Global memo instance
+_memo: Optional[MatchMemo] = None
+_memo_lock = threading.Lock()
+
+def get_match_memo() -> MatchMemo:
+    """Get or create the global match memo."""
+    global _memo
+    if _memo is None:
+        with _memo_lock:
+            if _memo is None:
+                _memo = MatchMemo()
+    return _memo
@@ -0,0 +1,48 @@
+import os
+import threading
+from typing import Any, Dict, Optional
+from src.utils.file_utils import write_json_file
+
+# Bucket used for counters that are not tied to a specific run folder
+GLOBAL_SCOPE = "_process"
+
+_lock = threading.Lock()
+_metrics: Dict[str, Dict[str, Any]] = {}
+
+def incr_metric(name: str, amount: float = 1, run_folder: Optional[str] = None):
+    """Increments a counter for the given run (or the process-wide bucket)."""
+    scope = run_folder or GLOBAL_SCOPE
+    with _lock:
+        bucket = _metrics.setdefault(scope, {})
+        bucket[name] = bucket.get(name, 0) + amount
+
+def set_metric(name: str, value: Any, run_folder: Optional[str] = None):
+    """Sets a metric to an absolute value."""
+    scope = run_folder or GLOBAL_SCOPE
+    with _lock:
+        _metrics.setdefault(scope, {})[name] = value
+
+def append_metric(name: str, value: Any, run_folder: Optional[str] = None):
+    """Appends a value to a list metric."""
+    scope = run_folder or GLOBAL_SCOPE
+    with _lock:
+        _metrics.setdefault(scope, {}).setdefault(name, []).append(value)
+
+def get_metrics(run_folder: Optional[str] = None) -> Dict[str, Any]:
+    """Returns a snapshot of the metrics for a run (or the process-wide bucket)."""
+    scope = run_folder or GLOBAL_SCOPE
+    with _lock:
+        return dict(_metrics.get(scope, {}))
+
+def hit_rate(hits: float, lookups: float) -> float:
+    """Returns hits/lookups as a rounded ratio, 0.0 when nothing was looked up."""
+    return round(hits / lookups, 4) if lookups else 0.0
+
+def flush_run_metrics(run_folder: str) -> str:
+    """Writes the run metrics (plus process-wide counters) to run_metrics.json."""
+    path = os.path.join(run_folder, "run_metrics.json")
+    write_json_file(path, {
+        "run": get_metrics(run_folder),
+        "process": get_metrics(GLOBAL_SCOPE),
+    })
+    return path
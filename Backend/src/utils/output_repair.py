@@ -0,0 +1,310 @@
+import re
+import json
+import types
+from typing import Any, Dict, List, Optional, Tuple, Type, Union, get_args, get_origin
+from annotated_types import MaxLen
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+_LITERAL = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null")
+_NUMBER = re.compile(r"-?\d[\d,]*(?:\.\d+)?")
+_PAGE = re.compile(r"\d+")
+
+def strip_code_fence(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```[a-zA-Z]*\s*", "", text)
+        text = re.sub(r"\s*```$", "", text)
+    return text
+
+def close_truncated_json(text: str) -> str:
+    """
+    Completes JSON cut off mid-stream (output token limit): everything after the
+    last complete value is dropped and the open objects/arrays are closed.
+    A half-written string or key is dropped rather than guessed.
+    """
+    stack: List[List[str]] = []   # [container, expecting]; expecting is key/colon/value/comma
+    cut, closers = 0, ""
+    i, n = 0, len(text)
+
+    def mark(end: int):
+        nonlocal cut, closers
+        cut = end
+        closers = "".join("}" if c == "{" else "]" for c, _ in reversed(stack))
+
+    def value_done(end: int):
+        if stack:
+            stack[-1][1] = "comma"
+        mark(end)
+
+    while i < n:
+        ch = text[i]
+        if ch.isspace():
+            i += 1
+        elif ch == '"':
+            j = i + 1
+            while j < n and text[j] != '"':
+                j += 2 if text[j] == "\\" else 1
+            if j >= n:
+                break  # Unterminated string
+            if stack and stack[-1][0] == "{" and stack[-1][1] == "key":
+                stack[-1][1] = "colon"
+            else:
+                value_done(j + 1)
+            i = j + 1
+        elif ch == ":":
+            if stack:
+                stack[-1][1] = "value"
+            i += 1
+        elif ch == ",":
+            if stack:
+                stack[-1][1] = "key" if stack[-1][0] == "{" else "value"
+            i += 1
+        elif ch in "{[":
+            stack.append([ch, "key" if ch == "{" else "value"])
+            mark(i + 1)
+            i += 1
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            value_done(i + 1)
+            i += 1
+            if not stack:
+                return text[:i]
+        else:
+            match = _LITERAL.match(text, i)
+            if not match or match.end() >= n:
+                break  # Garbage, or a literal that may itself be cut off
+            value_done(match.end())
+            i = match.end()
+
+    if not stack and cut == 0:
+        return text
+    return text[:cut].rstrip().rstrip(",") + closers
+
+def parse_json_lenient(text: str) -> Tuple[Optional[Any], bool]:
+    """Parses model output as JSON, completing it if truncated. Returns (data, was_truncated)."""
+    text = strip_code_fence(text or "")
+    if not text:
+        return None, False
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(close_truncated_json(text)), True
+    except json.JSONDecodeError:
+        return None, False
+
+def coerce_number(value: Any) -> Any:
+    """'1,200 km' -> 1200.0; values without a number are returned unchanged."""
+    if isinstance(value, str):
+        match = _NUMBER.search(value)
+        if match:
+            return float(match.group(0).replace(",", ""))
+    return value
+
+def coerce_page_ref(value: Any) -> Any:
+    """'Page 12', 'p. 12', '12.0' -> 12; ranges keep their first page."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        match = _PAGE.search(value)
+        if match:
+            return int(match.group(0))
+    return value
+
+# Field-specific coercions; other numeric fields go through coerce_number
+FIELD_COERCERS = {"page_ref": coerce_page_ref, "quantity": coerce_number}
+
+
+class DroppedElement:
+    """A list element removed by repair, kept so a follow-up call can fix it."""
+
+    def __init__(self, path: str, container: list, index: int, value: Any, model: Type[BaseModel], errors: List[str]):
+        self.path = path
+        self.container = container   # The repaired list it belongs in
+        self.index = index           # Position in the original list
+        self.value = value
+        self.model = model
+        self.errors = errors
+
+
+class RepairResult:
+    def __init__(self):
+        self.data: Any = None
+        self.instance: Optional[BaseModel] = None
+        self.issues: List[str] = []         # Local fixes applied
+        self.errors: List[str] = []         # Validation errors left after local fixes
+        self.dropped: List[DroppedElement] = []
+
+
+def format_errors(error: ValidationError, prefix: str = "") -> List[str]:
+    return [f"{prefix}{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors()]
+
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+def _coerce(value: Any, annotation: Any, name: str, path: str, result: RepairResult, metadata: Tuple = ()) -> Any:
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        if value is None:
+            return None
+        if name in FIELD_COERCERS:
+            return FIELD_COERCERS[name](value)
+        if len(args) == 1:
+            value = _coerce(value, args[0], name, path, result, metadata)
+            if _is_model(args[0]) and isinstance(value, dict):
+                try:
+                    args[0].model_validate(value)
+                except ValidationError:
+                    result.issues.append(f"cleared incomplete optional {path}")
+                    return None
+        return value
+
+    if origin in (list, List) and isinstance(value, list):
+        item_type = (get_args(annotation) or (Any,))[0]
+        repaired = []
+        for index, element in enumerate(value):
+            element = _coerce(element, item_type, name, f"{path}[{index}]", result)
+            try:
+                TypeAdapter(item_type).validate_python(element)
+            except ValidationError as e:
+                errors = format_errors(e, f"{path}[{index}].")
+                if _is_model(item_type):
+                    result.dropped.append(DroppedElement(path, repaired, index, element, item_type, errors))
+                result.issues.append(f"dropped invalid element {path}[{index}]")
+                continue
+            repaired.append(element)
+        max_len = next((m.max_length for m in metadata if isinstance(m, MaxLen)), None)
+        if max_len is not None and len(repaired) > max_len:
+            result.issues.append(f"trimmed {path} to {max_len} element(s)")
+            del repaired[max_len:]
+        return repaired
+
+    if _is_model(annotation) and isinstance(value, dict):
+        repaired = dict(value)
+        for field_name, field in annotation.model_fields.items():
+            if field_name not in repaired:
+                continue
+            if repaired[field_name] is None and not field.is_required() and type(None) not in get_args(field.annotation):
+                del repaired[field_name]  # null where the schema has a non-null default
+                result.issues.append(f"defaulted null {path}.{field_name}")
+                continue
+            repaired[field_name] = _coerce(repaired[field_name], field.annotation, field_name, f"{path}.{field_name}", result, tuple(field.metadata))
+        return repaired
+
+    if annotation in (float, int) and isinstance(value, str):
+        coerced = FIELD_COERCERS.get(name, coerce_number)(value)
+        if coerced is not value:
+            result.issues.append(f"coerced {path} {value!r} -> {coerced}")
+            return int(coerced) if annotation is int and float(coerced).is_integer() else coerced
+    return value
+
+def repair_locally(schema: Type[BaseModel], text: str) -> RepairResult:
+    """
+    Repairs a structured-output reply that failed validation, without calling the LLM:
+    completes truncated JSON, coerces numeric fields ('1,200 km', 'Page 12'), resets
+    nulls to schema defaults, clears incomplete optional sub-objects and drops list
+    elements that still do not validate.
+    """
+    result = RepairResult()
+    data, truncated = parse_json_lenient(text)
+    if data is None:
+        result.errors = ["response is not valid JSON"]
+        return result
+    if truncated:
+        result.issues.append("completed truncated JSON")
+    result.data = _coerce(data, schema, "", schema.__name__, result)
+    try:
+        result.instance = schema.model_validate(result.data)
+    except ValidationError as e:
+        result.errors = format_errors(e)
+    return result
+
+def restore_elements(result: RepairResult, fixed: Dict[int, Any], schema: Type[BaseModel]) -> Optional[BaseModel]:
+    """
+    Puts corrected versions of dropped elements (keyed by position in result.dropped)
+    back into their lists at their original positions and re-validates.
+    """
+    for position in sorted(fixed, key=lambda p: result.dropped[p].index):
+        element = result.dropped[position]
+        element.container.insert(min(element.index, len(element.container)), fixed[position])
+    try:
+        result.instance = schema.model_validate(result.data)
+        result.errors = []
+    except ValidationError as e:
+        result.errors = format_errors(e)
+    return result.instance
+
+
+class PartialListParser:
+    """
+    Incremental parser for a streamed structured reply whose `key` field is a list
+    of objects (e.g. SKUMatchOutput.recommendations). feed() takes the text
+    received so far and returns the list elements completed since the last call,
+    after the same local repair as full replies. The text is scanned once
+    overall, so long replies stay cheap to follow.
+    """
+
+    def __init__(self, schema: Type[BaseModel], key: str):
+        self.item_type = get_args(schema.model_fields[key].annotation)[0]
+        self._array_start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._reset()
+
+    def _reset(self):
+        self._pos: Optional[int] = None   # Scan position inside the array (None until it starts)
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._element_start = 0
+        self._done = False
+
+    def _element(self, text: str) -> Optional[Dict[str, Any]]:
+        try:
+            element = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        element = _coerce(element, self.item_type, "", self.item_type.__name__, RepairResult())
+        try:
+            return TypeAdapter(self.item_type).validate_python(element).model_dump()
+        except ValidationError:
+            return None  # Left to the repair of the full reply
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        if self._pos is not None and len(text) < self._pos:
+            self._reset()  # A new attempt started streaming
+        if self._pos is None:
+            match = self._array_start.search(text)
+            if not match:
+                return []
+            self._pos = match.end()
+        fresh = []
+        i, n = self._pos, len(text)
+        while i < n and not self._done:
+            ch = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0:
+                    self._element_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    self._done = True  # End of the list
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        element = self._element(text[self._element_start:i + 1])
+                        if element is not None:
+                            fresh.append(element)
+            i += 1
+        self._pos = i
+        return fresh
@@ -0,0 +1,113 @@
+import os
+import re
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+from src.utils.file_utils import read_binary_file, read_text_file, write_text_file
+from src.utils.metrics import set_metric
+
+# Input modes for sending the RFP to the LLM
+INPUT_MODE_AUTO = "auto"   # text layer when the PDF is born-digital, media upload otherwise
+INPUT_MODE_TEXT = "text"   # text layer only; a scanned PDF is an error
+INPUT_MODE_PDF = "pdf"     # always upload the raw PDF
+INPUT_MODES = [INPUT_MODE_AUTO, INPUT_MODE_TEXT, INPUT_MODE_PDF]
+
+DEFAULT_INPUT_MODE = os.environ.get("SWIFTBID_INPUT_MODE", INPUT_MODE_AUTO)
+PDF_TEXT_CACHE_DIR = os.environ.get("SWIFTBID_PDF_TEXT_CACHE", "data/cache/pdf_text")
+MIN_CHARS_PER_PAGE = 200        # Below this on average the document is treated as scanned
+SCANNED_MARKER = "__SCANNED__"
+
+_memory_cache: Dict[str, Optional[str]] = {}
+_cache_lock = threading.Lock()
+_extract_locks: Dict[str, threading.Lock] = {}  # content hash -> lock; parallel extractors of one document wait for a single extraction
+
+def document_hash(pdf_data: bytes) -> str:
+    return hashlib.sha256(pdf_data).hexdigest()
+
+def _extract_lock(digest: str) -> threading.Lock:
+    with _cache_lock:
+        return _extract_locks.setdefault(digest, threading.Lock())
+
+def _compact(text: str) -> str:
+    """Shrinks layout whitespace while keeping table columns visibly separated."""
+    lines = [re.sub(r" {2,}", "  ", line).rstrip() for line in text.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+def _extract(pdf_path: str) -> Optional[str]:
+    """Extracts the text layer with page markers, or None if the document looks scanned."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    pages = []
+    total_chars = 0
+    for number, page in enumerate(reader.pages, start=1):
+        # Layout mode keeps table rows on one line with their columns aligned
+        text = _compact(page.extract_text(extraction_mode="layout") or "")
+        total_chars += len(text)
+        pages.append(f"--- Page {number} ---\n{text}")
+
+    if not pages or total_chars / len(pages) < MIN_CHARS_PER_PAGE:
+        return None
+    return "\n\n".join(pages)
+
+def get_text_layer(pdf_path: str) -> Optional[str]:
+    """
+    Returns the document's text layer, extracted once per document and cached
+    by content hash (in memory and under PDF_TEXT_CACHE_DIR). None for scanned PDFs.
+    Different documents are extracted in parallel.
+    """
+    digest = document_hash(read_binary_file(pdf_path))
+    with _cache_lock:
+        if digest in _memory_cache:
+            return _memory_cache[digest]
+
+    with _extract_lock(digest):
+        with _cache_lock:
+            if digest in _memory_cache:
+                return _memory_cache[digest]
+
+        cache_path = os.path.join(PDF_TEXT_CACHE_DIR, f"{digest}.txt")
+        if os.path.exists(cache_path):
+            cached = read_text_file(cache_path)
+            text = None if cached == SCANNED_MARKER else cached
+        else:
+            try:
+                text = _extract(pdf_path)
+            except Exception as e:
+                print(f"[PDF Text] Text extraction failed, falling back to media upload: {e}")
+                text = None
+            else:
+                os.makedirs(PDF_TEXT_CACHE_DIR, exist_ok=True)
+                write_text_file(cache_path, text if text is not None else SCANNED_MARKER)
+
+        with _cache_lock:
+            _memory_cache[digest] = text
+            _extract_locks.pop(digest, None)  # Later callers find the text in _memory_cache
+    return text
+
+def build_document_parts(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Message content parts carrying the RFP: the cached text layer (with page
+    markers) or the raw PDF as media. The mode comes from state["input_mode"],
+    then SWIFTBID_INPUT_MODE. In auto mode scanned documents fall back to media;
+    in text mode they raise ValueError instead of being uploaded.
+    """
+    pdf_path = state["rfp_file_path"]
+    mode = state.get("input_mode") or DEFAULT_INPUT_MODE
+
+    text = get_text_layer(pdf_path) if mode != INPUT_MODE_PDF else None
+    if text is not None:
+        set_metric("input_mode", INPUT_MODE_TEXT, run_folder=state.get("run_folder"))
+        return [{
+            "type": "text",
+            "text": f"RFP DOCUMENT (text layer extracted from the PDF, page markers included):\n\n{text}",
+        }]
+
+    if mode == INPUT_MODE_TEXT:
+        raise ValueError(f"{os.path.basename(pdf_path)} has no usable text layer (scanned document?); use input mode auto or pdf")
+    set_metric("input_mode", INPUT_MODE_PDF, run_folder=state.get("run_folder"))
+    return [{
+        "type": "media",
+        "mime_type": "application/pdf",
+        "data": read_binary_file(pdf_path),
+    }]
@@ -0,0 +1,83 @@
+import os
+import csv
+from typing import Any, Dict, List, Tuple
+from src.utils.file_utils import read_text_file
+
+SERVICE_CATALOG_PATH = "data/catalog/service_pricing.csv"
+DEFAULT_TAX_RATE = 0.18
+
+def load_product_prices(catalog_path: str) -> Dict[str, float]:
+    """Reads SKU -> Base_Price_Per_Km from the product catalog."""
+    product_catalog = {}
+    reader = csv.DictReader(read_text_file(catalog_path).splitlines())
+    for row in reader:
+        product_catalog[row["SKU"]] = float(row["Base_Price_Per_Km"])
+    return product_catalog
+
+def load_service_prices(service_path: str = SERVICE_CATALOG_PATH) -> Dict[str, float]:
+    """Reads lowercased Test_Name -> Unit_Price_INR from the service catalog."""
+    service_catalog = {}
+    if os.path.exists(service_path):
+        reader = csv.DictReader(read_text_file(service_path).splitlines())
+        for row in reader:
+            service_catalog[row["Test_Name"].lower()] = float(row["Unit_Price_INR"])
+    else:
+        print("Warning: Service pricing catalog not found.")
+    return service_catalog
+
+def compute_service_cost(required_tests: List[str], service_catalog: Dict[str, float]) -> Tuple[float, List[str]]:
+    """
+    Prices the required tests by token overlap with the service catalog.
+    Returns (total_service_cost, matched_service_labels).
+    """
+    total_service_cost = 0.0
+    matched_services = []
+
+    # Simple keyword matching for tests
+    for req_test in required_tests:
+        req_test_lower = req_test.lower()
+        cost = 0.0
+        match_name = "Unknown"
+
+        # Find best match in service catalog
+        for svc_name, svc_cost in service_catalog.items():
+            # Token overlap matching
+            svc_tokens = set(svc_name.split())
+            req_tokens = set(req_test_lower.split())
+            if len(svc_tokens.intersection(req_tokens)) >= 2: # At least 2 words match
+                cost = svc_cost
+                match_name = svc_name
+                break
+
+        if cost > 0:
+            total_service_cost += cost
+            matched_services.append(f"{match_name} ({cost})")
+    return total_service_cost, matched_services
+
+def resolve_tax_rate(commercial: Dict[str, Any]) -> float:
+    """GST assumption: 18% unless the tender says prices are tax inclusive."""
+    if "inclusive" in (commercial.get("taxes_and_duties") or "").lower():
+        return 0.0
+    return DEFAULT_TAX_RATE
+
+def count_priced_items(matches: List[Dict[str, Any]]) -> int:
+    """Number of matches that share the amortized service cost."""
+    return len([m for m in matches if m.get("selected_sku", m.get("matched_sku")) != "NO_MATCH"])
+
+def price_line(base_price, qty, transport_percent, margin_percent, service_cost, tax_rate) -> Dict[str, Any]:
+    """
+    Core bid math for one line. Pure arithmetic, so it works on floats as well as
+    broadcast NumPy arrays (used by the what-if grid).
+    """
+    cost_plus_transport = base_price * (1 + transport_percent / 100.0)
+    unit_selling_price = cost_plus_transport * (1 + margin_percent / 100.0)
+    total_material_cost = unit_selling_price * qty
+    total_cost_ex_tax = total_material_cost + service_cost
+    tax_amount = total_cost_ex_tax * tax_rate
+    return {
+        "unit_selling_price": unit_selling_price,
+        "total_material_cost": total_material_cost,
+        "total_cost_ex_tax": total_cost_ex_tax,
+        "tax_amount": tax_amount,
+        "line_total": total_cost_ex_tax + tax_amount,
+    }
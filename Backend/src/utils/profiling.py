@@ -0,0 +1,195 @@
+import os
+import re
+import sys
+import time
+import threading
+import functools
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+from src.utils.file_utils import write_json_file, write_markdown_file
+
+PROFILE_INTERVAL_MS = float(os.environ.get("SWIFTBID_PROFILE_INTERVAL_MS", "5"))
+PROFILE_TRACE_FRAMES = int(os.environ.get("SWIFTBID_PROFILE_TRACE_FRAMES", "8"))
+PROFILE_TOP_N = 20
+PROFILE_DIR = "profile"
+
+# Leaf frames in these modules mean the thread is parked (locks, queues, network I/O), not burning CPU
+_IDLE_MODULES = (
+    "threading.py", "queue.py", "selectors.py", os.path.join("concurrent", "futures", "thread.py"),
+    "socket.py", "ssl.py", os.path.join("http", "client.py"),
+)
+# Leaf frames inside these HTTP/RPC client packages are blocking reads on the connection
+_IDLE_PACKAGES = tuple(os.sep + name + os.sep for name in ("httpx", "httpcore", "h11", "urllib3", "grpc"))
+
+def _is_idle(frame) -> bool:
+    path = frame.f_code.co_filename
+    return path.endswith(_IDLE_MODULES) or any(pkg in path for pkg in _IDLE_PACKAGES)
+
+class RunProfiler:
+    """
+    Per-node CPU and memory profiling for one run (enabled with main.py --profile).
+
+    A sampler thread reads every thread's stack each PROFILE_INTERVAL_MS and
+    attributes it to the graph node running on that thread, producing folded
+    stacks (flamegraph.pl / speedscope input). Threads not running a node
+    (artifact writer, review shard pools) are bucketed by thread name when busy.
+    Samples parked in locks, queues or network I/O count as a node's idle
+    samples, not as CPU stacks.
+    tracemalloc snapshots around each node give allocation hotspots; peak
+    memory is the highest traced total sampled while the node ran, so
+    concurrent nodes share their peaks.
+    """
+
+    def __init__(self, run_folder: str, interval_ms: float = PROFILE_INTERVAL_MS, top_n: int = PROFILE_TOP_N):
+        self.run_folder = run_folder
+        self.interval = interval_ms / 1000.0
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._active: Dict[int, Optional[str]] = {}  # thread id -> node name (None while the profiler itself works)
+        self._window_peak: Dict[int, int] = {}      # thread id -> peak traced bytes while the node runs
+        self._stacks: Dict[str, Counter] = {}
+        self._idle: Counter = Counter()             # node -> samples spent waiting
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._labels: Dict[Any, str] = {}
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started_tracing = False
+        self._filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+
+    def start(self):
+        """Starts tracemalloc and the sampler thread (idempotent)."""
+        with self._lock:
+            if self._sampler is not None:
+                return
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(PROFILE_TRACE_FRAMES)
+                self._started_tracing = True
+            self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+            self._sampler.start()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            path = code.co_filename
+            cwd = os.getcwd()
+            if path.startswith(cwd):
+                path = os.path.relpath(path, cwd)
+            else:
+                path = os.path.join(*path.split(os.sep)[-2:])
+            label = f"{code.co_name} ({path}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+            with self._lock:
+                for tid, frame in frames.items():
+                    if tid == own_id or frame is None:
+                        continue
+                    if tid in self._active and self._active[tid] is None:
+                        continue
+                    node = self._active.get(tid)
+                    if node is None:
+                        if _is_idle(frame) or tid == threading.main_thread().ident:
+                            continue
+                        node = "thread:" + re.sub(r"[-_]?\d+(_\d+)?$", "", names.get(tid, "unknown"))
+                    else:
+                        self._window_peak[tid] = max(self._window_peak.get(tid, 0), traced)
+                        if _is_idle(frame):
+                            self._idle[node] += 1
+                            continue
+
+                    stack = []
+                    while frame is not None:
+                        stack.append(self._label(frame.f_code))
+                        frame = frame.f_back
+                    self._stacks.setdefault(node, Counter())[";".join(reversed(stack))] += 1
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(self._filters)
+
+    def wrap(self, node: str, fn: Callable) -> Callable:
+        """Returns fn wrapped so each call is sampled and memory-traced under the node's name."""
+        @functools.wraps(fn)
+        def profiled(state):
+            self.start()
+            tid = threading.get_ident()
+            with self._lock:
+                self._active[tid] = None
+            before = self._snapshot()
+            baseline = tracemalloc.get_traced_memory()[0]
+            with self._lock:
+                self._active[tid] = node
+                self._window_peak[tid] = baseline
+            t0 = time.perf_counter()
+            try:
+                return fn(state)
+            finally:
+                wall = time.perf_counter() - t0
+                current = tracemalloc.get_traced_memory()[0]
+                with self._lock:
+                    self._active[tid] = None
+                    peak = max(self._window_peak.pop(tid, baseline), current) - baseline
+                diff = self._snapshot().compare_to(before, "lineno")
+                with self._lock:
+                    stats = self._stats.setdefault(node, {"calls": 0, "wall_seconds": 0.0, "peak_memory_bytes": 0, "allocations": {}})
+                    stats["calls"] += 1
+                    stats["wall_seconds"] += wall
+                    stats["peak_memory_bytes"] = max(stats["peak_memory_bytes"], peak)
+                    for entry in diff[: self.top_n * 2]:
+                        if entry.size_diff <= 0:
+                            continue
+                        where = f"{entry.traceback[0].filename}:{entry.traceback[0].lineno}"
+                        slot = stats["allocations"].setdefault(where, {"size_diff_bytes": 0, "count_diff": 0})
+                        slot["size_diff_bytes"] += entry.size_diff
+                        slot["count_diff"] += entry.count_diff
+                    del self._active[tid]
+        return profiled
+
+    def write(self) -> str:
+        """Stops sampling and writes folded stacks and profile_summary.json under <run>/profile/."""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        if self._started_tracing:
+            tracemalloc.stop()
+
+        out_dir = os.path.join(self.run_folder, PROFILE_DIR)
+        os.makedirs(out_dir, exist_ok=True)
+        summary = {"interval_ms": self.interval * 1000.0, "nodes": {}}
+        with self._lock:
+            for node in sorted(set(self._stacks) | set(self._stats)):
+                stacks = self._stacks.get(node, Counter())
+                stats = self._stats.get(node, {})
+                safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", node)
+                if stacks:
+                    folded = "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+                    write_markdown_file(os.path.join(out_dir, f"{safe_name}.folded"), folded + "\n")
+
+                allocations = sorted(stats.get("allocations", {}).items(), key=lambda kv: kv[1]["size_diff_bytes"], reverse=True)
+                leaves = Counter()
+                for stack, count in stacks.items():
+                    leaves[stack.rsplit(";", 1)[-1]] += count
+                summary["nodes"][node] = {
+                    "calls": stats.get("calls", 0),
+                    "wall_seconds": round(stats.get("wall_seconds", 0.0), 4),
+                    "samples": sum(stacks.values()),
+                    "idle_samples": self._idle.get(node, 0),
+                    "peak_memory_bytes": stats.get("peak_memory_bytes", 0),
+                    "cpu_hotspots": [{"frame": frame, "samples": count} for frame, count in leaves.most_common(self.top_n)],
+                    "allocation_hotspots": [{"location": where, **sizes} for where, sizes in allocations[: self.top_n]],
+                    "folded_stacks": f"{safe_name}.folded" if stacks else None,
+                }
+
+        path = os.path.join(out_dir, "profile_summary.json")
+        write_json_file(path, summary)
+        print(f"[Profiler] Wrote per-node profiles to {out_dir}")
+        return path
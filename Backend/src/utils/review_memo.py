@@ -0,0 +1,67 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+REVIEW_MEMO_SIZE = int(os.environ.get("SWIFTBID_REVIEW_MEMO_SIZE", "1024"))  # Verdicts kept per process
+
+def document_fingerprint(parts: List[Dict[str, Any]]) -> str:
+    """Hashes the RFP parts the reviewer sees (text layer or PDF bytes)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if part.get("type") == "text":
+            digest.update(part["text"].encode("utf-8"))
+        else:
+            digest.update(part["data"])
+    return digest.hexdigest()[:16]
+
+def artifact_fingerprint(phase: str, data: str) -> str:
+    """Hashes the data a phase's review looked at, to spot retries that changed nothing."""
+    return hashlib.sha256(f"{phase}::{data}".encode("utf-8")).hexdigest()[:16]
+
+def verdict_key(phase: str, criteria: str, data: str, document_fp: str, model: str) -> str:
+    """Builds the memo key for one review call (one shard)."""
+    raw = f"{phase}::{model}::{document_fp}::{criteria}::{data}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ReviewVerdictMemo:
+    """
+    Thread-safe in-process LRU of reviewer verdicts (ReviewOutput dicts).
+    The same data, criteria and document always get the same verdict, so a
+    shard that did not change between retries (or runs) is not re-reviewed.
+    """
+
+    def __init__(self, max_entries: int = REVIEW_MEMO_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            verdict = self._entries.get(key)
+            if verdict is not None:
+                self._entries.move_to_end(key)
+            return verdict
+
+    def put(self, key: str, verdict: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = verdict
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Global memo instance
+_review_memo: Optional[ReviewVerdictMemo] = None
+_review_memo_lock = threading.Lock()
+
+def get_review_memo() -> ReviewVerdictMemo:
+    """Get or create the global reviewer verdict memo."""
+    global _review_memo
+    if _review_memo is None:
+        with _review_memo_lock:
+            if _review_memo is None:
+                _review_memo = ReviewVerdictMemo()
+    return _review_memo
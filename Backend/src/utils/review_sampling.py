@@ -0,0 +1,80 @@
+import os
+import json
+import random
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+# Review budget (in estimated tokens of reviewed data, excluding the RFP itself)
+REVIEW_TOKEN_BUDGET = int(os.environ.get("SWIFTBID_REVIEW_TOKEN_BUDGET", "24000"))
+REVIEW_SHARD_TOKENS = int(os.environ.get("SWIFTBID_REVIEW_SHARD_TOKENS", "6000"))
+REVIEW_MAX_SHARDS = int(os.environ.get("SWIFTBID_REVIEW_MAX_SHARDS", "4"))
+POSITION_BUCKETS = 4  # BOM order follows the document, so position stands in for page range
+
+def estimate_tokens(obj: Any) -> int:
+    """Rough token estimate (~4 characters per token) of an object's JSON form."""
+    return len(json.dumps(obj, indent=2)) // 4 + 1
+
+def bom_stratum(item: Dict[str, Any], index: int, total: int) -> Hashable:
+    """Stratum of a BOM item: its category and which part of the document it comes from."""
+    category = (item.get("category") or "uncategorized").strip().lower()
+    return (category, index * POSITION_BUCKETS // max(total, 1))
+
+def stratified_sample(
+    items: List[Any],
+    stratum_of: Callable[[Any, int, int], Hashable],
+    token_budget: int = REVIEW_TOKEN_BUDGET,
+    is_priority: Optional[Callable[[Any], bool]] = None,
+) -> List[int]:
+    """
+    Picks item indices to review within token_budget.
+    Priority items are always selected, even past the budget (see extra_shards);
+    the rest of the budget is filled by visiting strata round-robin (random order
+    within a stratum, seeded for repeatability) so every category and document
+    region is represented. Returns indices in original order.
+    """
+    total = len(items)
+    if sum(estimate_tokens(item) for item in items) <= token_budget:
+        return list(range(total))
+
+    strata: Dict[Hashable, List[int]] = {}
+    for idx, item in enumerate(items):
+        strata.setdefault(stratum_of(item, idx, total), []).append(idx)
+    rng = random.Random(total)
+    for members in strata.values():
+        rng.shuffle(members)
+
+    priority = [idx for idx in range(total) if is_priority and is_priority(items[idx])]
+    priority_set = set(priority)
+    queues = [[idx for idx in members if idx not in priority_set] for members in strata.values()]
+    round_robin = []
+    while any(queues):
+        for queue in queues:
+            if queue:
+                round_robin.append(queue.pop())
+
+    selected = list(priority)
+    used = sum(estimate_tokens(items[idx]) for idx in priority)
+    for idx in round_robin:
+        cost = estimate_tokens(items[idx])
+        if used + cost > token_budget:
+            continue
+        selected.append(idx)
+        used += cost
+    return sorted(selected)
+
+def extra_shards(items: List[Any], token_budget: int = REVIEW_TOKEN_BUDGET, shard_tokens: int = REVIEW_SHARD_TOKENS) -> int:
+    """Shards needed beyond REVIEW_MAX_SHARDS for the tokens a selection spends past the budget."""
+    overflow = sum(estimate_tokens(item) for item in items) - token_budget
+    return -(-overflow // max(shard_tokens, 1)) if overflow > 0 else 0
+
+def shard_items(
+    items: List[Any],
+    shard_tokens: int = REVIEW_SHARD_TOKENS,
+    max_shards: int = REVIEW_MAX_SHARDS,
+) -> List[List[Any]]:
+    """Splits items into contiguous shards of roughly shard_tokens each (at most max_shards)."""
+    if not items:
+        return [[]]
+    total_tokens = sum(estimate_tokens(item) for item in items)
+    n_shards = max(1, min(max_shards, -(-total_tokens // max(shard_tokens, 1)), len(items)))
+    size = -(-len(items) // n_shards)
+    return [items[i:i + size] for i in range(0, len(items), size)]
@@ -0,0 +1,244 @@
+import os
+import re
+import csv
+from typing import Any, Dict, List, Optional, Tuple
+from src.utils.file_utils import read_text_file
+
+# Items whose rule confidence (0-100) is below this go to the LLM
+RULE_MATCH_THRESHOLD = float(os.environ.get("SWIFTBID_RULE_MATCH_THRESHOLD", "80"))
+
+# Attributes the rules compare; confidence is scaled by the share that a BOM item specifies
+RULE_ATTRIBUTES = ("pair_count", "conductor_dia_mm", "construction", "armouring", "standard")
+STOCK_RANK = {"in stock": 0, "low stock": 1}
+
+_PAIRS = re.compile(r"(\d+)\s*(?:pairs?|pr|cores?|c)\b", re.IGNORECASE)
+_DIAMETER = re.compile(r"(\d+(?:\.\d+)?)\s*mm\b", re.IGNORECASE)
+_UNARMOURED = re.compile(r"\bun-?armou?red\b", re.IGNORECASE)
+_ARMOURED = re.compile(r"\barmou?red\b", re.IGNORECASE)
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+_FAMILY = re.compile(r"^\s*([A-Za-z0-9-]+)\s+cable\b", re.IGNORECASE)
+
+# Tender specification components checked against catalog columns: (component keyword, catalog column)
+SPEC_MATERIAL_COLUMNS = (
+    ("conductor", "Conductor_Type"),
+    ("insulation", "Insulation"),
+    ("sheath", "Sheath"),
+    ("armour", "Armouring"),
+)
+# Material words -> the materials they name; polyethylene grades also count as polyethylene
+MATERIAL_TERMS = {
+    "copper": {"copper"}, "aluminium": {"aluminium"}, "aluminum": {"aluminium"}, "glass": {"glass"},
+    "steel": {"steel"}, "galvanized": {"galvanized"}, "galvanised": {"galvanized"}, "pvc": {"pvc"},
+    "pe": {"polyethylene"}, "polyethylene": {"polyethylene"}, "hdpe": {"hdpe", "polyethylene"},
+    "mdpe": {"mdpe", "polyethylene"}, "lldpe": {"lldpe", "polyethylene"}, "xlpe": {"xlpe", "polyethylene"},
+}
+
+def normalize_standard(standard: str) -> str:
+    """'TEC GR/CUG-01/03 Aug 2003' -> 'tecgrcug0103aug2003'."""
+    return re.sub(r"[^a-z0-9]", "", (standard or "").lower())
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def load_catalog_rows(catalog_path: str) -> List[Dict[str, str]]:
+    """Reads the product catalog as a list of rows."""
+    return list(csv.DictReader(read_text_file(catalog_path).splitlines()))
+
+def construction_terms(catalog: List[Dict[str, str]]) -> List[str]:
+    """Upper-case construction keywords used in catalog descriptions (e.g. PIJF, UTP, PVC)."""
+    terms = set()
+    for row in catalog:
+        terms.update(token for token in re.findall(r"\b[A-Z]{3,}\b", row.get("Description", "")))
+    return sorted(terms)
+
+def item_requirements(item: Dict[str, Any], terms: List[str]) -> Dict[str, Any]:
+    """Parses the rule attributes a BOM item states (attributes it does not state are left out)."""
+    text = " ".join(str(item.get(k) or "") for k in ("description", "category"))
+    required: Dict[str, Any] = {}
+    match = _PAIRS.search(text)
+    if match:
+        required["pair_count"] = int(match.group(1))
+    match = _DIAMETER.search(text)
+    if match:
+        required["conductor_dia_mm"] = float(match.group(1))
+    found = [term for term in terms if re.search(rf"\b{term}\b", text, re.IGNORECASE)]
+    if found:
+        required["construction"] = found
+    if _UNARMOURED.search(text):
+        required["armouring"] = False
+    elif _ARMOURED.search(text):
+        required["armouring"] = True
+    return required
+
+def _materials(text: str) -> set:
+    materials = set()
+    for word in re.findall(r"[a-z]+", (text or "").lower()):
+        materials |= MATERIAL_TERMS.get(word, set())
+    return materials
+
+def spec_checks(constraints: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Turns the tender's technical specifications into checks the catalog columns can answer:
+    conductor diameter (with its tolerance) and conductor/insulation/sheath/armour material.
+    Specifications the catalog has no column for (resistance, elongation, ...) are left out.
+    """
+    checks = []
+    for spec in (constraints or {}).get("specifications", []) or []:
+        component = str(spec.get("component") or "")
+        parameter = str(spec.get("parameter") or "").lower()
+        value = str(spec.get("value") or "")
+        family = _FAMILY.match(component)
+        base = {
+            "label": f"{component} {spec.get('parameter')}".strip(),
+            "family": family.group(1).lower() if family else None,
+            "value": value,
+        }
+        if "conductor" in component.lower() and parameter == "diameter":
+            sizes = [float(n) for n in _NUMBER.findall(value)]
+            tolerance = _NUMBER.search(str(spec.get("tolerance") or ""))
+            if sizes:
+                checks.append({**base, "column": "Conductor_Dia_mm", "sizes": sizes,
+                               "tolerance": float(tolerance.group(0)) if tolerance else None})
+        elif parameter == "material":
+            column = next((col for key, col in SPEC_MATERIAL_COLUMNS if key in component.lower()), None)
+            materials = _materials(value)
+            if column and materials:
+                checks.append({**base, "column": column, "materials": materials})
+    return checks
+
+def _applies(check: Dict[str, Any], item: Dict[str, Any]) -> bool:
+    """A spec scoped to a cable family ('PIJF Cable Conductor') only applies to items of that family."""
+    if not check["family"]:
+        return True
+    text = " ".join(str(item.get(k) or "") for k in ("description", "category")).lower()
+    return re.search(rf"\b{re.escape(check['family'])}\b", text) is not None
+
+def score_candidate(
+    row: Dict[str, str],
+    required: Dict[str, Any],
+    standards: List[str],
+    specs: Optional[List[Dict[str, Any]]] = None,
+) -> Tuple[float, List[str], List[str]]:
+    """
+    Compares one catalog row with an item's requirements and the tender specs that apply to it.
+    Returns (spec_match_percent, matched_labels, missing_specs).
+    """
+    matched, missing = [], []
+
+    def check(ok: bool, label: str, detail: str):
+        (matched if ok else missing).append(label if ok else detail)
+
+    if "pair_count" in required:
+        pairs = _number(row.get("Pair_Count"))
+        check(pairs == required["pair_count"], "pair count", f"Pair count: required {required['pair_count']}, catalog {row.get('Pair_Count')}")
+    if "conductor_dia_mm" in required:
+        dia = _number(row.get("Conductor_Dia_mm"))
+        ok = dia is not None and abs(dia - required["conductor_dia_mm"]) <= 0.02 * required["conductor_dia_mm"]
+        check(ok, "conductor diameter", f"Conductor diameter: required {required['conductor_dia_mm']}mm, catalog {row.get('Conductor_Dia_mm')}")
+    if "construction" in required:
+        row_text = f"{row.get('Description', '')} {row.get('Insulation', '')}".upper()
+        absent = [term for term in required["construction"] if not re.search(rf"\b{term}\b", row_text)]
+        check(not absent, "construction", f"Construction: {', '.join(absent)} not offered")
+    if "armouring" in required:
+        armoured = (row.get("Armouring") or "").strip().lower() not in ("", "unarmored", "unarmoured", "n/a")
+        check(armoured == required["armouring"], "armouring", f"Armouring: required {'armoured' if required['armouring'] else 'unarmoured'}, catalog {row.get('Armouring')}")
+    if standards:
+        standard = normalize_standard(row.get("Standard", ""))
+        ok = bool(standard) and any(standard in s or s in standard for s in standards)
+        check(ok, "standard", f"Standard: {row.get('Standard')} not among the applicable standards")
+    for spec in specs or []:
+        catalog_value = row.get(spec["column"]) or ""
+        if "sizes" in spec:
+            dia = _number(catalog_value)
+            if dia is None:
+                continue
+            ok = any(abs(dia - size) <= (spec["tolerance"] if spec["tolerance"] is not None else 0.02 * size) for size in spec["sizes"])
+        else:
+            offered = _materials(catalog_value)
+            if not offered:
+                continue
+            ok = spec["materials"] <= offered
+        check(ok, spec["label"].lower(), f"{spec['label']}: required {spec['value']}, catalog {catalog_value}")
+
+    checked = len(matched) + len(missing)
+    percent = round(100.0 * len(matched) / checked, 1) if checked else 0.0
+    return percent, matched, missing
+
+def _tie_break(row: Dict[str, str]) -> Tuple[float, int, float]:
+    """Higher MII first, then better stock, then lower price."""
+    mii = _number(row.get("MII_Percent")) or 0.0
+    stock = STOCK_RANK.get((row.get("Stock_Availability") or "").strip().lower(), len(STOCK_RANK))
+    price = _number(row.get("Base_Price_Per_Km"))
+    return (-mii, stock, price if price is not None else float("inf"))
+
+def match_item(
+    item: Dict[str, Any],
+    catalog: List[Dict[str, str]],
+    terms: List[str],
+    standards: List[str],
+    specs: Optional[List[Dict[str, Any]]] = None,
+) -> Tuple[Dict[str, Any], float]:
+    """
+    Scores every catalog row against a BOM item and the tender specs that apply to it.
+    Returns (SKURecommendation dict, confidence 0-100). Confidence is the share of
+    RULE_ATTRIBUTES the item states, and 0 when even the best candidate misses a
+    spec (item attribute or tender specification): trade-offs are left to the LLM.
+    """
+    required = item_requirements(item, terms)
+    specs = [spec for spec in specs or [] if _applies(spec, item)]
+    rows = catalog
+    make = (item.get("requested_make") or "").strip().lower()
+    if make:
+        rows = [row for row in catalog if make in (row.get("Brand") or "").lower()]
+
+    scored = []
+    for row in rows:
+        percent, matched, missing = score_candidate(row, required, standards, specs)
+        scored.append((percent, matched, missing, row))
+    scored.sort(key=lambda s: (-s[0], _tie_break(s[3])))
+
+    top = scored[:3]
+    candidates = [{
+        "sku_id": row["SKU"],
+        "description": row.get("Description", ""),
+        "spec_match_percent": percent,
+        "missing_specs": missing,
+        "justification": f"Rule match on {', '.join(matched) or 'no attributes'}; MII {row.get('MII_Percent')}%, {row.get('Stock_Availability')}.",
+    } for percent, matched, missing, row in top]
+    recommendation = {
+        "rfp_item_no": str(item.get("rfp_item_no")),
+        "rfp_description": item.get("description", ""),
+        "top_candidates": candidates,
+        "selected_sku": candidates[0]["sku_id"] if candidates else "NO_MATCH",
+        "selection_reason": "Highest spec match; ties broken on MII content, stock availability, then price.",
+    }
+
+    checked = len(required) + (1 if standards else 0)
+    exact = bool(top) and not top[0][2]
+    confidence = 100.0 * checked / len(RULE_ATTRIBUTES) if exact else 0.0
+    return recommendation, confidence
+
+def match_by_rules(
+    items: List[Dict[str, Any]],
+    constraints: Dict[str, Any],
+    catalog: List[Dict[str, str]],
+    threshold: float = RULE_MATCH_THRESHOLD,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Matches BOM items against catalog attributes without calling the LLM.
+    Returns (recommendations for confidently matched items, items left for the LLM).
+    """
+    terms = construction_terms(catalog)
+    standards = [normalize_standard(s) for s in (constraints or {}).get("applicable_standards", []) if s]
+    specs = spec_checks(constraints)
+    resolved, ambiguous = [], []
+    for item in items:
+        recommendation, confidence = match_item(item, catalog, terms, standards, specs)
+        if confidence >= threshold:
+            resolved.append(recommendation)
+        else:
+            ambiguous.append(item)
+    return resolved, ambiguous
@@ -0,0 +1,283 @@
+import os
+import json
+import time
+import zlib
+import shutil
+import sqlite3
+import zipfile
+import threading
+from typing import Any, Dict, List, Optional
+
+RUNS_DIR = "data/runs"
+ARCHIVE_DIR = os.environ.get("SWIFTBID_RUN_ARCHIVE_DIR", "data/archive/runs")
+RUN_RETENTION_DAYS = float(os.environ.get("SWIFTBID_RUN_RETENTION_DAYS", "14"))   # Completed runs stay live this long
+COMPLETION_MARKER = "run_complete.json"   # Written only when a run finishes successfully (failed runs have metrics too)
+LEGACY_COMPLETION_FILES = ("07_final_bid.json", "Annexure_VI_Price_Bid.csv")   # Final outputs of runs from before the marker
+
+def mark_run_completed(run_dir: str):
+    """Marks a run as successfully finished; only marked runs are ever compacted."""
+    with open(os.path.join(run_dir, COMPLETION_MARKER), "w", encoding="utf-8") as f:
+        json.dump({"completed_at": time.strftime("%Y-%m-%dT%H:%M:%S")}, f)
+
+def run_completed_at(run_dir: str) -> Optional[float]:
+    """
+    Completion time of a run (mtime of its completion marker), or None while it
+    is unfinished or failed. Legacy runs without a marker count as completed once
+    they hold the final bid and the price-bid annexure; their newest file time is used.
+    """
+    marker = os.path.join(run_dir, COMPLETION_MARKER)
+    if os.path.exists(marker):
+        return os.path.getmtime(marker)
+    if all(os.path.exists(os.path.join(run_dir, name)) for name in LEGACY_COMPLETION_FILES):
+        return last_modified(run_dir)
+    return None
+
+def file_crc(path: str) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+def run_files(run_dir: str) -> List[tuple]:
+    """(archive-relative name, full path) of every file in a run folder."""
+    found = []
+    for root, _, files in os.walk(run_dir):
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            found.append((os.path.relpath(full, run_dir).replace(os.sep, "/"), full))
+    return found
+
+def last_modified(run_dir: str) -> float:
+    """Newest mtime of any file in a run folder (a resumed run may write after completing once)."""
+    newest = os.path.getmtime(run_dir)
+    for root, _, files in os.walk(run_dir):
+        for name in files:
+            newest = max(newest, os.path.getmtime(os.path.join(root, name)))
+    return newest
+
+def archive_month(timestamp: float) -> str:
+    return time.strftime("%Y-%m", time.localtime(timestamp))
+
+
+class RunArchive:
+    """
+    Per-month compressed archives of completed run folders (runs-YYYY-MM.zip)
+    with a SQLite index of every archived file, so single artifacts can be read
+    back without unpacking a whole month.
+    """
+
+    def __init__(self, archive_dir: str = ARCHIVE_DIR):
+        self.archive_dir = archive_dir
+        self._lock = threading.Lock()
+        os.makedirs(archive_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(archive_dir, "index.db"), check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                month TEXT NOT NULL,
+                archive TEXT NOT NULL,
+                completed_at REAL NOT NULL,
+                archived_at REAL NOT NULL,
+                files INTEGER NOT NULL,
+                bytes INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                run_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (run_id, name)
+            );
+            CREATE INDEX IF NOT EXISTS runs_by_month ON runs (month);
+            """
+        )
+        self._conn.commit()
+
+    def archive_path(self, month: str) -> str:
+        return os.path.join(self.archive_dir, f"runs-{month}.zip")
+
+    def lookup(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id, month, archive, completed_at, archived_at, files, bytes FROM runs WHERE run_id = ?",
+                (run_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("run_id", "month", "archive", "completed_at", "archived_at", "files", "bytes")
+        return dict(zip(keys, row))
+
+    def list_runs(self, month: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT run_id FROM runs" + (" WHERE month = ?" if month else "") + " ORDER BY completed_at"
+        with self._lock:
+            run_ids = [r[0] for r in self._conn.execute(query, (month,) if month else ()).fetchall()]
+        return [self.lookup(run_id) for run_id in run_ids]
+
+    def list_files(self, run_id: str) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT name FROM files WHERE run_id = ? ORDER BY name", (run_id,)).fetchall()]
+
+    def archive_runs(self, run_dirs: List[str]) -> List[Dict[str, Any]]:
+        """
+        Adds completed run folders to their months' archives, indexes them and
+        removes the folders. Safe to repeat after a crash: files already archived
+        with the same size and CRC are not added twice. A run whose files changed
+        since it was archived (e.g. restored and then re-priced) has its entries
+        rebuilt, so nothing is lost when the live folder is deleted.
+        """
+        by_month: Dict[str, List[tuple]] = {}
+        for run_dir in run_dirs:
+            completed_at = run_completed_at(run_dir)
+            if completed_at is None:
+                raise ValueError(f"Run {os.path.basename(os.path.normpath(run_dir))} has not completed")
+            by_month.setdefault(archive_month(completed_at), []).append((run_dir, completed_at))
+
+        archived = []
+        for month, runs in sorted(by_month.items()):
+            path = self.archive_path(month)
+            with self._lock:
+                indexed = self._write_month(path, runs)
+                # Index only once the archive is closed (its central directory written)
+                for run_id, completed_at, sizes in indexed:
+                    self._conn.execute("DELETE FROM files WHERE run_id = ?", (run_id,))
+                    self._conn.executemany("INSERT INTO files (run_id, name, size) VALUES (?, ?, ?)", [(run_id, n, b) for n, b in sizes])
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO runs (run_id, month, archive, completed_at, archived_at, files, bytes) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (run_id, month, os.path.basename(path), completed_at, time.time(), len(sizes), sum(b for _, b in sizes)),
+                    )
+                self._conn.commit()
+            for run_dir, _ in runs:
+                shutil.rmtree(run_dir)
+            archived.extend(self.lookup(run_id) for run_id, _, _ in indexed)
+        return archived
+
+    def _write_month(self, path: str, runs: List[tuple]) -> List[tuple]:
+        """
+        Writes the runs into one month's archive and returns (run_id, completed_at,
+        [(name, size)]) per run. New files are appended. Entries cannot be replaced
+        inside a zip, so if any archived entry of these runs is stale, the archive
+        is rewritten without them first. Caller holds the lock.
+        """
+        plans = []
+        for run_dir, completed_at in runs:
+            run_id = os.path.basename(os.path.normpath(run_dir))
+            plans.append((run_id, completed_at, run_files(run_dir)))
+
+        stale = set()
+        if os.path.exists(path):
+            with zipfile.ZipFile(path) as archive:
+                entries = {info.filename: info for info in archive.infolist()}
+            for run_id, _, files in plans:
+                current = {f"{run_id}/{name}" for name, _ in files}
+                for name, full in files:
+                    info = entries.get(f"{run_id}/{name}")
+                    if info is not None and (info.file_size != os.path.getsize(full) or info.CRC != file_crc(full)):
+                        stale.add(run_id)
+                if any(entry.startswith(f"{run_id}/") and entry not in current for entry in entries):
+                    stale.add(run_id)
+        if stale:
+            print(f"[Archive] Rebuilding {os.path.basename(path)}: {len(stale)} run(s) changed since they were archived")
+            self._rewrite_without(path, stale)
+
+        indexed = []
+        with zipfile.ZipFile(path, "a", compression=zipfile.ZIP_DEFLATED) as archive:
+            present = set(archive.namelist())
+            for run_id, completed_at, files in plans:
+                for name, full in files:
+                    if f"{run_id}/{name}" not in present:
+                        archive.write(full, f"{run_id}/{name}")
+                indexed.append((run_id, completed_at, [(name, os.path.getsize(full)) for name, full in files]))
+        return indexed
+
+    @staticmethod
+    def _rewrite_without(path: str, run_ids: set):
+        """Copies an archive without the entries of the given runs and swaps it in atomically."""
+        tmp = path + ".tmp"
+        with zipfile.ZipFile(path) as source, zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as target:
+            for info in source.infolist():
+                if info.filename.split("/", 1)[0] not in run_ids:
+                    target.writestr(info, source.read(info), compress_type=info.compress_type)
+        os.replace(tmp, path)
+
+    def read_artifact(self, run_id: str, name: str) -> bytes:
+        """Reads one archived artifact (e.g. '07_final_bid.json') without extracting the run."""
+        run = self.lookup(run_id)
+        if run is None:
+            raise KeyError(f"Run {run_id} is not archived")
+        with zipfile.ZipFile(os.path.join(self.archive_dir, run["archive"])) as archive:
+            try:
+                return archive.read(f"{run_id}/{name}")
+            except KeyError:
+                raise KeyError(f"{name} is not in archived run {run_id}") from None
+
+    def restore_run(self, run_id: str, runs_dir: str = RUNS_DIR) -> str:
+        """
+        Extracts an archived run back into a live folder (the archive copy is kept).
+        File times are restored too, so the run keeps its completion month.
+        """
+        run = self.lookup(run_id)
+        if run is None:
+            raise KeyError(f"Run {run_id} is not archived")
+        run_dir = os.path.join(runs_dir, run_id)
+        with zipfile.ZipFile(os.path.join(self.archive_dir, run["archive"])) as archive:
+            for name in self.list_files(run_id):
+                info = archive.getinfo(f"{run_id}/{name}")
+                target = os.path.join(run_dir, *name.split("/"))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, "wb") as f:
+                    f.write(archive.read(info))
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+                os.utime(target, (mtime, mtime))
+        return run_dir
+
+    def purge_months(self, before_month: str) -> List[str]:
+        """Deletes whole monthly archives older than before_month (YYYY-MM) and their index entries."""
+        with self._lock:
+            months = [r[0] for r in self._conn.execute("SELECT DISTINCT month FROM runs WHERE month < ?", (before_month,)).fetchall()]
+            for month in months:
+                self._conn.execute("DELETE FROM files WHERE run_id IN (SELECT run_id FROM runs WHERE month = ?)", (month,))
+                self._conn.execute("DELETE FROM runs WHERE month = ?", (month,))
+                path = self.archive_path(month)
+                if os.path.exists(path):
+                    os.remove(path)
+            self._conn.commit()
+        return months
+
+
+def compactable_runs(runs_dir: str = RUNS_DIR, keep_days: float = RUN_RETENTION_DAYS, now: Optional[float] = None) -> List[str]:
+    """Completed run folders untouched for more than keep_days (unfinished runs always stay live)."""
+    now = time.time() if now is None else now
+    cutoff = now - keep_days * 86400
+    selected = []
+    if not os.path.isdir(runs_dir):
+        return selected
+    for name in sorted(os.listdir(runs_dir)):
+        run_dir = os.path.join(runs_dir, name)
+        if not os.path.isdir(run_dir) or run_completed_at(run_dir) is None:
+            continue
+        if last_modified(run_dir) < cutoff:
+            selected.append(run_dir)
+    return selected
+
+def read_run_artifact(run_id: str, name: str, runs_dir: str = RUNS_DIR, archive: Optional[RunArchive] = None) -> bytes:
+    """Reads an artifact from a live run folder, falling back to the archive."""
+    path = os.path.join(runs_dir, run_id, name)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    return (archive or RunArchive()).read_artifact(run_id, name)
+
+def ensure_live_run(run_folder: str, archive: Optional[RunArchive] = None) -> bool:
+    """Restores an archived run into run_folder if the folder is gone. Returns True if it was restored."""
+    if os.path.isdir(run_folder):
+        return False
+    if archive is None and not os.path.exists(os.path.join(ARCHIVE_DIR, "index.db")):
+        return False  # Nothing has been archived yet
+    run_id = os.path.basename(os.path.normpath(run_folder))
+    archive = archive or RunArchive()
+    if archive.lookup(run_id) is None:
+        return False
+    archive.restore_run(run_id, os.path.dirname(os.path.normpath(run_folder)))
+    print(f"[Archive] Restored archived run {run_id} to {run_folder}")
+    return True
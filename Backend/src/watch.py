@@ -0,0 +1,135 @@
+"""
+Watch-folder ingestion daemon.
+
+Watches one or more drop directories (inotify, or polling where inotify is not
+available) and queues every new RFP PDF for a graph run as soon as it has
+finished writing. Files are deduplicated by content hash, so re-dropping a
+tender (under any name) does not start a second run. Runs go through the
+deadline-aware TenderScheduler, which bounds concurrency.
+
+Usage:
+    python -m src.watch inbox/ [more_dirs...] --concurrency 2 --reserved 1 --settle 2
+"""
+import os
+import time
+import signal
+import argparse
+import threading
+from typing import Any, Dict, List, Optional
+from src.utils.folder_watch import (
+    INGEST_DB_PATH,
+    IngestLedger,
+    SettleTracker,
+    content_hash,
+    list_candidates,
+    make_watcher
+)
+
+class WatchDaemon:
+    """Feeds settled, not-yet-seen PDFs from the watched directories into a TenderScheduler."""
+
+    def __init__(self, directories: List[str], scheduler: Any, ledger: IngestLedger, settle_seconds: float = 2.0,
+                 polling: bool = False, poll_interval: float = 5.0):
+        self.directories = directories
+        self.scheduler = scheduler
+        self.ledger = ledger
+        self.tracker = SettleTracker(settle_seconds)
+        self.watcher = make_watcher(directories, polling, poll_interval)
+        self.stop_event = threading.Event()
+        self._jobs: Dict[str, Dict[str, Any]] = {}   # run_id -> {"job", "path", "landed_at"}
+
+    def _submit(self, path: str, digest: str, landed_at: float):
+        job = self.scheduler.submit(path)
+        self.ledger.record(digest, path, job.run_id)
+        self._jobs[job.run_id] = {"job": job, "path": path, "landed_at": landed_at}
+        print(f"[Watch] {os.path.basename(path)} queued as {job.run_id} {time.monotonic() - landed_at:.1f}s after landing")
+
+    def _ingest(self, path: str, landed_at: float):
+        try:
+            digest = content_hash(path)
+        except OSError as e:
+            print(f"[Watch] Could not read {path}: {e}")
+            return
+        prior = self.ledger.lookup(digest)
+        if prior and prior["status"] != "failed":
+            print(f"[Watch] Skipping {os.path.basename(path)}: same content as {prior['path']} (run {prior['run_id']}, {prior['status']})")
+            return
+        self._submit(path, digest, landed_at)
+
+    def _requeue_unfinished(self):
+        """Re-queues files an earlier daemon accepted but never finished."""
+        for entry in self.ledger.unfinished():
+            path = entry["path"]
+            if os.path.exists(path) and content_hash(path) == entry["content_hash"]:
+                print(f"[Watch] Resuming unfinished {os.path.basename(path)}")
+                self._submit(path, entry["content_hash"], time.monotonic())
+            else:
+                self.ledger.set_status_by_hash(entry["content_hash"], "missing")
+
+    def _sync_statuses(self):
+        for run_id, entry in list(self._jobs.items()):
+            job = entry["job"]
+            if job.status in ("done", "failed"):
+                self.ledger.set_status(run_id, job.status)
+                elapsed = time.monotonic() - entry["landed_at"]
+                outcome = f"draft bid ready in {job.run_folder}" if job.status == "done" else f"failed ({job.error})"
+                print(f"[Watch] {os.path.basename(entry['path'])}: {outcome}, {elapsed:.0f}s after landing")
+                del self._jobs[run_id]
+
+    def run(self):
+        self._requeue_unfinished()
+        now = time.monotonic()
+        for path in list_candidates(self.directories):
+            self.tracker.note(path, now)
+        print(f"[Watch] Watching {', '.join(self.directories)} ({type(self.watcher).__name__})")
+        tick = max(0.2, min(1.0, self.tracker.settle_seconds / 2))
+        try:
+            while not self.stop_event.is_set():
+                now = time.monotonic()
+                for path in self.watcher.poll(tick if len(self.tracker) else 1.0):
+                    self.tracker.note(path, now)
+                for ready in self.tracker.ready(time.monotonic()):
+                    self._ingest(ready["path"], ready["landed_at"])
+                self._sync_statuses()
+        finally:
+            self.watcher.close()
+
+    def drain(self):
+        """Waits for every queued tender, then records their outcomes."""
+        if self._jobs:
+            print(f"[Watch] Waiting for {len(self._jobs)} queued tender(s) to finish")
+            self.scheduler.wait()
+        self._sync_statuses()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Watch drop directories and queue new RFP PDFs automatically")
+    parser.add_argument("directories", nargs="+", help="Drop directories to watch")
+    parser.add_argument("--concurrency", type=int, default=2, help="Graph runs in flight at once")
+    parser.add_argument("--reserved", type=int, default=1, help="Run slots kept free for urgent tenders")
+    parser.add_argument("--settle", type=float, default=2.0, help="Seconds a file must stay unchanged before it is queued")
+    parser.add_argument("--polling", action="store_true", help="Poll the directories instead of using inotify")
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    parser.add_argument("--ledger", default=INGEST_DB_PATH, help="SQLite ledger of ingested files")
+    parser.add_argument("--status", default="data/runs/queue_status.json", help="Queue status JSON (positions and ETAs)")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    from src.scheduler import TenderScheduler
+
+    for directory in args.directories:
+        os.makedirs(directory, exist_ok=True)
+    os.makedirs(os.path.dirname(args.status) or ".", exist_ok=True)
+
+    scheduler = TenderScheduler(args.concurrency, args.reserved, status_path=args.status)
+    daemon = WatchDaemon(args.directories, scheduler, IngestLedger(args.ledger), args.settle, args.polling, args.poll_interval)
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop_event.set())
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        pass
+    print("\n[Watch] Stopped watching")
+    daemon.drain()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+What-if pricing engine.
+
+Re-prices a finished run over a grid of margin, transport, tax and per-item
+margin scenarios in one vectorized pass (no LLM calls). Built on the same
+price_line() math the pricing agent uses.
+
+Usage:
+    python -m src.whatif data/runs/<run_id> --margins 10:25:2.5 --transport 1:5:1 --tax 0,18
+"""
+import os
+import csv
+import time
+import argparse
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from src.utils.file_utils import read_json_file
+from src.utils.run_archive import ensure_live_run
+from src.utils.pricing_math import (
+    load_product_prices,
+    load_service_prices,
+    compute_service_cost,
+    resolve_tax_rate,
+    count_priced_items,
+    price_line
+)
+
+CURVE_HEADERS = [
+    "global_margin_percent",
+    "transport_overhead_percent",
+    "tax_percent",
+    "item_margin_shift",
+    "total_material",
+    "total_service",
+    "total_tax",
+    "grand_total",
+    "delta_vs_base_percent",
+]
+
+def load_price_lines(run_folder: str, catalog_path: str = "data/catalog/products.csv") -> Dict[str, Any]:
+    """
+    Loads the priced lines of a run into arrays.
+    item_margin is NaN where the strategy has no per-item override.
+    """
+    matches = read_json_file(os.path.join(run_folder, "06_matched_skus.json"))
+    if isinstance(matches, dict):
+        matches = matches.get("recommendations", matches.get("matches", []))
+    bom = read_json_file(os.path.join(run_folder, "02_bill_of_materials.json")) or []
+    constraints = read_json_file(os.path.join(run_folder, "03_technical_constraints.json")) or {}
+    commercial = read_json_file(os.path.join(run_folder, "04_commercial_logistics.json")) or {}
+    strategy = read_json_file(os.path.join(run_folder, "07_pricing_strategy.json")) or {}
+
+    product_catalog = load_product_prices(catalog_path)
+    total_service_cost, _ = compute_service_cost(constraints.get("testing_requirements", []), load_service_prices())
+    num_items = count_priced_items(matches)
+
+    qty_by_item = {str(item.get("rfp_item_no")): item.get("quantity", 0) for item in bom}
+    item_margins = {s["rfp_item_no"]: s["item_specific_margin_percent"] for s in strategy.get("item_strategies", [])}
+
+    base_prices, quantities, overrides = [], [], []
+    for match in matches:
+        sku = match.get("selected_sku", match.get("matched_sku"))
+        item_no = match.get("rfp_item_no")
+        if not sku or sku == "NO_MATCH" or sku not in product_catalog:
+            continue
+        base_prices.append(product_catalog[sku])
+        quantities.append(qty_by_item.get(str(item_no), 0))
+        overrides.append(item_margins.get(item_no, np.nan))
+
+    return {
+        "base_price": np.asarray(base_prices, dtype=float),
+        "qty": np.asarray(quantities, dtype=float),
+        "item_margin": np.asarray(overrides, dtype=float),
+        "item_service_cost": total_service_cost / num_items if num_items > 0 else 0.0,
+        "base_global_margin": float(strategy.get("global_margin_percent", 15.0)),
+        "base_transport": float(strategy.get("transport_overhead_percent", 2.0)),
+        "base_tax_rate": resolve_tax_rate(commercial),
+    }
+
+def evaluate_grid(
+    lines: Dict[str, Any],
+    global_margins: Sequence[float],
+    transport_percents: Sequence[float],
+    tax_percents: Sequence[float],
+    item_margin_shifts: Sequence[float] = (0.0,),
+) -> Dict[str, np.ndarray]:
+    """
+    Prices every line under every scenario at once.
+    Grid axes: (margin, transport, tax, item_margin_shift); the items axis is summed out.
+    Per-item overrides move with item_margin_shift, other items follow the global margin.
+    """
+    margin = np.asarray(global_margins, dtype=float)[:, None, None, None, None]
+    transport = np.asarray(transport_percents, dtype=float)[None, :, None, None, None]
+    tax_rate = np.asarray(tax_percents, dtype=float)[None, None, :, None, None] / 100.0
+    shift = np.asarray(item_margin_shifts, dtype=float)[None, None, None, :, None]
+
+    base_price = lines["base_price"][None, None, None, None, :]
+    qty = lines["qty"][None, None, None, None, :]
+    item_margin = lines["item_margin"][None, None, None, None, :]
+    effective_margin = np.where(np.isnan(item_margin), margin, item_margin + shift)
+
+    priced = price_line(base_price, qty, transport, effective_margin, lines["item_service_cost"], tax_rate)
+    n_items = lines["base_price"].shape[0]
+    grid_shape = (margin.shape[0], transport.shape[1], tax_rate.shape[2], shift.shape[3])
+
+    def total(values) -> np.ndarray:
+        return np.broadcast_to(values, grid_shape + (n_items,)).sum(axis=-1)
+
+    return {
+        "total_material": total(priced["total_material_cost"]),
+        "total_service": np.full(grid_shape, lines["item_service_cost"] * n_items),
+        "total_tax": total(priced["tax_amount"]),
+        "grand_total": total(priced["line_total"]),
+    }
+
+def build_price_curve(
+    lines: Dict[str, Any],
+    global_margins: Sequence[float],
+    transport_percents: Sequence[float],
+    tax_percents: Sequence[float],
+    item_margin_shifts: Sequence[float] = (0.0,),
+) -> List[Dict[str, float]]:
+    """Flattens the scenario grid into price-curve rows, with the delta against the run's own bid."""
+    grid = evaluate_grid(lines, global_margins, transport_percents, tax_percents, item_margin_shifts)
+    baseline = evaluate_grid(
+        lines,
+        [lines["base_global_margin"]], [lines["base_transport"]], [lines["base_tax_rate"] * 100.0],
+    )["grand_total"].item()
+
+    axes = np.meshgrid(
+        np.asarray(global_margins, dtype=float),
+        np.asarray(transport_percents, dtype=float),
+        np.asarray(tax_percents, dtype=float),
+        np.asarray(item_margin_shifts, dtype=float),
+        indexing="ij",
+    )
+    columns = [axis.ravel() for axis in axes] + [grid[key].ravel() for key in ("total_material", "total_service", "total_tax", "grand_total")]
+    delta = (grid["grand_total"].ravel() - baseline) / baseline * 100.0 if baseline else np.zeros_like(columns[-1])
+    columns.append(delta)
+
+    table = np.round(np.column_stack(columns), 2)
+    return [dict(zip(CURVE_HEADERS, row.tolist())) for row in table]
+
+def write_price_curve(path: str, rows: List[Dict[str, float]]):
+    """Writes the price-curve table as CSV."""
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CURVE_HEADERS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def parse_values(spec: str) -> List[float]:
+    """Parses '10,15,20' or an inclusive range 'start:stop:step' (e.g. '10:25:2.5')."""
+    if ":" in spec:
+        start, stop, step = (float(part) for part in spec.split(":"))
+        return np.round(np.arange(start, stop + step / 2.0, step), 6).tolist()
+    return [float(part) for part in spec.split(",") if part.strip()]
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="What-if pricing grid for a completed run")
+    parser.add_argument("run_folder", help="Run folder containing 06_matched_skus.json and 07_pricing_strategy.json")
+    parser.add_argument("--catalog", default="data/catalog/products.csv")
+    parser.add_argument("--margins", default="10:25:2.5", help="Global margin %% values")
+    parser.add_argument("--transport", default="1:5:1", help="Transport overhead %% values")
+    parser.add_argument("--tax", default="0,18", help="Tax %% values")
+    parser.add_argument("--item-margin-shift", default="0", help="Offsets (in %% points) applied to per-item margins")
+    parser.add_argument("--output", default=None, help="CSV path (default: <run_folder>/what_if_price_curve.csv)")
+    args = parser.parse_args(argv)
+
+    ensure_live_run(args.run_folder)  # Runs compacted by src.archive are restored on demand
+    start = time.perf_counter()
+    lines = load_price_lines(args.run_folder, args.catalog)
+    rows = build_price_curve(
+        lines,
+        parse_values(args.margins),
+        parse_values(args.transport),
+        parse_values(args.tax),
+        parse_values(args.item_margin_shift),
+    )
+    path = args.output or os.path.join(args.run_folder, "what_if_price_curve.csv")
+    write_price_curve(path, rows)
+    elapsed = time.perf_counter() - start
+    print(f"Evaluated {len(rows)} scenario(s) over {len(lines['base_price'])} priced line(s) in {elapsed:.3f}s")
+    print(f"Price curve: {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+from src.agents.base import StructuredOutputError, keep_last_artifacts
+from src.agents.deadlines import DeadlineExceeded
+from src.utils.metrics import get_metrics
+
+def test_unrepairable_reply_degrades_like_a_deadline(tmp_path):
+    state = {"run_folder": str(tmp_path)}
+    assert keep_last_artifacts(state, "extract_technical_agent", StructuredOutputError("no valid TechnicalExtraction")) == {}
+    assert keep_last_artifacts(state, "extract_technical_agent", DeadlineExceeded("time budget exhausted")) == {}
+    metrics = get_metrics(str(tmp_path))
+    assert metrics["structured_output.degraded_nodes"] == 1
+    assert metrics["deadline.degraded_nodes"] == 1
@@ -0,0 +1,82 @@
+from src.schemas import CorrigendumExtraction
+from src.utils.corrigendum import apply_corrigendum
+
+def _artifacts():
+    return {
+        "bom": [
+            {"rfp_item_no": "1", "description": "100 Pair 0.5mm PIJF cable", "quantity": 10.0, "unit": "km", "category": "Telecom Cable"},
+            {"rfp_item_no": "2", "description": "4 Pair UTP cable", "quantity": 5.0, "unit": "km", "category": "Telecom Cable"},
+        ],
+        "constraints": {
+            "applicable_standards": ["TEC GR/CUG-01/03"],
+            "specifications": [{"component": "Conductor", "parameter": "Diameter", "value": "0.5mm", "tolerance": "± 0.010mm"}],
+            "testing_requirements": ["Spark test"],
+        },
+        "commercial": {"incoterms": "FOR Destination", "unloading_responsibility": "Vendor", "payment_terms": "100% on acceptance",
+                       "taxes_and_duties": "Extra", "delivery_period_weeks": 8},
+        "summary": {"client_name": "BSNL", "tender_reference": "T1", "bid_submission_mode": "GeM",
+                    "critical_dates": {"submission_deadline": "2025-03-20"}, "scope_of_work_summary": "Cables"},
+    }
+
+def _apply(**delta):
+    original = _artifacts()
+    amended, plan = apply_corrigendum(original, CorrigendumExtraction(**delta))
+    assert original == _artifacts()  # The run's artifacts are not modified
+    return amended, plan
+
+def test_quantity_change_only_reprices():
+    amended, plan = _apply(bom_changes=[{"action": "update", "rfp_item_no": "1", "quantity": 12}])
+    assert amended["bom"][0]["quantity"] == 12.0
+    assert plan.phases == ["pricing"] and not plan.rematch_items
+
+def test_description_change_rematches_that_item():
+    amended, plan = _apply(bom_changes=[{"action": "update", "rfp_item_no": "2", "description": "4 Pair Cat6 UTP cable"}])
+    assert amended["bom"][1]["description"] == "4 Pair Cat6 UTP cable"
+    assert plan.rematch_items == ["2"] and plan.phases == ["matching", "pricing"]
+
+def test_unchanged_value_is_not_a_change():
+    _, plan = _apply(bom_changes=[{"action": "update", "rfp_item_no": "1", "quantity": 10}])
+    assert plan.phases == [] and not plan.applied
+
+def test_add_and_remove_items():
+    amended, plan = _apply(bom_changes=[
+        {"action": "remove", "rfp_item_no": "2"},
+        {"action": "add", "rfp_item_no": "3", "description": "10 Pair 0.5mm PIJF cable", "quantity": 2, "unit": "km"},
+    ])
+    assert [item["rfp_item_no"] for item in amended["bom"]] == ["1", "3"]
+    assert plan.removed_items == ["2"] and plan.rematch_items == ["3"]
+
+def test_invalid_changes_are_rejected():
+    amended, plan = _apply(bom_changes=[
+        {"action": "update", "rfp_item_no": "9", "quantity": 1},
+        {"action": "add", "rfp_item_no": "4", "quantity": 1},
+        {"action": "rename", "rfp_item_no": "1"},
+    ])
+    assert len(plan.rejected) == 3 and not plan.applied
+    assert amended["bom"] == _artifacts()["bom"]
+
+def test_specification_change_rematches_every_item():
+    amended, plan = _apply(specification_changes=[{"action": "update", "component": "conductor", "parameter": "diameter", "value": "0.4mm"}])
+    spec = amended["constraints"]["specifications"][0]
+    assert spec["value"] == "0.4mm" and spec["tolerance"] == "± 0.010mm"
+    assert plan.rematch_all and plan.rematch_items == ["1", "2"]
+
+def test_tests_change_reprices_and_standards_rematch():
+    amended, plan = _apply(tests_added=["Water penetration test"], tests_removed=["spark test"])
+    assert amended["constraints"]["testing_requirements"] == ["Water penetration test"]
+    assert plan.phases == ["pricing"]
+    _, plan = _apply(standards_added=["IS 694"])
+    assert plan.rematch_all
+
+def test_commercial_change_refreshes_the_strategy():
+    amended, plan = _apply(commercial_changes=[{"field": "delivery_period_weeks", "new_value": "12 weeks"}])
+    assert amended["commercial"]["delivery_period_weeks"] == 12
+    assert plan.restrategize and plan.phases == ["pricing"]
+
+def test_summary_dates_and_unknown_fields():
+    amended, plan = _apply(summary_changes=[
+        {"field": "critical_dates.submission_deadline", "new_value": "2025-04-10"},
+        {"field": "no_such_field", "new_value": "x"},
+    ])
+    assert amended["summary"]["critical_dates"]["submission_deadline"] == "2025-04-10"
+    assert plan.restrategize and len(plan.rejected) == 1
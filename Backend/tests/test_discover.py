@@ -0,0 +1,35 @@
+import os
+import asyncio
+from src.discover import DiscoveryCrawler, tender_file_name
+from src.utils.discovery import DiscoveryState, HostRateLimiter, SourceConfig
+from src.utils.fake_portal import FakePortalServer
+
+def test_tender_file_names_stay_distinct_after_sanitizing():
+    a = tender_file_name("cppp telecom", "GEM/2025/B/1")
+    b = tender_file_name("cppp telecom", "GEM_2025_B_1")
+    assert a != b
+    assert a.startswith("cppp_telecom__GEM_2025_B_1-") and a.endswith(".pdf")
+    assert len(tender_file_name("s", "x" * 500)) < 200
+
+def test_second_poll_is_conditional_and_only_fetches_new_tenders(tmp_path):
+    server = FakePortalServer(sources=3, hosts=1, latency="fixed:0").start()
+    try:
+        state = DiscoveryState(str(tmp_path / "discovery.db"))
+        sources = [SourceConfig(**s) for s in server.source_configs()]
+        crawler = DiscoveryCrawler(sources, str(tmp_path / "inbox"), state, HostRateLimiter(min_interval=0.0))
+
+        cold = asyncio.run(crawler.poll())
+        assert cold["source_errors"] == 0 and cold["downloaded"] == cold["new_tenders"] > 0
+        assert len(os.listdir(tmp_path / "inbox")) == cold["downloaded"]
+
+        # The JSON source now asks with its cursor (a new URL); RSS and HTML get 304s
+        unchanged = asyncio.run(crawler.poll())
+        assert unchanged["not_modified"] == 2 and unchanged["new_tenders"] == unchanged["downloaded"] == 0
+        assert asyncio.run(crawler.poll())["not_modified"] == 3
+
+        server.publish(0, 2)
+        after = asyncio.run(crawler.poll())
+        assert after["new_tenders"] == after["downloaded"] == 2
+        assert state.cursor(sources[0].name) is not None
+    finally:
+        server.stop()
@@ -0,0 +1,56 @@
+import json
+import pytest
+from src.utils.discovery import DiscoveryState, parse_listing
+
+def test_parse_json_listing_resolves_urls_and_reads_cursor():
+    body = json.dumps({
+        "tenders": [
+            {"id": 7, "title": "PIJF cable", "pdf_url": "/files/7.pdf", "published": "2025-01-01T10:00:00+00:00"},
+            {"id": 8, "title": "No document yet"},
+        ],
+        "next": "/listing?page=2",
+        "cursor": "2025-01-01T10:00:00+00:00",
+    })
+    tenders, next_url, cursor = parse_listing("json", body, "https://portal.example/sources/1/listing")
+    assert tenders == [{"id": "7", "title": "PIJF cable", "pdf_url": "https://portal.example/files/7.pdf", "published": "2025-01-01T10:00:00+00:00"}]
+    assert next_url == "https://portal.example/listing?page=2"
+    assert cursor == "2025-01-01T10:00:00+00:00"
+
+def test_parse_rss_and_html_listings():
+    rss = """<rss><channel><item><guid>T-1</guid><title> Cable </title>
+        <enclosure url="t1.pdf"/><pubDate>Wed, 01 Jan 2025 10:00:00 GMT</pubDate></item></channel></rss>"""
+    tenders, next_url, cursor = parse_listing("rss", rss, "https://portal.example/feed/")
+    assert tenders == [{"id": "T-1", "title": "Cable", "pdf_url": "https://portal.example/feed/t1.pdf", "published": "2025-01-01T10:00:00+00:00"}]
+    assert (next_url, cursor) == (None, None)
+
+    html = '<ul><li><a class="doc" href="/docs/t2.pdf"><b>Supply of</b>\n cable</a></li><li><a href="/about">About</a></li></ul>'
+    tenders, _, _ = parse_listing("html", html, "https://portal.example/list")
+    assert tenders == [{"id": "https://portal.example/docs/t2.pdf", "title": "Supply of cable", "pdf_url": "https://portal.example/docs/t2.pdf", "published": None}]
+
+    with pytest.raises(ValueError):
+        parse_listing("xml", "", "https://portal.example/")
+
+def test_validators_become_conditional_headers(tmp_path):
+    state = DiscoveryState(str(tmp_path / "discovery.db"))
+    url = "https://portal.example/listing"
+    assert state.validators(url) == {}
+    state.store_validators(url, None, None)   # Nothing to store
+    assert state.validators(url) == {}
+    state.store_validators(url, '"v1"', "Wed, 01 Jan 2025 10:00:00 GMT")
+    assert state.validators(url) == {"If-None-Match": '"v1"', "If-Modified-Since": "Wed, 01 Jan 2025 10:00:00 GMT"}
+    state.store_validators(url, '"v2"', None)
+    assert state.validators(url) == {"If-None-Match": '"v2"'}
+
+def test_cursor_and_seen_set_persist(tmp_path):
+    db = str(tmp_path / "discovery.db")
+    state = DiscoveryState(db)
+    assert state.cursor("portal") is None
+    state.store_cursor("portal", "2025-01-01")
+    state.store_cursor("portal", "2025-01-02")
+    state.mark_seen("portal:1", "portal", "Cable", "https://portal.example/1.pdf", "/inbox/1.pdf")
+    state.mark_seen("portal:1", "portal", "Cable again", "https://portal.example/1.pdf", None)
+
+    reopened = DiscoveryState(db)
+    assert reopened.cursor("portal") == "2025-01-02"
+    assert reopened.unseen(["portal:1", "portal:2"]) == ["portal:2"]
+    assert reopened.unseen([]) == []
@@ -0,0 +1,51 @@
+import os
+from src.utils.folder_watch import IngestLedger, SettleTracker, content_hash, is_candidate
+
+PDF = b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+def test_temp_and_partial_files_are_not_candidates():
+    assert is_candidate("/inbox/tender.PDF")
+    for name in ("tender.txt", ".tender.pdf", "~$tender.pdf", "tender.pdf.part", "tender.pdf.crdownload"):
+        assert not is_candidate(f"/inbox/{name}")
+
+def test_same_content_under_another_name_has_the_same_hash(tmp_path):
+    a = write(tmp_path / "a.pdf", PDF)
+    b = write(tmp_path / "copy of a.pdf", PDF)
+    c = write(tmp_path / "c.pdf", PDF + b"\n")
+    assert content_hash(a) == content_hash(b) != content_hash(c)
+
+def test_ledger_records_once_per_content_hash(tmp_path):
+    ledger = IngestLedger(str(tmp_path / "ledger.db"))
+    assert ledger.lookup("abc") is None
+    ledger.record("abc", "/inbox/a.pdf", "run_1")
+    ledger.record("abc", "/inbox/b.pdf", "run_2")   # Re-queued after a failure
+    assert ledger.lookup("abc") == {"path": "/inbox/b.pdf", "run_id": "run_2", "status": "queued"}
+    assert ledger._conn.execute("SELECT COUNT(*) FROM ingested").fetchone()[0] == 1
+
+def test_unfinished_entries_survive_a_restart(tmp_path):
+    db = str(tmp_path / "ledger.db")
+    ledger = IngestLedger(db)
+    ledger.record("done", "/inbox/a.pdf", "run_1")
+    ledger.record("queued", "/inbox/b.pdf", "run_2")
+    ledger.set_status("run_1", "done")
+    restarted = IngestLedger(db)
+    assert restarted.unfinished() == [{"content_hash": "queued", "path": "/inbox/b.pdf"}]
+    restarted.set_status_by_hash("queued", "missing")
+    assert restarted.unfinished() == []
+
+def test_settle_tracker_waits_for_stable_complete_pdf(tmp_path):
+    path = write(tmp_path / "tender.pdf", PDF[:20])
+    tracker = SettleTracker(settle_seconds=2.0, incomplete_grace=60.0)
+    tracker.note(path, 0.0)
+    assert tracker.ready(0.0) == []       # First look records the size
+    assert tracker.ready(5.0) == []       # Stable but no %%EOF yet
+    write(path, PDF)
+    assert tracker.ready(6.0) == []       # Changed: settle again
+    assert tracker.ready(9.0) == [{"path": path, "landed_at": 0.0}]
+    tracker.note(path, 10.0)              # Unchanged since it was handed out
+    assert len(tracker) == 0
@@ -0,0 +1,68 @@
+import pytest
+from src.agents.key_store import KeyStateStore, key_id
+
+KEYS = ["k1", "k2"]
+LIMITS = dict(base_delay=1.0, cooldown_cap=8.0, failure_threshold=3, circuit_open_seconds=60.0)
+
+@pytest.fixture
+def store(tmp_path):
+    store = KeyStateStore(str(tmp_path / "keys.db"))
+    store.register(KEYS)
+    return store
+
+def _in_flight(store):
+    return {row["key"]: row["in_flight"] for row in store.status(KEYS)}
+
+def test_key_id_hides_the_raw_key():
+    assert key_id("secret") == key_id("secret")
+    assert "secret" not in key_id("secret") and len(key_id("secret")) == 16
+
+def test_acquire_spreads_leases_and_release_returns_them(store):
+    first, _ = store.acquire(KEYS)
+    second, _ = store.acquire(KEYS)
+    assert {first, second} == set(KEYS)
+    assert _in_flight(store) == {1: 1, 2: 1}
+    store.release(first)
+    store.release(second)
+    assert _in_flight(store) == {1: 0, 2: 0}
+
+def test_max_in_flight_saturates_keys(tmp_path):
+    store = KeyStateStore(str(tmp_path / "keys.db"), max_in_flight=1)
+    store.register(["k1"])
+    assert store.acquire(["k1"]) == ("k1", 0.0)
+    kid, wait = store.acquire(["k1"])
+    assert kid is None and wait > 0
+
+def test_rate_limit_cools_the_key_down(store):
+    cooldown, opened = store.report_rate_limit("k1", None, **LIMITS)
+    assert cooldown == 1.0 and not opened
+    assert not store.is_available("k1")
+    assert store.acquire(KEYS)[0] == "k2"
+
+def test_retry_after_hint_sets_the_cooldown(store):
+    cooldown, _ = store.report_rate_limit("k1", 5.0, **LIMITS)
+    assert cooldown == 5.0
+    assert store.status(KEYS)[0]["retry_after_hint"] == 5.0
+
+def test_backoff_doubles_and_opens_the_circuit(store):
+    cooldowns = [store.report_rate_limit("k1", None, **LIMITS) for _ in range(3)]
+    assert [c for c, _ in cooldowns] == [1.0, 2.0, 4.0]
+    assert [opened for _, opened in cooldowns] == [False, False, True]
+    assert store.status(KEYS)[0]["circuit_open"]
+    store.report_success("k1")
+    assert not store.status(KEYS)[0]["circuit_open"]
+    assert store.status(KEYS)[0]["consecutive_failures"] == 0
+
+def test_all_keys_cooling_returns_the_wait(store):
+    for kid in KEYS:
+        store.report_rate_limit(kid, 2.0, **LIMITS)
+    kid, wait = store.acquire(KEYS)
+    assert kid is None and 0 < wait <= 2.0
+
+def test_state_is_shared_through_the_file(tmp_path):
+    path = str(tmp_path / "keys.db")
+    first, second = KeyStateStore(path), KeyStateStore(path)
+    first.register(KEYS)
+    first.report_rate_limit("k1", 30.0, **LIMITS)
+    assert not second.is_available("k1")
+    assert second.acquire(KEYS)[0] == "k2"
@@ -0,0 +1,42 @@
+from src.utils.match_memo import MatchMemo, constraints_fingerprint, memo_key, normalize_description
+
+CONSTRAINTS = {
+    "applicable_standards": ["TEC GR/CUG-01/03"],
+    "specifications": [{"component": "Conductor", "parameter": "Diameter", "value": "0.5mm", "tolerance": "± 0.010mm"}],
+}
+
+def test_trivial_spelling_differences_share_a_key():
+    assert normalize_description("50 Pair, 0.5 mm PIJF  Armoured") == "50 pair 0.5mm pijf armoured"
+    fp = constraints_fingerprint(CONSTRAINTS)
+    assert memo_key("50 Pair, 0.5 mm PIJF", fp, "v1") == memo_key("50 pair 0.5mm pijf", fp, "v1")
+
+def test_requested_make_and_mii_declaration_change_the_key():
+    fp = constraints_fingerprint(CONSTRAINTS)
+    base = memo_key("50 pair 0.5mm pijf", fp, "v1")
+    assert memo_key("50 pair 0.5mm pijf", fp, "v1", requested_make="Polycab") != base
+    assert memo_key("50 pair 0.5mm pijf", fp, "v1", requires_mii=True) != base
+    assert memo_key("50 pair 0.5mm pijf", fp, "v1", requested_make=" polycab ") == memo_key("50 pair 0.5mm pijf", fp, "v1", requested_make="Polycab")
+    assert memo_key("50 pair 0.5mm pijf", fp, "v1", requested_make=None) == memo_key("50 pair 0.5mm pijf", fp, "v1", requested_make="")
+
+def test_constraints_and_catalog_version_change_the_key():
+    fp = constraints_fingerprint(CONSTRAINTS)
+    changed = constraints_fingerprint({**CONSTRAINTS, "applicable_standards": ["IS 694"]})
+    assert fp != changed
+    assert memo_key("x", fp, "v1") != memo_key("x", changed, "v1")
+    assert memo_key("x", fp, "v1") != memo_key("x", fp, "v2")
+
+def test_constraints_fingerprint_ignores_order_and_case():
+    shuffled = {
+        "applicable_standards": ["tec gr/cug-01/03"],
+        "specifications": [{"component": "CONDUCTOR", "parameter": "diameter", "value": "0.5MM", "tolerance": "± 0.010mm"}],
+        "testing_requirements": ["Spark test"],  # Does not affect SKU selection
+    }
+    assert constraints_fingerprint(shuffled) == constraints_fingerprint(CONSTRAINTS)
+
+def test_memo_store_and_lookup(tmp_path):
+    memo = MatchMemo(str(tmp_path / "memo.db"))
+    entry = {"memo_key": "k1", "normalized_description": "d", "catalog_version": "v1", "recommendation": {"selected_sku": "A"}}
+    memo.store([entry])
+    memo.store([{**entry, "recommendation": {"selected_sku": "B"}}])
+    assert memo.lookup(["k1", "missing"]) == {"k1": {"selected_sku": "B"}}
+    assert memo.lookup([]) == {}
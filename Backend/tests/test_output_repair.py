@@ -0,0 +1,54 @@
+import json
+from src.schemas import SKUMatchOutput
+from src.utils.output_repair import PartialListParser, close_truncated_json, parse_json_lenient
+
+def _rec(item_no):
+    return {
+        "rfp_item_no": item_no,
+        "rfp_description": f"Item {item_no}",
+        "top_candidates": [{"sku_id": f"SKU-{item_no}", "description": "c", "spec_match_percent": 100, "justification": "j"}],
+        "selected_sku": f"SKU-{item_no}",
+        "selection_reason": "best",
+    }
+
+def test_complete_json_is_unchanged():
+    text = '{"a": [1, 2], "b": "x"}'
+    assert close_truncated_json(text) == text
+
+def test_truncated_array_keeps_complete_values():
+    assert json.loads(close_truncated_json('{"a": [1, 2, 3')) == {"a": [1, 2]}
+    assert json.loads(close_truncated_json('{"a": [1, 2, 3,')) == {"a": [1, 2, 3]}
+
+def test_half_written_string_and_key_are_dropped():
+    assert json.loads(close_truncated_json('{"a": "done", "b": "half')) == {"a": "done"}
+    assert json.loads(close_truncated_json('{"a": 1, "ke')) == {"a": 1}
+
+def test_nested_objects_are_closed():
+    data = json.loads(close_truncated_json('{"items": [{"id": 1}, {"id": 2, "tags": ["x", "y"'))
+    assert data == {"items": [{"id": 1}, {"id": 2, "tags": ["x", "y"]}]}
+
+def test_parse_json_lenient_reports_truncation():
+    assert parse_json_lenient('```json\n{"a": 1}\n```') == ({"a": 1}, False)
+    assert parse_json_lenient('{"a": [1, 2') == ({"a": [1]}, True)
+    assert parse_json_lenient("not json") == (None, False)
+
+def test_partial_list_parser_yields_each_element_once():
+    text = json.dumps({"recommendations": [_rec("1"), _rec("2"), _rec("3")]})
+    parser = PartialListParser(SKUMatchOutput, "recommendations")
+    seen = []
+    for end in range(0, len(text) + 1, 37):
+        seen.extend(parser.feed(text[:end]))
+    seen.extend(parser.feed(text))
+    assert [rec["rfp_item_no"] for rec in seen] == ["1", "2", "3"]
+
+def test_partial_list_parser_skips_invalid_elements():
+    bad = {"rfp_item_no": "9", "rfp_description": "x"}
+    text = json.dumps({"recommendations": [bad, _rec("2")]})
+    assert [rec["rfp_item_no"] for rec in PartialListParser(SKUMatchOutput, "recommendations").feed(text)] == ["2"]
+
+def test_partial_list_parser_restarts_on_shorter_text():
+    parser = PartialListParser(SKUMatchOutput, "recommendations")
+    first = json.dumps({"recommendations": [_rec("1"), _rec("2")]})
+    assert len(parser.feed(first)) == 2
+    # A new attempt streams from the start
+    assert [rec["rfp_item_no"] for rec in parser.feed(json.dumps({"recommendations": [_rec("7")]})[:-2])] == ["7"]
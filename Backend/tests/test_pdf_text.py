@@ -0,0 +1,36 @@
+import os
+import pytest
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, NameObject
+from src.utils import pdf_text
+from src.utils.file_utils import write_text_file
+from src.utils.pdf_text import INPUT_MODE_AUTO, INPUT_MODE_TEXT, build_document_parts
+
+@pytest.fixture
+def scanned_pdf(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_text, "PDF_TEXT_CACHE_DIR", str(tmp_path / "cache"))
+    path = str(tmp_path / "scanned.pdf")
+    writer = PdfWriter()
+    page = writer.add_blank_page(width=595, height=842)
+    content = DecodedStreamObject()
+    content.set_data(b"q 595 0 0 842 0 0 cm Q")   # Drawing operators only, no text layer (like a scan)
+    page[NameObject("/Contents")] = writer._add_object(content)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+def test_auto_mode_uploads_scanned_pdf(scanned_pdf, tmp_path):
+    parts = build_document_parts({"rfp_file_path": scanned_pdf, "run_folder": str(tmp_path), "input_mode": INPUT_MODE_AUTO})
+    assert parts[0]["type"] == "media"
+    assert os.listdir(tmp_path / "cache") == [f"{pdf_text.document_hash(open(scanned_pdf, 'rb').read())}.txt"]
+
+def test_text_mode_rejects_scanned_pdf(scanned_pdf, tmp_path):
+    with pytest.raises(ValueError, match="no usable text layer"):
+        build_document_parts({"rfp_file_path": scanned_pdf, "run_folder": str(tmp_path), "input_mode": INPUT_MODE_TEXT})
+
+def test_write_text_file_replaces_without_leftovers(tmp_path):
+    path = str(tmp_path / "layer.txt")
+    write_text_file(path, "first")
+    write_text_file(path, "second")
+    assert open(path, encoding="utf-8").read() == "second"
+    assert os.listdir(tmp_path) == ["layer.txt"]
@@ -0,0 +1,13 @@
+from src.agents import pricing
+from src.agents.pricing import close_bid_stream, get_bid_stream
+
+def test_closed_bid_stream_leaves_the_registry(tmp_path):
+    run_folder = str(tmp_path)
+    stream = get_bid_stream(run_folder)
+    assert get_bid_stream(run_folder) is stream
+    close_bid_stream(run_folder)
+    assert run_folder not in pricing._bid_streams
+    assert stream._closed
+    close_bid_stream(run_folder)  # Teardown after pricing_agent already closed it
+    assert get_bid_stream(run_folder) is not stream
+    close_bid_stream(run_folder)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from src.utils.pricing_math import compute_service_cost, count_priced_items, price_line, resolve_tax_rate
+from src.whatif import build_price_curve, evaluate_grid
+
+LINES = {
+    "base_price": np.array([780000.0, 420000.0, 95000.0]),
+    "qty": np.array([12.0, 30.0, 4.5]),
+    "item_margin": np.array([np.nan, 22.0, np.nan]),
+    "item_service_cost": 1500.0,
+    "base_global_margin": 18.0,
+    "base_transport": 3.0,
+    "base_tax_rate": 0.18,
+}
+
+def _scalar_total(margin, transport, tax_percent, shift=0.0, field="line_total"):
+    total = 0.0
+    for base, qty, override in zip(LINES["base_price"], LINES["qty"], LINES["item_margin"]):
+        line_margin = margin if np.isnan(override) else override + shift
+        total += price_line(float(base), float(qty), transport, line_margin, LINES["item_service_cost"], tax_percent / 100.0)[field]
+    return total
+
+def test_price_line_arithmetic():
+    line = price_line(1000.0, 2.0, 10.0, 20.0, 50.0, 0.18)
+    assert line["unit_selling_price"] == pytest.approx(1320.0)
+    assert line["total_material_cost"] == pytest.approx(2640.0)
+    assert line["tax_amount"] == pytest.approx(2690.0 * 0.18)
+    assert line["line_total"] == pytest.approx(2690.0 * 1.18)
+
+def test_grid_matches_price_line_per_scenario():
+    margins, transports, taxes, shifts = [10.0, 15.0], [1.0, 3.0, 5.0], [0.0, 18.0], [-2.0, 0.0, 2.0]
+    grid = evaluate_grid(LINES, margins, transports, taxes, shifts)
+    assert grid["grand_total"].shape == (2, 3, 2, 3)
+    for i, margin in enumerate(margins):
+        for j, transport in enumerate(transports):
+            for k, tax in enumerate(taxes):
+                for s, shift in enumerate(shifts):
+                    assert grid["grand_total"][i, j, k, s] == pytest.approx(_scalar_total(margin, transport, tax, shift))
+                    assert grid["total_tax"][i, j, k, s] == pytest.approx(_scalar_total(margin, transport, tax, shift, "tax_amount"))
+    assert np.all(grid["total_service"] == 1500.0 * 3)
+
+def test_price_curve_delta_is_zero_at_the_run_strategy():
+    rows = build_price_curve(LINES, [18.0, 20.0], [3.0], [18.0])
+    assert rows[0]["delta_vs_base_percent"] == 0.0
+    assert rows[1]["delta_vs_base_percent"] > 0.0
+    assert rows[0]["grand_total"] == pytest.approx(_scalar_total(18.0, 3.0, 18.0), abs=0.01)
+
+def test_tax_rate_and_priced_items():
+    assert resolve_tax_rate({"taxes_and_duties": "Prices inclusive of GST"}) == 0.0
+    assert resolve_tax_rate({"taxes_and_duties": "Extra as applicable"}) == 0.18
+    assert count_priced_items([{"selected_sku": "A"}, {"selected_sku": "NO_MATCH"}, {"matched_sku": "B"}]) == 2
+
+def test_service_cost_needs_two_shared_words():
+    catalog = {"water penetration test": 4000.0, "spark test": 1000.0}
+    total, matched = compute_service_cost(["Water penetration test on drum", "Spark"], catalog)
+    assert total == 4000.0
+    assert matched == ["water penetration test (4000.0)"]
@@ -0,0 +1,56 @@
+import threading
+from src.agents.ratelimit import AdaptiveLimiter, parse_retry_after, set_run_urgency
+
+def test_limit_grows_additively_on_success():
+    limiter = AdaptiveLimiter(initial=2, minimum=1, maximum=4)
+    for _ in range(4):
+        assert limiter.acquire(timeout=0)
+        limiter.release()
+    # +1/limit per success: two successes at 2, then the limit reaches 3
+    assert limiter.limit == 3
+
+def test_rate_limit_halves_once_per_cooldown():
+    limiter = AdaptiveLimiter(initial=8, minimum=1, maximum=16)
+    for _ in range(3):
+        limiter.acquire(timeout=0)
+    for _ in range(3):
+        limiter.release(rate_limited=True)
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+def test_limit_never_drops_below_minimum():
+    limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=4)
+    limiter.acquire(timeout=0)
+    limiter.release(rate_limited=True)
+    assert limiter.limit == 1
+
+def test_acquire_blocks_at_the_limit():
+    limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=1)
+    assert limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0.05)
+    limiter.release()
+    assert limiter.acquire(timeout=0)
+
+def test_capacity_is_reserved_for_urgent_runs():
+    limiter = AdaptiveLimiter(initial=4, minimum=1, maximum=4)
+    limiter.set_urgent_runs(1)
+    results = []
+
+    def take(urgent):
+        set_run_urgency(urgent)
+        results.append(limiter.acquire(timeout=0))
+
+    for _ in range(4):
+        worker = threading.Thread(target=take, args=(False,))
+        worker.start()
+        worker.join()
+    assert results == [True, True, True, False]
+    worker = threading.Thread(target=take, args=(True,))
+    worker.start()
+    worker.join()
+    assert results[-1] is True
+
+def test_parse_retry_after_from_error_text():
+    assert parse_retry_after(Exception('429 RESOURCE_EXHAUSTED "retryDelay": "37s"')) == 37.0
+    assert parse_retry_after(Exception("Please retry in 2.5s")) == 2.5
+    assert parse_retry_after(Exception("boom")) is None
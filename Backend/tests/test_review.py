@@ -0,0 +1,19 @@
+import json
+from src.agents.review import universal_reviewer_agent
+from src.utils.metrics import get_metrics
+from src.utils.review_memo import artifact_fingerprint
+
+def test_identical_retry_is_recorded_as_unreviewed(tmp_path):
+    commercial = {"payment_terms": "90% on delivery"}
+    reviewed = artifact_fingerprint("commercial", f"Commercial Terms: {json.dumps(commercial, indent=2)}")
+    state = {
+        "run_folder": str(tmp_path),
+        "commercial": commercial,
+        "retry_count": {"commercial": 1},
+        "review_history": {"commercial": [reviewed]},
+    }
+    update = universal_reviewer_agent(state, "commercial")
+    assert update == {"review_feedback": {"commercial": None}, "retry_count": {"commercial": 0}}
+    metrics = get_metrics(str(tmp_path))
+    assert metrics["review.unreviewed"] == [{"phase": "commercial", "reason": "identical retry"}]
+    assert metrics["review.commercial.stopped_identical"] == 1
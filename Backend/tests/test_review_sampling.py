@@ -0,0 +1,46 @@
+from src.utils.review_sampling import estimate_tokens, extra_shards, shard_items, stratified_sample
+
+def _items(count, risky=lambda idx: False):
+    return [{"no": idx, "category": f"cat-{idx % 3}", "pad": "x" * 400, "risky": risky(idx)} for idx in range(count)]
+
+def _stratum(item, idx, total):
+    return (item["category"], idx * 4 // total)
+
+def test_everything_is_reviewed_within_budget():
+    items = _items(5)
+    assert stratified_sample(items, _stratum, token_budget=10_000) == list(range(5))
+
+def test_sample_respects_budget_and_covers_every_stratum():
+    items = _items(200)
+    selected = stratified_sample(items, _stratum, token_budget=2_000)
+    assert sum(estimate_tokens(items[idx]) for idx in selected) <= 2_000
+    assert selected == sorted(selected)
+    assert {_stratum(items[idx], idx, len(items)) for idx in selected} == {_stratum(item, idx, len(items)) for idx, item in enumerate(items)}
+
+def test_sample_is_repeatable():
+    items = _items(200)
+    assert stratified_sample(items, _stratum, token_budget=2_000) == stratified_sample(items, _stratum, token_budget=2_000)
+
+def test_priority_items_are_always_selected():
+    items = _items(200, risky=lambda idx: idx % 2 == 0)
+    selected = stratified_sample(items, _stratum, token_budget=2_000, is_priority=lambda item: item["risky"])
+    assert {idx for idx in range(200) if idx % 2 == 0} <= set(selected)
+
+def test_priority_overflow_gets_extra_shards():
+    items = _items(200, risky=lambda idx: True)
+    selected = [items[idx] for idx in stratified_sample(items, _stratum, token_budget=2_000, is_priority=lambda item: item["risky"])]
+    extra = extra_shards(selected, token_budget=2_000, shard_tokens=1_000)
+    assert extra > 0
+    shards = shard_items(selected, shard_tokens=1_000, max_shards=4 + extra)
+    assert 4 < len(shards) <= 4 + extra
+    assert sum(len(shard) for shard in shards) == len(selected)
+
+def test_no_extra_shards_within_budget():
+    assert extra_shards(_items(2), token_budget=10_000) == 0
+
+def test_shard_items_keeps_order():
+    items = _items(10)
+    shards = shard_items(items, shard_tokens=200, max_shards=3)
+    assert len(shards) == 3
+    assert [item for shard in shards for item in shard] == items
+    assert shard_items([]) == [[]]
@@ -0,0 +1,60 @@
+import os
+from src.utils.rule_matcher import item_requirements, load_catalog_rows, match_by_rules, score_candidate, spec_checks
+
+CATALOG = load_catalog_rows(os.path.join(os.path.dirname(__file__), "..", "data", "catalog", "products.csv"))
+STANDARDS = ["TEC GR/CUG-01/03 Aug-2003"]
+
+def _item(item_no, description, **extra):
+    return {"rfp_item_no": item_no, "description": description, "quantity": 10, "unit": "km", "category": "Telecom Cable", **extra}
+
+def _constraints(specifications=()):
+    return {"applicable_standards": STANDARDS, "specifications": list(specifications)}
+
+def _row(sku):
+    return next(row for row in CATALOG if row["SKU"] == sku)
+
+def test_item_requirements_parses_stated_attributes():
+    required = item_requirements(_item("1", "100 Pair 0.5mm PIJF Armoured cable"), ["PIJF", "UTP"])
+    assert required == {"pair_count": 100, "conductor_dia_mm": 0.5, "construction": ["PIJF"], "armouring": True}
+    assert item_requirements(_item("2", "Unarmoured cable"), [])["armouring"] is False
+
+def test_fully_specified_item_is_matched_by_rules():
+    resolved, ambiguous = match_by_rules([_item("1", "100 Pair 0.5mm PIJF Armoured cable")], _constraints(), CATALOG)
+    assert not ambiguous
+    # Ties are broken on MII content first
+    assert resolved[0]["selected_sku"] == "FIN-PIJF-100P-05"
+    assert resolved[0]["top_candidates"][0]["missing_specs"] == []
+
+def test_vague_item_is_left_for_the_llm():
+    resolved, ambiguous = match_by_rules([_item("1", "Telecom cable")], _constraints(), CATALOG)
+    assert not resolved and len(ambiguous) == 1
+
+def test_requested_make_restricts_candidates():
+    item = _item("1", "100 Pair 0.5mm PIJF Armoured cable", requested_make="Polycab")
+    resolved, _ = match_by_rules([item], _constraints(), CATALOG)
+    assert resolved[0]["selected_sku"] == "POL-PIJF-100P-05"
+
+def test_spec_checks_keep_catalog_answerable_specs():
+    checks = spec_checks(_constraints([
+        {"component": "PIJF Cable Conductor", "parameter": "Diameter", "value": "0.5mm", "tolerance": "± 0.010mm"},
+        {"component": "PIJF Cable Conductor", "parameter": "Material", "value": "Annealed Copper"},
+        {"component": "PIJF Cable Conductor", "parameter": "Resistance", "value": "86 Ohms/km"},
+    ]))
+    assert [check["column"] for check in checks] == ["Conductor_Dia_mm", "Conductor_Type"]
+    assert checks[0]["family"] == "pijf" and checks[0]["tolerance"] == 0.01
+
+def test_violated_specification_blocks_the_rule_match():
+    specs = [{"component": "PIJF Cable Conductor", "parameter": "Diameter", "value": "0.4mm", "tolerance": "± 0.010mm"}]
+    resolved, ambiguous = match_by_rules([_item("1", "100 Pair 0.5mm PIJF Armoured cable")], _constraints(specs), CATALOG)
+    assert not resolved and len(ambiguous) == 1
+
+def test_specification_of_another_cable_family_does_not_apply():
+    specs = [{"component": "UTP Cable Conductor", "parameter": "Material", "value": "Aluminium"}]
+    resolved, _ = match_by_rules([_item("1", "100 Pair 0.5mm PIJF Armoured cable")], _constraints(specs), CATALOG)
+    assert len(resolved) == 1
+
+def test_score_candidate_reports_missing_material():
+    checks = spec_checks(_constraints([{"component": "PIJF Cable Conductor", "parameter": "Material", "value": "Aluminium"}]))
+    percent, matched, missing = score_candidate(_row("FIN-PIJF-100P-05"), {"pair_count": 100}, [], checks)
+    assert percent == 50.0 and matched == ["pair count"]
+    assert missing and missing[0].startswith("PIJF Cable Conductor Material")
@@ -0,0 +1,83 @@
+import os
+import json
+import time
+from src.utils.run_archive import (
+    RunArchive,
+    archive_month,
+    compactable_runs,
+    ensure_live_run,
+    mark_run_completed,
+    read_run_artifact,
+    run_completed_at
+)
+
+DAY = 86400
+
+def make_run(runs_dir, run_id, files, age_days=30, completed=True):
+    run_dir = os.path.join(str(runs_dir), run_id)
+    os.makedirs(run_dir)
+    for name, content in files.items():
+        path = os.path.join(run_dir, *name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+    if completed:
+        mark_run_completed(run_dir)
+    stamp = time.time() - age_days * DAY
+    for root, _, names in os.walk(run_dir, topdown=False):
+        for name in names:
+            os.utime(os.path.join(root, name), (stamp, stamp))
+        os.utime(root, (stamp, stamp))
+    return run_dir
+
+def test_only_old_completed_runs_are_compactable(tmp_path):
+    runs = tmp_path / "runs"
+    old = make_run(runs, "old", {"07_final_bid.json": "{}"})
+    make_run(runs, "recent", {"07_final_bid.json": "{}"}, age_days=1)
+    make_run(runs, "failed", {"run_metrics.json": "{}"}, completed=False)
+    assert compactable_runs(str(runs), keep_days=14) == [old]
+
+def test_archive_round_trip(tmp_path):
+    runs = tmp_path / "runs"
+    bid = json.dumps({"grand_total": 31415905.0})
+    run_dir = make_run(runs, "run_a", {"07_final_bid.json": bid, "profile/llm_calls.jsonl": "{}\n"})
+    completed_at = run_completed_at(run_dir)
+    archive = RunArchive(str(tmp_path / "archive"))
+
+    archived = archive.archive_runs(compactable_runs(str(runs), keep_days=14))
+    assert [run["run_id"] for run in archived] == ["run_a"]
+    assert archived[0]["month"] == archive_month(completed_at)
+    assert not os.path.exists(run_dir)
+    assert "profile/llm_calls.jsonl" in archive.list_files("run_a")
+    assert read_run_artifact("run_a", "07_final_bid.json", str(runs), archive).decode() == bid
+
+    assert ensure_live_run(run_dir, archive)
+    with open(os.path.join(run_dir, "07_final_bid.json"), encoding="utf-8") as f:
+        assert f.read() == bid
+    assert archive_month(run_completed_at(run_dir)) == archived[0]["month"]
+    assert not ensure_live_run(run_dir, archive)  # Already live
+
+def test_rearchiving_a_changed_run_rebuilds_its_entries(tmp_path):
+    runs = tmp_path / "runs"
+    run_dir = make_run(runs, "run_a", {"07_final_bid.json": "{}", "what_if_price_curve.csv": "old"})
+    archive = RunArchive(str(tmp_path / "archive"))
+    archive.archive_runs([run_dir])
+    archive.restore_run("run_a", str(runs))
+    with open(os.path.join(run_dir, "what_if_price_curve.csv"), "w", encoding="utf-8") as f:
+        f.write("re-generated curve")
+    archive.archive_runs([run_dir])
+    assert archive.read_artifact("run_a", "what_if_price_curve.csv") == b"re-generated curve"
+
+def test_legacy_run_without_marker_is_archived(tmp_path):
+    runs = tmp_path / "runs"
+    legacy = make_run(runs, "legacy", {"07_final_bid.json": "{}", "Annexure_VI_Price_Bid.csv": "S.No\n"}, age_days=60, completed=False)
+    make_run(runs, "legacy_unfinished", {"07_final_bid.json": "{}"}, age_days=60, completed=False)
+    newest = max(os.path.getmtime(os.path.join(legacy, name)) for name in os.listdir(legacy))
+    assert run_completed_at(legacy) >= newest
+
+    assert compactable_runs(str(runs), keep_days=14) == [legacy]
+    archive = RunArchive(str(tmp_path / "archive"))
+    archived = archive.archive_runs([legacy])
+    assert archived[0]["run_id"] == "legacy"
+    assert not os.path.exists(legacy)
+    assert archive.read_artifact("legacy", "Annexure_VI_Price_Bid.csv") == b"S.No\n"
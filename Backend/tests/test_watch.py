@@ -0,0 +1,58 @@
+import time
+from types import SimpleNamespace
+from src.utils.folder_watch import IngestLedger
+from src.watch import WatchDaemon
+
+PDF = b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+
+class FakeScheduler:
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, path):
+        job = SimpleNamespace(run_id=f"run_{len(self.jobs) + 1}", status="queued", run_folder=None, error=None)
+        self.jobs.append(job)
+        return job
+
+    def wait(self):
+        pass
+
+def make_daemon(tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir(exist_ok=True)
+    daemon = WatchDaemon([str(inbox)], FakeScheduler(), IngestLedger(str(tmp_path / "ledger.db")), polling=True)
+    return daemon, inbox
+
+def drop(inbox, name, data=PDF):
+    path = inbox / name
+    path.write_bytes(data)
+    return str(path)
+
+def test_redropped_tender_is_queued_once(tmp_path):
+    daemon, inbox = make_daemon(tmp_path)
+    daemon._ingest(drop(inbox, "tender.pdf"), time.monotonic())
+    daemon._ingest(drop(inbox, "tender (1).pdf"), time.monotonic())
+    assert [job.run_id for job in daemon.scheduler.jobs] == ["run_1"]
+
+def test_failed_tender_can_be_dropped_again(tmp_path):
+    daemon, inbox = make_daemon(tmp_path)
+    path = drop(inbox, "tender.pdf")
+    daemon._ingest(path, time.monotonic())
+    daemon.scheduler.jobs[0].status = "failed"
+    daemon._sync_statuses()
+    daemon._ingest(path, time.monotonic())
+    assert len(daemon.scheduler.jobs) == 2
+
+def test_restart_requeues_unfinished_and_skips_done(tmp_path):
+    daemon, inbox = make_daemon(tmp_path)
+    daemon._ingest(drop(inbox, "a.pdf"), time.monotonic())
+    daemon._ingest(drop(inbox, "b.pdf", PDF + b"\n"), time.monotonic())
+    daemon.scheduler.jobs[0].status = "done"
+    daemon._sync_statuses()
+
+    restarted, _ = make_daemon(tmp_path)
+    restarted._requeue_unfinished()
+    assert len(restarted.scheduler.jobs) == 1
+    assert restarted._jobs["run_1"]["path"].endswith("b.pdf")
+    restarted._ingest(str(inbox / "a.pdf"), time.monotonic())
+    assert len(restarted.scheduler.jobs) == 1